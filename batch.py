@@ -0,0 +1,116 @@
+"""CSC111 Winter 2024 Project 2: Batch Path Queries
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the function responsible for answering many friend path queries at
+once. Queries are grouped by their starting person so each shortest-path tree is built only once,
+and the groups are spread over a pool of worker processes.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited.
+
+This file is Copyright (c) 2024 CSC111 Friend Network
+"""
+from __future__ import annotations
+from typing import Any, Iterable, Iterator
+import multiprocessing
+
+import data
+import worker_pool
+from compact import CompactGraph
+
+
+def batch_friend_paths(graph_tuple: tuple[data.Graph, data.WeightedGraph] | tuple[CompactGraph, CompactGraph],
+                       pairs: Iterable[tuple[str, str]], weighted: bool = False, workers: int | None = None,
+                       ordered: bool = True) -> Iterator[tuple[int, list[tuple]]]:
+    """Yield (i, path) for each (start, end) pair in pairs, where path is the shortest path of
+    mutuals from start to end, as returned by get_friend_path, and i is the position of that pair.
+
+    Pairs with the same start are answered together from a single shortest-path tree. If workers
+    is greater than 1, or None for one worker per CPU, the groups are spread over a process pool.
+    On platforms that can fork, the workers share the graph with this process instead of receiving
+    a copy. Results are yielded in input order if ordered is True, and otherwise as soon as each
+    group is finished.
+
+    >>> g = data.Graph()
+    >>> for name in ['a', 'b', 'c']:
+    ...     g.add_vertex(name)
+    >>> g.add_edge('a', 'b')
+    >>> g.add_edge('b', 'c')
+    >>> list(batch_friend_paths((g, None), [('a', 'c'), ('c', 'b'), ('a', 'b')], workers=1))
+    [(0, [('a', 'b'), ('b', 'c')]), (1, [('c', 'b')]), (2, [('a', 'b')])]
+
+    Preconditions:
+        - every person in pairs is a vertex in the graph
+    """
+    graph = graph_tuple[1] if weighted else graph_tuple[0]
+
+    # Map each start to the positions and ends of its pairs, in order of first appearance
+    groups = {}
+    for i, (start, end) in enumerate(pairs):
+        groups.setdefault(start, ([], []))
+        groups[start][0].append(i)
+        groups[start][1].append(end)
+    tasks = [(start, positions, ends) for start, (positions, ends) in groups.items()]
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    if workers <= 1 or len(tasks) <= 1:
+        yield from _in_order((_answer_group(graph, task) for task in tasks), ordered)
+        return
+
+    chunksize = max(1, len(tasks) // (workers * 16))
+    with worker_pool.start_pool(workers, graph) as pool:
+        yield from _in_order(pool.imap_unordered(_answer_group_in_worker, tasks, chunksize), ordered)
+
+
+def _in_order(results: Iterable[list[tuple[int, list[tuple]]]],
+              ordered: bool) -> Iterator[tuple[int, list[tuple]]]:
+    """Yield the (position, path) pairs in the given group results, holding back each one until
+    every earlier position has been yielded if ordered is True.
+    """
+    waiting = {}
+    next_position = 0
+    for result in results:
+        if not ordered:
+            yield from result
+            continue
+
+        waiting.update(result)
+        while next_position in waiting:
+            yield next_position, waiting.pop(next_position)
+            next_position += 1
+
+
+def _answer_group(graph: Any, task: tuple[str, list[int], list[str]]) -> list[tuple[int, list[tuple]]]:
+    """Return (position, path) for every end of the given (start, positions, ends) task."""
+    start, positions, ends = task
+    return list(zip(positions, graph.get_friend_paths(start, ends)))
+
+
+def _answer_group_in_worker(task: tuple[str, list[int], list[str]]) -> list[tuple[int, list[tuple]]]:
+    """Return (position, path) for every end of the given task, using this worker's graph."""
+    return _answer_group(worker_pool.worker_shared(), task)
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['multiprocessing', 'data', 'worker_pool', 'compact'],
+        'max-line-length': 120,
+    })
@@ -0,0 +1,19 @@
+"""CSC111 Winter 2024 Project 2: Benchmarks
+
+This package contains a generator of synthetic friend networks of any size (generate.py), and a
+harness that times the main operations of the project on them and saves the results as JSON so
+that two revisions can be compared (run.py). Run them from the root of the project, for example:
+
+    python -m benchmarks.run --edges 1000 100000 --output before.json
+    python -m benchmarks.run --compare before.json after.json
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited.
+
+This file is Copyright (c) 2024 CSC111 Friend Network
+"""
@@ -0,0 +1,175 @@
+"""CSC111 Winter 2024 Project 2: Synthetic Friend Networks
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the functions responsible for generating synthetic friend networks
+that look like the SNAP ego networks in data/edges.txt, at any size. People are split into
+communities of power-law sizes and given power-law expected degrees, and friendships are drawn with
+probability proportional to the degrees of both people (the Chung-Lu model), mostly within a
+community. The networks are written in the same formats that data.load_friend_network reads.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited.
+
+This file is Copyright (c) 2024 CSC111 Friend Network
+"""
+from __future__ import annotations
+import os
+
+import numpy as np
+
+# The names file used as the base for generated names
+FIRST_NAMES_FILE = 'data/first-names.txt'
+
+# The number of edges drawn and written at a time, to bound memory
+_CHUNK_EDGES = 1 << 20
+
+
+def generate_edges(num_edges: int, average_degree: float = 20.0, exponent: float = 2.5, mixing: float = 0.1,
+                   community_exponent: float = 2.0, seed: int = 1) -> tuple[int, np.ndarray]:
+    """Return the number of people and an (m, 2) array of the distinct friendships of a synthetic
+    friend network with num_edges friendships, sorted by the first and then the second person.
+
+    The network has about 2 * num_edges / average_degree people. Their expected degrees follow a
+    power law with the given exponent, and the sizes of their communities follow a power law with
+    community_exponent. A fraction mixing of the friendships of each person join two communities.
+    The same arguments always give the same network.
+
+    >>> n, edges = generate_edges(1000, seed=3)
+    >>> (n, edges.shape)
+    (100, (1000, 2))
+    >>> bool((edges[:, 0] < edges[:, 1]).all())
+    True
+    >>> np.array_equal(edges, generate_edges(1000, seed=3)[1])
+    True
+
+    Preconditions:
+        - num_edges >= 1
+        - average_degree > 1 and exponent > 2 and community_exponent > 1
+        - 0 <= mixing <= 1
+        - num_edges <= n * (n - 1) / 2 for the resulting n
+    """
+    rng = np.random.default_rng(seed)
+    n = max(2, round(2 * num_edges / average_degree))
+
+    # Power-law expected degrees (Pareto with minimum 1, scaled to the average degree)
+    degrees = rng.pareto(exponent - 1, n) + 1
+    degrees = np.minimum(degrees, np.sqrt(n) * degrees.mean())
+    degrees *= average_degree / degrees.mean()
+
+    # Power-law community sizes, covering everyone, in random order
+    sizes = []
+    remaining = n
+    while remaining > 0:
+        size = min(remaining, max(2, int(rng.pareto(community_exponent - 1) * 10 + 5)))
+        sizes.append(size)
+        remaining -= size
+    community_starts = np.concatenate([[0], np.cumsum(sizes)])
+    people = rng.permutation(n)
+    community = np.repeat(np.arange(len(sizes)), sizes)[np.argsort(people)]
+
+    # Cumulative degree weights of everyone (ordered by community), for proportional sampling
+    by_community = people
+    cumulative = np.cumsum(degrees[by_community])
+
+    found = np.empty(0, dtype=np.int64)
+    while len(found) < num_edges:
+        wanted = max(1024, int((num_edges - len(found)) * 1.1))
+        u = _sample(rng, cumulative, 0, n, wanted)
+        u = by_community[u]
+
+        # Partners are drawn from u's community, except for a fraction mixing drawn from everyone
+        local = rng.random(wanted) >= mixing
+        first = np.where(local, community_starts[community[u]], 0)
+        last = np.where(local, community_starts[community[u] + 1], n)
+        v = by_community[_sample(rng, cumulative, first, last, wanted)]
+
+        keep = u != v
+        low, high = np.minimum(u, v)[keep], np.maximum(u, v)[keep]
+        found = np.sort(np.concatenate([found, low.astype(np.int64) * n + high]))
+        found = found[np.concatenate([[True], found[1:] != found[:-1]])]
+        # Keep a random subset if too many were found, so the result does not favour low ids
+        if len(found) > num_edges:
+            found = np.sort(rng.choice(found, num_edges, replace=False))
+
+    return n, np.stack([found // n, found % n], axis=1)
+
+
+def _sample(rng: np.random.Generator, cumulative: np.ndarray, first: np.ndarray | int,
+            last: np.ndarray | int, size: int) -> np.ndarray:
+    """Return size positions drawn with probability proportional to their weight from the
+    ranges first <= i < last, where cumulative holds the running totals of the weights.
+    """
+    low = np.where(np.asarray(first) > 0, cumulative[np.maximum(np.asarray(first) - 1, 0)], 0.0)
+    high = cumulative[np.asarray(last) - 1]
+    targets = low + rng.random(size) * (high - low)
+    positions = np.searchsorted(cumulative, targets, side='right')
+    return np.clip(positions, first, np.asarray(last) - 1)
+
+
+def write_network(directory: str, num_edges: int, seed: int = 1, **options: float) -> tuple[str, str]:
+    """Generate a synthetic friend network with generate_edges and write it to the given directory,
+    and return the paths of its names file and edges file.
+
+    The edges file has one "user1 user2" line per friendship, like data/edges.txt, and the names
+    file has one unique name per person, built from FIRST_NAMES_FILE if it exists. Files that were
+    already generated with the same arguments are reused.
+    """
+    suffix = ''.join(f'-{key}{value}' for key, value in sorted(options.items()))
+    stem = os.path.join(directory, f'synthetic-{num_edges}-seed{seed}{suffix}')
+    names_file, edges_file = stem + '-names.txt', stem + '-edges.txt'
+    if os.path.exists(names_file) and os.path.exists(edges_file):
+        return names_file, edges_file
+
+    os.makedirs(directory, exist_ok=True)
+    n, edges = generate_edges(num_edges, seed=seed, **options)
+
+    # Write to temporary files first so an interrupted run never leaves half a network behind
+    with open(edges_file + '.tmp', 'w') as f:
+        for start in range(0, len(edges), _CHUNK_EDGES):
+            chunk = edges[start:start + _CHUNK_EDGES]
+            f.write('\n'.join(f'{u} {v}' for u, v in chunk.tolist()))
+            f.write('\n')
+
+    with open(names_file + '.tmp', 'w') as f:
+        f.write('\n'.join(_unique_names(n)))
+        f.write('\n')
+
+    os.replace(edges_file + '.tmp', edges_file)
+    os.replace(names_file + '.tmp', names_file)
+    return names_file, edges_file
+
+
+def _unique_names(n: int) -> list[str]:
+    """Return n distinct names, built from the names in FIRST_NAMES_FILE with numbered suffixes
+    once they run out.
+    """
+    base = ['person']
+    if os.path.exists(FIRST_NAMES_FILE):
+        with open(FIRST_NAMES_FILE) as f:
+            base = list(dict.fromkeys(line.strip() for line in f if line.strip() and line.strip() != 'raven')) or base
+
+    return [base[i % len(base)] + (str(i // len(base)) if i >= len(base) else '') for i in range(n)]
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['os', 'numpy'],
+        'allowed-io': ['write_network', '_unique_names'],
+        'max-line-length': 120,
+    })
@@ -0,0 +1,225 @@
+"""CSC111 Winter 2024 Project 2: Benchmark Harness
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the harness that measures the main operations of the project on
+synthetic friend networks of the given sizes: loading the network, unweighted and weighted friend
+path queries, conversion to networkx and visualization (without opening a browser). Each is timed,
+and measured once more under tracemalloc for its peak memory. The results are saved as JSON, and
+two result files can be compared.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited.
+
+This file is Copyright (c) 2024 CSC111 Friend Network
+"""
+from __future__ import annotations
+from typing import Any, Callable
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import data
+import visualize
+from benchmarks.generate import write_network
+
+# Where generated networks are kept between runs
+BENCHMARK_DATA_DIR = os.path.join('benchmarks', '.data')
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def run_benchmarks(sizes: list[int], queries: int = 100, repeat: int = 3, seed: int = 1,
+                   directory: str = BENCHMARK_DATA_DIR, memory: bool = True) -> dict[str, Any]:
+    """Return the benchmark results for synthetic networks with each of the given numbers of
+    friendships, generated with the given seed.
+
+    Every operation is run repeat times and its fastest time is kept. Path queries are timed over
+    the same queries random pairs of people, and reported per query. If memory is True, each
+    operation is run once more with tracemalloc to record the peak memory it allocated.
+    """
+    results = {
+        'revision': _git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'options': {'queries': queries, 'repeat': repeat, 'seed': seed},
+        'results': {},
+    }
+
+    for size in sizes:
+        names_file, edges_file = write_network(directory, size, seed)
+        graphs = data.load_friend_network(names_file, edges_file)
+        people = list(graphs[0].get_vertices())
+        rng = random.Random(seed)
+        pairs = [tuple(rng.sample(people, 2)) for _ in range(queries)]
+
+        def load() -> None:
+            data.load_friend_network(names_file, edges_file)
+
+        def paths(graph: data.Graph) -> Callable[[], None]:
+            def run() -> None:
+                for start, end in pairs:
+                    graph.get_friend_path(start, end)
+            return run
+
+        def draw() -> None:
+            start, end = pairs[0]
+            with tempfile.TemporaryDirectory() as temp_dir, _working_directory(temp_dir), \
+                    contextlib.redirect_stdout(io.StringIO()):
+                visualize.visualize_graph(graphs, start, end, False, auto_open=False,
+                                          filename=os.path.join(temp_dir, 'plot.html'))
+
+        benchmarks = {
+            'load_friend_network': (load, 1),
+            'Graph.get_friend_path': (paths(graphs[0]), queries),
+            'WeightedGraph.get_friend_path': (paths(graphs[1]), queries),
+            'conv_networkx': (graphs[0].conv_networkx, 1),
+            'visualize_graph': (draw, 1),
+        }
+
+        entry = {'vertices': len(people), 'edges': size, 'benchmarks': {}}
+        for name, (function, count) in benchmarks.items():
+            entry['benchmarks'][name] = measure(function, repeat, count, memory)
+        results['results'][str(size)] = entry
+
+    return results
+
+
+def measure(function: Callable[[], Any], repeat: int = 3, count: int = 1, memory: bool = True) -> dict[str, Any]:
+    """Return the fastest time of repeat calls to function, divided by count, and the peak memory
+    allocated during one more call if memory is True.
+
+    If function raises an exception, such as an ImportError for an optional dependency, the
+    result records the error instead.
+    """
+    try:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+        result = {'seconds': min(times) / count, 'mean_seconds': sum(times) / len(times) / count}
+
+        if memory:
+            tracemalloc.start()
+            try:
+                function()
+                result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    except Exception as error:
+        return {'error': f'{type(error).__name__}: {error}'}
+
+    return result
+
+
+def compare(old: dict[str, Any], new: dict[str, Any]) -> list[tuple[str, str, float | None, float | None]]:
+    """Return (size, benchmark, speedup, memory ratio) for every benchmark in both results, where
+    speedup is the old time divided by the new time and memory ratio is the new peak memory divided
+    by the old one. Either is None if it was not measured in both.
+
+    >>> old = {'results': {'10': {'benchmarks': {'load': {'seconds': 2.0, 'peak_bytes': 100}}}}}
+    >>> new = {'results': {'10': {'benchmarks': {'load': {'seconds': 0.5, 'peak_bytes': 50}}}}}
+    >>> compare(old, new)
+    [('10', 'load', 4.0, 0.5)]
+    """
+    rows = []
+    for size, entry in new['results'].items():
+        if size not in old['results']:
+            continue
+        old_benchmarks = old['results'][size]['benchmarks']
+        for name, result in entry['benchmarks'].items():
+            if name not in old_benchmarks:
+                continue
+            before = old_benchmarks[name]
+            speedup = before['seconds'] / result['seconds'] \
+                if 'seconds' in before and result.get('seconds') else None
+            memory_ratio = result['peak_bytes'] / before['peak_bytes'] \
+                if 'peak_bytes' in result and before.get('peak_bytes') else None
+            rows.append((size, name, speedup, memory_ratio))
+    return rows
+
+
+def print_results(results: dict[str, Any]) -> None:
+    """Print the given benchmark results as a table."""
+    for size, entry in results['results'].items():
+        print(f'\n{size} friendships, {entry["vertices"]} people')
+        for name, result in entry['benchmarks'].items():
+            if 'error' in result:
+                print(f'  {name:32} {result["error"]}')
+            else:
+                peak = f'{result["peak_bytes"] / 2 ** 20:10.1f} MiB' if 'peak_bytes' in result else ''
+                print(f'  {name:32} {result["seconds"] * 1000:12.3f} ms {peak}')
+
+
+def print_comparison(rows: list[tuple[str, str, float | None, float | None]]) -> None:
+    """Print the rows returned by compare as a table."""
+    print(f'{"friendships":>12}  {"benchmark":32} {"speedup":>8} {"memory":>8}')
+    for size, name, speedup, memory_ratio in rows:
+        speedup_text = f'{speedup:7.2f}x' if speedup is not None else '       -'
+        memory_text = f'{memory_ratio:7.2f}x' if memory_ratio is not None else '       -'
+        print(f'{size:>12}  {name:32} {speedup_text} {memory_text}')
+
+
+@contextlib.contextmanager
+def _working_directory(path: str) -> Any:
+    """Run the body of a with statement in the given working directory, so that files written
+    relative to it (such as the layout cache) do not touch the project.
+    """
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def _git_revision() -> str | None:
+    """Return the current git commit of the project, or None if it is not known."""
+    try:
+        output = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True)
+        return output.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the friend network on synthetic networks.")
+    parser.add_argument('--edges', type=lambda text: int(float(text)), nargs='+', default=DEFAULT_SIZES,
+                        help="numbers of friendships of the generated networks, such as 1e3 1e5")
+    parser.add_argument('--queries', type=int, default=100, help="path queries timed per network")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--data-dir', default=BENCHMARK_DATA_DIR, help="where generated networks are kept")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc runs")
+    parser.add_argument('--output', help="save the results to this JSON file")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="compare two saved result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as old_file, open(args.compare[1]) as new_file:
+            print_comparison(compare(json.load(old_file), json.load(new_file)))
+    else:
+        benchmark_results = run_benchmarks(args.edges, args.queries, args.repeat, args.seed, args.data_dir,
+                                           not args.no_memory)
+        print_results(benchmark_results)
+        if args.output:
+            with open(args.output, 'w') as output_file:
+                json.dump(benchmark_results, output_file, indent=2)
@@ -0,0 +1,198 @@
+"""CSC111 Winter 2024 Project 2: Strongest Chains of Closeness
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains an index for bottleneck (widest path) queries on weighted friend
+networks. The strongest chain of closeness between two people is the path whose weakest link has
+the highest closeness. Every such chain can be found in a maximum spanning forest of the network,
+so the index builds one with Kruskal's algorithm and answers queries on it with binary lifting.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited.
+
+This file is Copyright (c) 2024 CSC111 Friend Network
+"""
+from __future__ import annotations
+from array import array
+from typing import Any
+import math
+
+import data
+
+
+class BottleneckIndex:
+    """A maximum spanning forest of a weighted graph, with the ancestor tables needed to find the
+    lowest common ancestor of any two vertices in O(log n) time.
+
+    The index describes the graph as it was when the index was built, so it must be rebuilt after
+    the graph changes.
+
+    Representation Invariants:
+        - len(self._items) == len(self._depth) == len(self._root)
+        - all(len(row) == len(self._items) for row in self._up)
+        - len(self._up) == len(self._weakest)
+
+    >>> g = data.WeightedGraph()
+    >>> for name in ['a', 'b', 'c', 'd', 'e']:
+    ...     g.add_vertex(name)
+    >>> for edge in [('a', 'b', 5), ('b', 'c', 2), ('a', 'd', 3), ('d', 'c', 4), ('b', 'd', 1)]:
+    ...     g.add_edge(*edge)
+    >>> index = BottleneckIndex(g)
+    >>> index.bottleneck('a', 'c')
+    3
+    >>> index.get_friend_path('a', 'c')
+    [('a', 'd'), ('d', 'c')]
+    >>> (index.bottleneck('a', 'e'), index.get_friend_path('a', 'e'))
+    (0, [])
+    """
+    # Private Instance Attributes:
+    #     - _ids: Maps each item of the graph to its vertex id.
+    #     - _items: The item of each vertex id.
+    #     - _depth: The depth of each vertex in its tree of the forest.
+    #     - _root: The root of the tree containing each vertex.
+    #     - _up: _up[j][v] is the ancestor 2 ** j levels above v, or the root of its tree if the
+    #         tree is not that deep.
+    #     - _weakest: _weakest[j][v] is the smallest weight on the 2 ** j edges above v (or on the
+    #         fewer edges up to the root).
+    _ids: dict[Any, int]
+    _items: list
+    _depth: array
+    _root: array
+    _up: list[array]
+    _weakest: list[list]
+
+    def __init__(self, graph: data.WeightedGraph) -> None:
+        """Build the maximum spanning forest of the given graph and its ancestor tables."""
+        vertices = graph.get_vertices()
+        self._items = list(vertices)
+        self._ids = {item: i for i, item in enumerate(self._items)}
+        n = len(self._items)
+
+        # Kruskal's algorithm, strongest edges first
+        edges = [(weight, self._ids[v.item], self._ids[u.item])
+                 for v in vertices.values() for u, weight in v.neighbours.items()
+                 if self._ids[v.item] < self._ids[u.item]]
+        edges.sort(key=lambda edge: edge[0], reverse=True)
+
+        components = data.UnionFind(range(n))
+        forest = [[] for _ in range(n)]
+        for weight, i, j in edges:
+            if components.union(i, j):
+                forest[i].append((j, weight))
+                forest[j].append((i, weight))
+            if components.count == 1:
+                break
+
+        # Root each tree and record every vertex's parent, depth and edge weight to its parent
+        parent = array('i', range(n))
+        parent_weight = [math.inf] * n
+        self._depth = array('i', [0]) * n
+        self._root = array('i', range(n))
+        visited = bytearray(n)
+        for root in range(n):
+            if visited[root]:
+                continue
+            visited[root] = 1
+            stack = [root]
+            while stack:
+                v = stack.pop()
+                for u, weight in forest[v]:
+                    if not visited[u]:
+                        visited[u] = 1
+                        parent[u] = v
+                        parent_weight[u] = weight
+                        self._depth[u] = self._depth[v] + 1
+                        self._root[u] = root
+                        stack.append(u)
+
+        self._up = [parent]
+        self._weakest = [parent_weight]
+        while (1 << len(self._up)) <= max(self._depth, default=0):
+            up, weakest = self._up[-1], self._weakest[-1]
+            self._up.append(array('i', (up[up[v]] for v in range(n))))
+            self._weakest.append([min(weakest[v], weakest[up[v]]) for v in range(n)])
+
+    def bottleneck(self, start: Any, end: Any) -> int | float:
+        """Return the highest closeness c such that start and end are joined by a path of mutuals
+        whose every edge has closeness at least c.
+
+        Return 0 if there is no path between start and end, and math.inf if start == end.
+
+        Preconditions:
+            - start and end are vertices in the graph of this index
+        """
+        i, j = self._ids[start], self._ids[end]
+        if self._root[i] != self._root[j]:
+            return 0
+
+        weakest = math.inf
+        # Lift the deeper vertex to the depth of the other
+        if self._depth[i] < self._depth[j]:
+            i, j = j, i
+        difference = self._depth[i] - self._depth[j]
+        level = 0
+        while difference:
+            if difference & 1:
+                weakest = min(weakest, self._weakest[level][i])
+                i = self._up[level][i]
+            difference >>= 1
+            level += 1
+
+        # Lift both to just below their lowest common ancestor
+        if i != j:
+            for level in range(len(self._up) - 1, -1, -1):
+                if self._up[level][i] != self._up[level][j]:
+                    weakest = min(weakest, self._weakest[level][i], self._weakest[level][j])
+                    i, j = self._up[level][i], self._up[level][j]
+            weakest = min(weakest, self._weakest[0][i], self._weakest[0][j])
+
+        return weakest
+
+    def get_friend_path(self, start: Any, end: Any) -> list[tuple[Any, Any]]:
+        """Returns the strongest chain of closeness between 2 people in the graph: a path of mutuals
+        whose weakest link is as close as possible
+
+        The path is read from the spanning forest, without any search. If there is no path,
+        returns an empty list
+
+        Preconditions:
+            - start and end are vertices in the graph of this index
+        """
+        i, j = self._ids[start], self._ids[end]
+        if self._root[i] != self._root[j]:
+            return []
+
+        parent = self._up[0]
+        start_side, end_side = [i], [j]
+        while self._depth[start_side[-1]] > self._depth[end_side[-1]]:
+            start_side.append(parent[start_side[-1]])
+        while self._depth[end_side[-1]] > self._depth[start_side[-1]]:
+            end_side.append(parent[end_side[-1]])
+        while start_side[-1] != end_side[-1]:
+            start_side.append(parent[start_side[-1]])
+            end_side.append(parent[end_side[-1]])
+
+        path = start_side + end_side[-2::-1]
+        return [(self._items[path[k]], self._items[path[k + 1]]) for k in range(len(path) - 1)]
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['array', 'math', 'data'],
+        'max-line-length': 120,
+    })
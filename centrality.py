@@ -0,0 +1,317 @@
+"""CSC111 Winter 2024 Project 2: Bridges in the Friend Network
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the function responsible for estimating the betweenness and closeness
+centrality of every person in the friend network. People with a high betweenness are the bridges
+between groups that keep appearing as intermediaries in friend paths.
+
+Exact betweenness needs a shortest-path search from every person. Instead, Brandes' dependency
+accumulation is run from a random sample of sources and scaled up, with the sample size chosen
+from the accuracy wanted. The searches are spread over a pool of worker processes, and the running
+totals can be saved after each finished group of sources so that an interrupted run can resume.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited.
+
+This file is Copyright (c) 2024 CSC111 Friend Network
+"""
+from __future__ import annotations
+from array import array
+from collections import deque
+from typing import Any, Iterator
+import heapq
+import json
+import math
+import multiprocessing
+import os
+import random
+import zlib
+
+import data
+import worker_pool
+from compact import CompactGraph
+
+# Identifies a file written by save_checkpoint
+CHECKPOINT_MAGIC = b'FNCENTRL'
+CHECKPOINT_VERSION = 1
+
+
+def sample_size(n: int, epsilon: float, delta: float) -> int:
+    """Return the number of sources needed so that, with probability at least 1 - delta, every
+    normalized betweenness estimate is within epsilon of its exact value.
+
+    Each sampled source contributes a value between 0 and n / (n - 1) to the estimate of every
+    vertex, so by Hoeffding's inequality and a union bound over the n vertices,
+    (n / (n - 1)) ** 2 * ln(2n / delta) / (2 * epsilon ** 2) sources are enough. Sampling every
+    vertex gives the exact values, so the result is at most n.
+
+    >>> sample_size(100000, 0.05, 0.1)
+    2902
+    >>> sample_size(50, 0.05, 0.1)
+    50
+
+    Preconditions:
+        - n >= 0
+        - 0 < epsilon and 0 < delta < 1
+    """
+    if n <= 2:
+        return n
+    scale = (n / (n - 1)) ** 2
+    return min(n, math.ceil(scale * math.log(2 * n / delta) / (2 * epsilon ** 2)))
+
+
+def centrality(graph: data.Graph | CompactGraph, samples: int | None = None, epsilon: float = 0.05,
+               delta: float = 0.1, seed: int = 1, workers: int | None = None,
+               checkpoint: str | None = None) -> tuple[dict[Any, float], dict[Any, float]]:
+    """Return the estimated normalized betweenness and harmonic closeness centrality of every
+    person in graph, as two dictionaries.
+
+    The estimates come from searches from samples sources drawn at random with the given seed, or
+    from sample_size(n, epsilon, delta) sources if samples is None. Paths are counted in edges for
+    a Graph and by total weight for a WeightedGraph or weighted CompactGraph. With n sources the
+    results are exact:
+        - the betweenness of v is the fraction of pairs of other people whose shortest paths pass
+          through v, where pairs with several shortest paths count each path fractionally
+        - the closeness of v is the average of 1 / d(v, u) over all other people u, where people v
+          cannot reach count as 0
+
+    If workers is greater than 1, or None for one worker per CPU, the searches are spread over a
+    process pool. If checkpoint is given, the running totals are saved there after every finished
+    group of sources, and a run with the same graph, seed and sample size resumes from them.
+
+    >>> g = data.Graph()
+    >>> for name in ['a', 'b', 'c', 'd']:
+    ...     g.add_vertex(name)
+    >>> for edge in [('a', 'b'), ('b', 'c'), ('c', 'd')]:
+    ...     g.add_edge(*edge)
+    >>> betweenness, closeness = centrality(g, samples=4, workers=1)
+    >>> [round(betweenness[name], 3) for name in 'abcd']
+    [0.0, 0.667, 0.667, 0.0]
+    >>> [round(closeness[name], 3) for name in 'abcd']
+    [0.611, 0.833, 0.833, 0.611]
+
+    Preconditions:
+        - every edge weight in graph is positive
+        - samples is None or 0 <= samples <= len(graph.get_vertices())
+    """
+    if not isinstance(graph, CompactGraph):
+        graph = CompactGraph.from_graph(graph)
+
+    n = graph.num_vertices()
+    if samples is None:
+        samples = sample_size(n, epsilon, delta)
+    sources = random.Random(seed).sample(range(n), samples)
+
+    key = {'graph': _graph_digest(graph), 'seed': seed, 'samples': samples}
+    done, betweenness, harmonic = set(), array('d', [0.0]) * n, array('d', [0.0]) * n
+    if checkpoint is not None and os.path.exists(checkpoint):
+        try:
+            done, betweenness, harmonic = load_checkpoint(checkpoint, key, n)
+        except (ValueError, KeyError, EOFError):
+            pass
+
+    remaining = [s for s in sources if s not in done]
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    # Enough groups to keep every worker busy and to checkpoint regularly
+    group_size = max(1, min(64, len(remaining) // (4 * max(1, workers)) + 1))
+    groups = [remaining[i:i + group_size] for i in range(0, len(remaining), group_size)]
+
+    for group, group_betweenness, group_harmonic in _run_groups(graph, groups, workers):
+        for v in range(n):
+            betweenness[v] += group_betweenness[v]
+            harmonic[v] += group_harmonic[v]
+        done.update(group)
+        if checkpoint is not None:
+            save_checkpoint(checkpoint, key, done, betweenness, harmonic)
+
+    # Every pair of people is counted once from each end, and the sample is scaled up to all n sources
+    pairs = (n - 1) * (n - 2)
+    betweenness_scale = n / samples / pairs if samples > 0 and pairs > 0 else 0.0
+    closeness_scale = n / samples / (n - 1) if samples > 0 and n > 1 else 0.0
+
+    return ({graph.get_item(v): betweenness[v] * betweenness_scale for v in range(n)},
+            {graph.get_item(v): harmonic[v] * closeness_scale for v in range(n)})
+
+
+def _run_groups(graph: CompactGraph, groups: list[list[int]], workers: int) -> Iterator[tuple[list[int], array, array]]:
+    """Yield (group, betweenness, harmonic) for each group of sources, where betweenness and
+    harmonic are the totals of the dependencies and inverse distances of those sources, as soon
+    as each group is finished.
+    """
+    lists = _csr_lists(graph)
+    if workers <= 1 or len(groups) <= 1:
+        for group in groups:
+            yield (group,) + _accumulate(lists, group)
+        return
+
+    with worker_pool.start_pool(workers, lists) as pool:
+        yield from pool.imap_unordered(_accumulate_in_worker, groups)
+
+
+def _csr_lists(graph: CompactGraph) -> tuple[list[int], list[int], list[int], bool]:
+    """Return the offsets, neighbours and weights arrays of graph as lists, which are faster to
+    index in the searches, and whether graph is weighted.
+    """
+    return list(graph._offsets), list(graph._neighbours), list(graph._weights), graph.weighted
+
+
+def _accumulate_in_worker(group: list[int]) -> tuple[list[int], array, array]:
+    """Return (group, betweenness, harmonic) for the given group, using this worker's _csr_lists."""
+    return (group,) + _accumulate(worker_pool.worker_shared(), group)
+
+
+def _accumulate(lists: tuple[list[int], list[int], list[int], bool], group: list[int]) -> tuple[array, array]:
+    """Return the total dependency of every vertex on the given sources, and the total of the
+    inverse distances from those sources to every vertex, using Brandes' algorithm on the graph
+    with the given _csr_lists.
+    """
+    offsets, neighbours, weights, weighted = lists
+    n = len(offsets) - 1
+    betweenness, harmonic = array('d', [0.0]) * n, array('d', [0.0]) * n
+
+    for s in group:
+        if weighted:
+            order, distances, paths = _weighted_search(s, offsets, neighbours, weights)
+        else:
+            order, distances, paths = _unweighted_search(s, offsets, neighbours)
+
+        # Accumulate dependencies from the farthest vertex back towards s
+        dependency = dict.fromkeys(order, 0.0)
+        for w in reversed(order):
+            for i in range(offsets[w], offsets[w + 1]):
+                v = neighbours[i]
+                # v precedes w on a shortest path from s
+                if v in distances and distances[v] + (weights[i] if weighted else 1) == distances[w]:
+                    dependency[v] += paths[v] / paths[w] * (1 + dependency[w])
+            if w != s:
+                betweenness[w] += dependency[w]
+                harmonic[w] += 1 / distances[w]
+
+    return betweenness, harmonic
+
+
+def _unweighted_search(s: int, offsets: list[int],
+                       neighbours: list[int]) -> tuple[list[int], dict[int, int], dict[int, int]]:
+    """Return the vertices reached by a BFS from s in the order they were reached, and the
+    distance and number of shortest paths from s to each of them.
+    """
+    order = []
+    distances = {s: 0}
+    paths = {s: 1}
+    queue = deque([s])
+
+    while queue:
+        v = queue.popleft()
+        order.append(v)
+        for u in neighbours[offsets[v]:offsets[v + 1]]:
+            if u not in distances:
+                distances[u] = distances[v] + 1
+                paths[u] = 0
+                queue.append(u)
+            if distances[u] == distances[v] + 1:
+                paths[u] += paths[v]
+
+    return order, distances, paths
+
+
+def _weighted_search(s: int, offsets: list[int], neighbours: list[int],
+                     weights: list[int]) -> tuple[list[int], dict[int, int], dict[int, int]]:
+    """Return the vertices settled by Dijkstra's algorithm from s in the order they were settled,
+    and the distance and number of shortest paths from s to each of them.
+    """
+    order = []
+    distances = {s: 0}
+    paths = {s: 1}
+    settled = set()
+    heap = [(0, s)]
+
+    while heap:
+        distance, v = heapq.heappop(heap)
+        if v in settled:
+            continue
+        settled.add(v)
+        order.append(v)
+
+        for i in range(offsets[v], offsets[v + 1]):
+            u = neighbours[i]
+            new_distance = distance + weights[i]
+            if u not in distances or new_distance < distances[u]:
+                distances[u] = new_distance
+                paths[u] = paths[v]
+                heapq.heappush(heap, (new_distance, u))
+            elif new_distance == distances[u]:
+                paths[u] += paths[v]
+
+    return order, distances, paths
+
+
+def save_checkpoint(path: str, key: dict, done: set[int], betweenness: array, harmonic: array) -> None:
+    """Save the running totals of a centrality run to the file at the given path.
+
+    The file is written to a temporary file first, so an interrupted save never loses the previous
+    checkpoint.
+    """
+    header = json.dumps({'version': CHECKPOINT_VERSION, **key, 'done': sorted(done)}).encode()
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(CHECKPOINT_MAGIC)
+        f.write(len(header).to_bytes(4, 'little'))
+        f.write(header)
+        betweenness.tofile(f)
+        harmonic.tofile(f)
+    os.replace(temp_path, path)
+
+
+def load_checkpoint(path: str, key: dict, n: int) -> tuple[set[int], array, array]:
+    """Return the finished sources and the running totals saved in the checkpoint at the given path.
+
+    Raise a ValueError if the file is not a checkpoint, or was saved for a different graph, seed
+    or sample size.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(CHECKPOINT_MAGIC)) != CHECKPOINT_MAGIC:
+            raise ValueError
+        header = json.loads(f.read(int.from_bytes(f.read(4), 'little')))
+        if header['version'] != CHECKPOINT_VERSION or any(header[name] != value for name, value in key.items()):
+            raise ValueError
+
+        betweenness, harmonic = array('d'), array('d')
+        betweenness.fromfile(f, n)
+        harmonic.fromfile(f, n)
+
+    return set(header['done']), betweenness, harmonic
+
+
+def _graph_digest(graph: CompactGraph) -> int:
+    """Return a checksum of the people, edges, weights and weighting of the given graph."""
+    digest = zlib.crc32('\n'.join(map(str, graph._names)).encode())
+    for buffer in (graph._offsets, graph._neighbours, graph._weights):
+        digest = zlib.crc32(buffer, digest)
+    return zlib.crc32(bytes([graph.weighted]), digest)
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['array', 'collections', 'heapq', 'json', 'math', 'multiprocessing', 'os', 'random',
+                          'zlib', 'data', 'worker_pool', 'compact'],
+        'allowed-io': ['save_checkpoint', 'load_checkpoint'],
+        'max-line-length': 120,
+    })
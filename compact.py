@@ -0,0 +1,424 @@
+"""CSC111 Winter 2024 Project 2: Compact Graphs
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains a frozen, array-backed version of the friend network. Vertices are
+numbered with integer ids and the edges are stored in compressed sparse row (CSR) form, which
+takes a few bytes per edge instead of the hundreds used by _Vertex objects and their sets.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited.
+
+This file is Copyright (c) 2024 CSC111 Friend Network
+"""
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Iterable
+import heapq
+
+import networkx as nx
+import numpy as np
+
+import data
+import instrument
+
+
+class CompactGraph:
+    """A frozen friend network stored in compressed sparse row form.
+
+    The neighbours of the vertex with id v are _neighbours[_offsets[v]:_offsets[v + 1]], sorted by
+    id, and _weights holds the closeness weight of each of those edges. The buffers are arrays, or
+    memoryviews of the same types when the graph is opened from a snapshot file. Two CompactGraphs
+    can share the same buffers, one answering unweighted and the other weighted path queries.
+
+    Instance Attributes:
+        - weighted: Whether get_friend_path minimises the total weight of the path instead of its
+            number of edges.
+
+    Representation Invariants:
+        - len(self._offsets) == len(self._names) + 1
+        - len(self._neighbours) == len(self._weights) == self._offsets[-1]
+        - all(self._ids[self._names[v]] == v for v in range(len(self._names)))
+
+    >>> g = data.Graph()
+    >>> for name in ['a', 'b', 'c']:
+    ...     g.add_vertex(name)
+    >>> g.add_edge('a', 'b')
+    >>> g.add_edge('b', 'c')
+    >>> cg = CompactGraph.from_graph(g)
+    >>> cg.get_friend_path('a', 'c')
+    [('a', 'b'), ('b', 'c')]
+    >>> cg.get_neighbours('b') == {'a', 'c'}
+    True
+    >>> cg.adjacent('a', 'c')
+    False
+    """
+    weighted: bool
+    # Private Instance Attributes:
+    #     - _names: Maps each vertex id to its item.
+    #     - _ids: Maps each item to its vertex id.
+    #     - _offsets: The start of each vertex's row in _neighbours and _weights.
+    #     - _neighbours: The ids of the neighbours of every vertex, row by row.
+    #     - _weights: The weight of every edge in _neighbours.
+    _names: list
+    _ids: dict[Any, int]
+    _offsets: array
+    _neighbours: array
+    _weights: array
+
+    def __init__(self, names: list, offsets: array, neighbours: array, weights: array,
+                 weighted: bool = False) -> None:
+        """Initialize a compact graph from already built CSR buffers.
+
+        Preconditions:
+            - the buffers satisfy the representation invariants of this class
+        """
+        self.weighted = weighted
+        self._names = names
+        self._ids = {item: v for v, item in enumerate(names)}
+        self._offsets = offsets
+        self._neighbours = neighbours
+        self._weights = weights
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[tuple[Any, Any, int]], weighted: bool = False,
+                   items: Iterable = ()) -> CompactGraph:
+        """Return a compact graph containing the given (item1, item2, weight) edges.
+
+        Vertex ids are assigned to the given items first and then in the order the items first
+        appear in edges. If an edge appears more than once, its last weight is kept, just like
+        WeightedGraph.add_edge.
+
+        >>> cg = CompactGraph.from_edges([('a', 'b', 3), ('b', 'c', 1), ('b', 'a', 2)], True)
+        >>> cg.get_weight('a', 'b')
+        2
+        >>> cg.get_friend_path('a', 'c')
+        [('a', 'b'), ('b', 'c')]
+        """
+        names = list(items)
+        ids = {item: v for v, item in enumerate(names)}
+        sources, targets, weights = array('i'), array('i'), array('i')
+
+        for item1, item2, weight in edges:
+            for item in (item1, item2):
+                if item not in ids:
+                    ids[item] = len(names)
+                    names.append(item)
+            sources.append(ids[item1])
+            targets.append(ids[item2])
+            weights.append(weight)
+
+        return cls.from_arrays(names, np.frombuffer(sources, np.int32), np.frombuffer(targets, np.int32),
+                               np.frombuffer(weights, np.int32), weighted)
+
+    @classmethod
+    def from_graph(cls, graph: data.Graph) -> CompactGraph:
+        """Return a compact copy of the given graph.
+
+        The copy is weighted if and only if graph is a WeightedGraph. Edges of an unweighted graph
+        are given a weight of 1.
+        """
+        vertices = graph.get_vertices()
+        weighted = isinstance(graph, data.WeightedGraph)
+
+        def edges() -> Iterable[tuple[Any, Any, int]]:
+            for v in vertices.values():
+                for u in v.neighbours:
+                    yield v.item, u.item, v.neighbours[u] if weighted else 1
+
+        return cls.from_edges(edges(), weighted, vertices)
+
+    @classmethod
+    def from_arrays(cls, names: list, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray,
+                    weighted: bool = False) -> CompactGraph:
+        """Return a compact graph of the given items, where vertex id i is names[i], with an edge
+        between sources[j] and targets[j] of weight weights[j] for every j.
+
+        If an edge appears more than once, in either direction, its last weight is kept.
+
+        >>> cg = CompactGraph.from_arrays(['a', 'b', 'c'], np.array([0, 1, 1]), np.array([1, 2, 0]),
+        ...                               np.array([3, 1, 2]), True)
+        >>> (cg.get_weight('a', 'b'), cg.get_neighbours('b') == {'a', 'c'})
+        (2, True)
+
+        Preconditions:
+            - sources, targets and weights are integer arrays of the same length
+            - every id in sources and targets is below len(names), and sources[j] != targets[j]
+        """
+        n = len(names)
+        # Interleave both directions of every edge so that input order is kept for each direction
+        rows = np.stack([sources, targets], axis=1).ravel()
+        cols = np.stack([targets, sources], axis=1).ravel()
+        both = np.repeat(weights, 2)
+
+        # Sort stably by (row, col), then keep only the last copy of every repeated edge
+        order = np.argsort(rows.astype(np.int64) * n + cols, kind='stable')
+        rows, cols, both = rows[order], cols[order], both[order]
+        last = np.ones(len(rows), dtype=bool)
+        last[:-1] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        rows, cols, both = rows[last], cols[last], both[last]
+
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=offsets[1:])
+
+        return cls(names, array('q', offsets.tobytes()), array('i', cols.astype(np.int32).tobytes()),
+                   array('i', both.astype(np.int32).tobytes()), weighted)
+
+    def with_weighting(self, weighted: bool) -> CompactGraph:
+        """Return a compact graph sharing this graph's buffers that answers weighted or unweighted
+        path queries.
+        """
+        other = CompactGraph.__new__(CompactGraph)
+        other.__dict__.update(self.__dict__)
+        other.weighted = weighted
+        return other
+
+    def __reduce__(self) -> tuple:
+        """Return how to pickle this graph, such as to send it to a worker process.
+
+        Buffers that are memoryviews of a snapshot file cannot be pickled, so they are copied into
+        arrays first.
+
+        >>> import pickle
+        >>> cg = CompactGraph.from_edges([('a', 'b', 1), ('b', 'c', 1)])
+        >>> views = CompactGraph(cg._names, memoryview(cg._offsets), memoryview(cg._neighbours),
+        ...                      memoryview(cg._weights))
+        >>> pickle.loads(pickle.dumps(views)).get_friend_path('a', 'c')
+        [('a', 'b'), ('b', 'c')]
+        """
+        buffers = [buffer if isinstance(buffer, array) else array(buffer.format, buffer.tobytes())
+                   for buffer in (self._offsets, self._neighbours, self._weights)]
+        return CompactGraph, (self._names, *buffers, self.weighted)
+
+    def num_vertices(self) -> int:
+        """Return the number of vertices in this graph."""
+        return len(self._names)
+
+    def num_edges(self) -> int:
+        """Return the number of (undirected) edges in this graph."""
+        return len(self._neighbours) // 2
+
+    def get_vertices(self) -> dict[Any, int]:
+        """Return a mapping from each item in this graph to its vertex id.
+        """
+        return self._ids
+
+    def get_item(self, v: int) -> Any:
+        """Return the item of the vertex with the given id."""
+        return self._names[v]
+
+    def adjacent(self, item1: Any, item2: Any) -> bool:
+        """Return whether item1 and item2 are adjacent vertices in this graph.
+
+        Return False if item1 or item2 do not appear as vertices in this graph.
+        """
+        if item1 in self._ids and item2 in self._ids:
+            return self._edge_index(self._ids[item1], self._ids[item2]) >= 0
+        else:
+            return False
+
+    def get_neighbours(self, item: Any) -> set:
+        """Return a set of the neighbours of the given item.
+
+        Raise a ValueError if item does not appear as a vertex in this graph.
+        """
+        if item in self._ids:
+            v = self._ids[item]
+            names = self._names
+            return {names[u] for u in self._neighbours[self._offsets[v]:self._offsets[v + 1]]}
+        else:
+            raise ValueError
+
+    def get_weight(self, item1: Any, item2: Any) -> int:
+        """Return the weight of the edge between the given items.
+
+        Return 0 if item1 and item2 are not adjacent.
+
+        Preconditions:
+            - item1 and item2 are vertices in this graph
+        """
+        i = self._edge_index(self._ids[item1], self._ids[item2])
+        return self._weights[i] if i >= 0 else 0
+
+    def _edge_index(self, v: int, u: int) -> int:
+        """Return the position of the edge from v to u in _neighbours, or -1 if there is none."""
+        lo, hi = self._offsets[v], self._offsets[v + 1]
+        i = bisect_left(self._neighbours, u, lo, hi)
+        return i if i < hi and self._neighbours[i] == u else -1
+
+    def conv_networkx(self, max_vertices: int = 5000) -> nx.Graph:
+        """Convert this graph to a networkx graph, limiting it to max_vertices.
+
+        Vertices are visited in id order, which is the insertion order of the graph this one was
+        built from.
+        """
+        graph_nx = nx.Graph()
+        names, offsets, neighbours = self._names, self._offsets, self._neighbours
+        for v in range(len(names)):
+            graph_nx.add_node(names[v])
+
+            for u in neighbours[offsets[v]:offsets[v + 1]]:
+                if graph_nx.number_of_nodes() < max_vertices:
+                    graph_nx.add_node(names[u])
+
+                if names[u] in graph_nx:
+                    graph_nx.add_edge(names[v], names[u])
+
+            if graph_nx.number_of_nodes() >= max_vertices:
+                break
+
+        return graph_nx
+
+    @instrument.traced_query('CompactGraph.get_friend_path')
+    def get_friend_path(self, start: str, end: str) -> list[tuple[str, str]]:
+        """Returns the shortest path of mutuals between 2 people in the graph as a list of edges
+
+        The path has the fewest edges if this graph is unweighted, and the lowest total weight
+        otherwise. If there is no path, returns an empty list
+        """
+        s, t = self._ids[start], self._ids[end]
+        if self.weighted:
+            parents = self._parents_weighted(s, t)
+        else:
+            parents = self._get_parents(s, t)
+
+        return self._path_to_edges(s, t, parents)
+
+    @instrument.traced_query('CompactGraph.get_friend_paths', path=False)
+    def get_friend_paths(self, start: str, ends: Iterable[str]) -> list[list[tuple[str, str]]]:
+        """Returns the shortest path of mutuals from start to each of the given people, in order
+
+        The shortest-path tree from start is built once and shared by every path. A path is an
+        empty list if there is no path to that person.
+        """
+        s = self._ids[start]
+        parents = self._parents_weighted(s) if self.weighted else self._get_parents(s)
+
+        return [self._path_to_edges(s, self._ids[end], parents) for end in ends]
+
+    def _path_to_edges(self, s: int, t: int, parents: array) -> list[tuple[str, str]]:
+        """Return the path from s to t in the given parents array as a list of edges between items,
+        or an empty list if t was not reached.
+        """
+        path = []
+        current = t
+        while current != s:
+            if parents[current] < 0:
+                return []
+            path.append(current)
+            current = parents[current]
+        path.append(s)
+        path.reverse()
+
+        return [(self._names[path[i]], self._names[path[i + 1]]) for i in range(len(path) - 1)]
+
+    def _get_parents(self, s: int, t: int = -1) -> array:
+        """Return the BFS parent of every vertex reached from s, or -1 for unreached vertices.
+
+        The search stops as soon as t is reached.
+        """
+        offsets, neighbours = self._offsets, self._neighbours
+        parents = array('i', [-1]) * len(self._names)
+        parents[s] = s
+        queue = deque([s])
+        expanded = edges = 0
+
+        while queue:
+            v = queue.popleft()
+            expanded += 1
+            edges += offsets[v + 1] - offsets[v]
+            for u in neighbours[offsets[v]:offsets[v + 1]]:
+                if parents[u] < 0:
+                    parents[u] = v
+                    if u == t:
+                        if instrument.STATE.enabled:
+                            instrument.count(expanded=expanded, edges=edges, pushes=expanded + len(queue) + 1,
+                                             pops=expanded)
+                        return parents
+                    queue.append(u)
+
+        if instrument.STATE.enabled:
+            instrument.count(expanded=expanded, edges=edges, pushes=expanded, pops=expanded)
+        return parents
+
+    def _parents_weighted(self, s: int, t: int = -1) -> array:
+        """Return the Dijkstra parent of every vertex reached from s, or -1 for unreached vertices.
+
+        The search stops as soon as t is settled.
+        """
+        offsets, neighbours, weights = self._offsets, self._neighbours, self._weights
+        parents = array('i', [-1]) * len(self._names)
+        parents[s] = s
+        distances = {s: 0}
+        settled = set()
+        heap = [(0, s)]
+        pushes = 1
+        expanded = edges = 0
+
+        while heap:
+            distance, v = heapq.heappop(heap)
+            if v in settled:
+                continue
+            settled.add(v)
+            if v == t:
+                break
+
+            expanded += 1
+            edges += offsets[v + 1] - offsets[v]
+            for i in range(offsets[v], offsets[v + 1]):
+                u = neighbours[i]
+                new_distance = distance + weights[i]
+                if u not in settled and new_distance < distances.get(u, new_distance + 1):
+                    distances[u] = new_distance
+                    parents[u] = v
+                    heapq.heappush(heap, (new_distance, u))
+                    pushes += 1
+
+        if instrument.STATE.enabled:
+            instrument.count(expanded=expanded, edges=edges, pushes=pushes, pops=pushes - len(heap))
+        return parents
+
+
+def load_compact_network(names_file: str, edges_file: str, seed: int = 1) -> tuple[CompactGraph, CompactGraph]:
+    """Return the unweighted and weighted compact friend networks corresponding to the given
+    datasets, with the same names and weights as data.load_friend_network.
+
+    The network is built directly from the edges in the datasets, and both graphs share the same
+    buffers.
+
+    Preconditions:
+        - names_file is the path to a txt file corresponding to a list of first names
+        - edges_file is the path to a txt file corresponding to the edges of the friend network
+    """
+    edges = data.read_friend_edges(names_file, edges_file, seed)
+    if instrument.STATE.enabled:
+        with instrument.phase('parse'):
+            edges = list(edges)
+
+    with instrument.phase('build'):
+        weighted_network = CompactGraph.from_edges(edges, True, ['raven'])
+    return weighted_network.with_weighting(False), weighted_network
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['array', 'bisect', 'collections', 'heapq', 'networkx', 'numpy', 'data', 'instrument'],
+        'max-line-length': 120,
+    })
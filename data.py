@@ -18,13 +18,21 @@ expressly prohibited.
 This file is Copyright (c) 2024 CSC111 Friend Network
 """
 from __future__ import annotations
-from typing import Any
+from typing import Any, Collection, Iterable, Iterator
 import random
-from queue import PriorityQueue
-import math
+from collections import OrderedDict, deque
+import hashlib
+import heapq
+import sys
+import time
 
 import networkx as nx
 
+import instrument
+
+# The largest edge weight for which WeightedGraph uses a bucket queue instead of a binary heap
+MAX_BUCKET_WEIGHT = 64
+
 
 class Queue:
     """A first-in-first-out (FIFO) queue of items.
@@ -47,18 +55,18 @@ class Queue:
     True
     """
     # Private Instance Attributes:
-    #   - _items: The items stored in this queue. The front of the list represents
+    #   - _items: The items stored in this queue. The left end of the deque represents
     #             the front of the queue.
-    _items: list
+    _items: deque
 
     def __init__(self) -> None:
         """Initialize a new empty queue."""
-        self._items = []
+        self._items = deque()
 
     def is_empty(self) -> bool:
         """Return whether this queue contains no items.
         """
-        return self._items == []
+        return not self._items
 
     def enqueue(self, item: Any) -> None:
         """Add <item> to the back of this queue.
@@ -73,7 +81,434 @@ class Queue:
         if self.is_empty():
             raise ValueError
         else:
-            return self._items.pop(0)
+            return self._items.popleft()
+
+
+class PathTreeCache:
+    """A least-recently-used cache of single-source shortest-path trees.
+
+    Each entry maps a source vertex to the parents dictionary of a search from that source, as
+    returned by Graph._get_parents or WeightedGraph._parents_weighted. The cache is bounded both by
+    its number of entries and by the approximate memory used by the parents dictionaries.
+
+    Instance Attributes:
+        - max_entries: The largest number of trees kept at once.
+        - max_bytes: The largest approximate number of bytes used by the kept trees, or None if
+            only the number of entries is bounded.
+        - hits: The number of lookups that found a cached tree.
+        - misses: The number of lookups that did not find a cached tree.
+        - evictions: The number of trees dropped to stay within the bounds.
+        - invalidations: The number of trees dropped because the graph changed.
+
+    >>> cache = PathTreeCache(max_entries=2)
+    >>> cache.put('a', {'b': 'a'})
+    >>> cache.put('b', {'a': 'b'})
+    >>> cache.get('a')
+    {'b': 'a'}
+    >>> cache.put('c', {})
+    >>> cache.get('b') is None
+    True
+    >>> (cache.hits, cache.misses, cache.evictions)
+    (1, 1, 1)
+    """
+    max_entries: int
+    max_bytes: int | None
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    # Private Instance Attributes:
+    #   - _trees: Maps each cached source to its parents dictionary, least recently used first.
+    #   - _sizes: Maps each cached source to the approximate size of its tree in bytes.
+    #   - _bytes: The total of the values in _sizes.
+    _trees: OrderedDict[Any, dict]
+    _sizes: dict[Any, int]
+    _bytes: int
+
+    def __init__(self, max_entries: int = 128, max_bytes: int | None = None) -> None:
+        """Initialize an empty cache with the given bounds.
+
+        Preconditions:
+            - max_entries >= 1
+            - max_bytes is None or max_bytes >= 0
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self._trees = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+
+    def get(self, source: Any) -> dict | None:
+        """Return the cached tree for the given source, or None if there is none.
+        """
+        if source in self._trees:
+            self.hits += 1
+            self._trees.move_to_end(source)
+            return self._trees[source]
+        else:
+            self.misses += 1
+            return None
+
+    def put(self, source: Any, parents: dict) -> None:
+        """Cache the given tree for the given source, evicting the least recently used trees
+        while the cache is over its bounds.
+
+        A tree larger than max_bytes on its own is not cached.
+        """
+        size = sys.getsizeof(parents)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        self._discard(source)
+        self._trees[source] = parents
+        self._sizes[source] = size
+        self._bytes += size
+
+        while len(self._trees) > self.max_entries or (self.max_bytes is not None and self._bytes > self.max_bytes):
+            self._discard(next(iter(self._trees)))
+            self.evictions += 1
+
+    def invalidate(self, *vertices: Any) -> None:
+        """Drop every cached tree that reaches any of the given vertices.
+
+        A tree that reaches none of them describes a component of the graph that does not contain
+        them, so it is unaffected by a change to the edges between them.
+        """
+        stale = [source for source, parents in self._trees.items()
+                 if any(v == source or v in parents for v in vertices)]
+        for source in stale:
+            self._discard(source)
+        self.invalidations += len(stale)
+
+    def clear(self) -> None:
+        """Drop every cached tree."""
+        self.invalidations += len(self._trees)
+        self._trees.clear()
+        self._sizes.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return the counters and current size of this cache.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'invalidations': self.invalidations, 'entries': len(self._trees), 'bytes': self._bytes}
+
+    def _discard(self, source: Any) -> None:
+        """Remove the tree for the given source, if there is one."""
+        if source in self._trees:
+            del self._trees[source]
+            self._bytes -= self._sizes.pop(source)
+
+
+class UnionFind:
+    """A disjoint-set forest, with path compression and union by rank, that partitions a
+    collection of items into groups.
+
+    Instance Attributes:
+        - count: The number of groups.
+
+    >>> groups = UnionFind(['a', 'b', 'c', 'd'])
+    >>> groups.union('a', 'b')
+    True
+    >>> groups.union('b', 'a')
+    False
+    >>> (groups.connected('a', 'b'), groups.connected('a', 'c'))
+    (True, False)
+    >>> (groups.size('a'), groups.count, groups.sizes())
+    (2, 3, [2, 1, 1])
+    """
+    count: int
+    # Private Instance Attributes:
+    #     - _parent: Maps each item to its parent in the forest, or to itself if it is a root.
+    #     - _rank: Maps each root to an upper bound on the height of its tree.
+    #     - _size: Maps each root to the number of items in its group.
+    _parent: dict[Any, Any]
+    _rank: dict[Any, int]
+    _size: dict[Any, int]
+
+    def __init__(self, items: Iterable = ()) -> None:
+        """Initialize a partition with each of the given items in a group of its own."""
+        self._parent = {}
+        self._rank = {}
+        self._size = {}
+        self.count = 0
+        for item in items:
+            self.add(item)
+
+    @classmethod
+    def from_groups(cls, groups: Iterable[list]) -> UnionFind:
+        """Return a partition into the given disjoint, non-empty groups.
+
+        Each group is stored as a tree of height at most 1, which is faster than adding its items
+        one at a time and merging them.
+        """
+        partition = cls()
+        for group in groups:
+            root = group[0]
+            partition._parent.update(dict.fromkeys(group, root))
+            partition._rank[root] = 0 if len(group) == 1 else 1
+            partition._size[root] = len(group)
+            partition.count += 1
+        return partition
+
+    def add(self, item: Any) -> None:
+        """Add the given item in a group of its own, if it is not already in a group."""
+        if item not in self._parent:
+            self._parent[item] = item
+            self._rank[item] = 0
+            self._size[item] = 1
+            self.count += 1
+
+    def find(self, item: Any) -> Any:
+        """Return the root of the group containing item.
+
+        Preconditions:
+            - item was added to this partition
+        """
+        parent = self._parent
+        root = item
+        while parent[root] is not root:
+            root = parent[root]
+
+        # Point every item on the way straight at the root
+        while parent[item] is not root:
+            parent[item], item = root, parent[item]
+
+        return root
+
+    def union(self, item1: Any, item2: Any) -> bool:
+        """Merge the groups containing item1 and item2, and return whether they were different.
+
+        Preconditions:
+            - item1 and item2 were added to this partition
+        """
+        root1, root2 = self.find(item1), self.find(item2)
+        if root1 is root2:
+            return False
+
+        if self._rank[root1] < self._rank[root2]:
+            root1, root2 = root2, root1
+        self._parent[root2] = root1
+        self._size[root1] += self._size.pop(root2)
+        if self._rank[root1] == self._rank[root2]:
+            self._rank[root1] += 1
+        del self._rank[root2]
+        self.count -= 1
+        return True
+
+    def connected(self, item1: Any, item2: Any) -> bool:
+        """Return whether item1 and item2 are in the same group.
+
+        Preconditions:
+            - item1 and item2 were added to this partition
+        """
+        return self.find(item1) is self.find(item2)
+
+    def size(self, item: Any) -> int:
+        """Return the number of items in the group containing item.
+
+        Preconditions:
+            - item was added to this partition
+        """
+        return self._size[self.find(item)]
+
+    def sizes(self) -> list[int]:
+        """Return the sizes of all groups, largest first."""
+        return sorted(self._size.values(), reverse=True)
+
+
+class DynamicPathTree:
+    """A shortest-path tree from one source vertex that is repaired in place as the graph changes.
+
+    The tree is kept up to date by the graph it belongs to: after every edge that is added, removed
+    or reweighted, only the vertices whose distance can change are visited. A new or shorter edge
+    only lowers distances, so they are pushed outwards from it with Dijkstra's algorithm (a BFS in an
+    unweighted graph). Removing or lengthening a tree edge only raises the distances of the subtree
+    below it, so just that subtree is searched again, starting from its unaffected neighbours.
+
+    Instance Attributes:
+        - source: The item of the source vertex.
+        - last_touched: The number of vertices visited by the most recent update.
+        - total_touched: The number of vertices visited by all updates so far.
+        - updates: The number of updates so far.
+
+    Representation Invariants:
+        - self._graph._vertices[self.source] in self._distances
+        - all(self._distances[v] == self._distances[p] + self._graph._closeness(p, v)
+              for v, p in self._parents.items())
+
+    >>> g = Graph()
+    >>> for name in ['a', 'b', 'c', 'd']:
+    ...     g.add_vertex(name)
+    >>> for edge in [('a', 'b'), ('b', 'c'), ('c', 'd')]:
+    ...     g.add_edge(*edge)
+    >>> tree = g.track_source('a')
+    >>> tree.distance('d')
+    3
+    >>> g.add_edge('a', 'c')
+    >>> (tree.distance('d'), tree.last_touched)
+    (2, 2)
+    >>> g.remove_edge('a', 'c')
+    >>> (tree.get_friend_path('d'), tree.last_touched)
+    ([('a', 'b'), ('b', 'c'), ('c', 'd')], 2)
+    """
+    source: Any
+    last_touched: int
+    total_touched: int
+    updates: int
+    # Private Instance Attributes:
+    #     - _graph: The graph this tree belongs to.
+    #     - _distances: Maps every vertex reachable from the source to its distance from it.
+    #     - _parents: Maps every reachable vertex other than the source to its parent in the tree.
+    #     - _children: Maps every vertex with children in the tree to the set of its children.
+    _graph: Graph
+    _distances: dict[_Vertex, int]
+    _parents: dict[_Vertex, _Vertex]
+    _children: dict[_Vertex, set[_Vertex]]
+
+    def __init__(self, graph: Graph, source: Any) -> None:
+        """Build the shortest-path tree of the given graph from the given source.
+
+        Preconditions:
+            - source in graph.get_vertices()
+            - every edge weight in graph is non-negative
+        """
+        self._graph = graph
+        self.source = source
+        self.last_touched = self.total_touched = self.updates = 0
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Recompute the whole tree from scratch."""
+        self._distances, self._parents = self._graph._distance_tree(self._graph.get_vertices()[self.source])
+        self._children = {}
+        for v, parent in self._parents.items():
+            self._children.setdefault(parent, set()).add(v)
+
+    def distance(self, item: Any) -> int | float:
+        """Return the length of a shortest path from the source to the given item, or infinity if
+        there is none.
+
+        Preconditions:
+            - item in self._graph.get_vertices()
+        """
+        return self._distances.get(self._graph.get_vertices()[item], float('inf'))
+
+    def get_friend_path(self, end: Any) -> list[tuple]:
+        """Returns the shortest path of mutuals from the source to end, as a list of edges
+
+        If there is no path, returns an empty list
+        """
+        vertices = self._graph.get_vertices()
+        path = self._graph._reconstruct_path(vertices[self.source], vertices[end], self._parents)
+        return self._graph.path_to_edges(path)
+
+    def parents(self) -> dict[_Vertex, _Vertex]:
+        """Return the parents dictionary of this tree, as returned by Graph._get_parents.
+
+        The dictionary is updated in place by later changes to the graph.
+        """
+        return self._parents
+
+    def update(self, v1: _Vertex, v2: _Vertex) -> int:
+        """Repair this tree after the edge between v1 and v2 was added, removed or reweighted, and
+        return the number of vertices visited.
+        """
+        touched = 0
+        # A tree edge that no longer exists, or got longer, cuts off the subtree below it
+        for parent, child in ((v1, v2), (v2, v1)):
+            if self._parents.get(child) is parent and \
+                    (parent not in child.neighbours or
+                     self._distances[parent] + self._graph._closeness(parent, child) > self._distances[child]):
+                touched += self._repair_subtree(child)
+
+        # A new or shorter edge can only shorten distances beyond it
+        if v2 in v1.neighbours:
+            touched += self._relax(v1, v2) + self._relax(v2, v1)
+
+        self.last_touched = touched
+        self.total_touched += touched
+        self.updates += 1
+        return touched
+
+    def _set_parent(self, v: _Vertex, parent: _Vertex | None) -> None:
+        """Make parent the parent of v in the tree, or detach v from the tree if parent is None."""
+        old_parent = self._parents.pop(v, None)
+        if old_parent in self._children:
+            self._children[old_parent].discard(v)
+        if parent is not None:
+            self._parents[v] = parent
+            self._children.setdefault(parent, set()).add(v)
+
+    def _relax(self, u: _Vertex, v: _Vertex) -> int:
+        """Lower the distance of v, and of everything beyond it, if the path through the edge from
+        u is shorter, and return the number of vertices whose distance was lowered.
+        """
+        if u not in self._distances:
+            return 0
+        new_distance = self._distances[u] + self._graph._closeness(u, v)
+        if v in self._distances and new_distance >= self._distances[v]:
+            return 0
+
+        self._distances[v] = new_distance
+        self._set_parent(v, u)
+        touched = 0
+        counter = 0
+        heap = [(new_distance, counter, v)]
+
+        while heap:
+            distance, _, vertex = heapq.heappop(heap)
+            if distance > self._distances[vertex]:
+                continue
+            touched += 1
+
+            for neighbour, weight in self._graph._incident_edges(vertex):
+                if neighbour not in self._distances or distance + weight < self._distances[neighbour]:
+                    self._distances[neighbour] = distance + weight
+                    self._set_parent(neighbour, vertex)
+                    counter += 1
+                    heapq.heappush(heap, (distance + weight, counter, neighbour))
+
+        return touched
+
+    def _repair_subtree(self, root: _Vertex) -> int:
+        """Recompute the distances of root and all of its descendants in the tree, which were cut
+        off from the source, and return the number of them.
+
+        The rest of the tree is unaffected, so the search starts from the best edge from the rest
+        of the tree into each cut-off vertex, and never leaves the cut-off subtree.
+        """
+        affected = [root]
+        for vertex in affected:
+            affected.extend(self._children.pop(vertex, ()))
+        affected_set = set(affected)
+
+        for vertex in affected:
+            del self._distances[vertex]
+            self._set_parent(vertex, None)
+
+        counter = 0
+        heap = []
+        for vertex in affected:
+            for neighbour, weight in self._graph._incident_edges(vertex):
+                if neighbour in self._distances:
+                    counter += 1
+                    heapq.heappush(heap, (self._distances[neighbour] + weight, counter, vertex, neighbour))
+
+        while heap:
+            distance, _, vertex, parent = heapq.heappop(heap)
+            if vertex in self._distances:
+                continue
+            self._distances[vertex] = distance
+            self._set_parent(vertex, parent)
+
+            for neighbour, weight in self._graph._incident_edges(vertex):
+                if neighbour in affected_set and neighbour not in self._distances:
+                    counter += 1
+                    heapq.heappush(heap, (distance + weight, counter, neighbour, vertex))
+
+        return len(affected)
 
 
 class _Vertex:
@@ -106,19 +541,52 @@ class Graph:
     #     - _vertices:
     #         A collection of the vertices contained in this graph.
     #         Maps item to _Vertex object.
+    #     - _path_cache:
+    #         The cache of shortest-path trees used by get_friend_path, or None if caching is
+    #         turned off.
+    #     - _tracked:
+    #         Maps the source vertex of each shortest-path tree kept up to date by this graph to
+    #         that tree.
+    #     - _components:
+    #         The connected components of this graph, or None if they have not been computed
+    #         since the graph was created or an edge was removed.
+    #     - _components_stale:
+    #         Whether _components is None because an edge or vertex was removed, in which case
+    #         path queries do not recompute it (see _known_disconnected).
     _vertices: dict[Any, _Vertex]
+    _path_cache: PathTreeCache | None
+    _tracked: dict[_Vertex, DynamicPathTree]
+    _components: UnionFind | None
+    _components_stale: bool
 
     def __init__(self) -> None:
         """Initialize an empty graph (no vertices or edges)."""
         self._vertices = {}
+        self._path_cache = None
+        self._tracked = {}
+        self._components = None
+        self._components_stale = False
 
     def add_vertex(self, item: Any) -> None:
         """Add a vertex with the given item to this graph.
 
         The new vertex is not adjacent to any other vertices.
         """
+        replaced = self._vertices.get(item)
         self._vertices[item] = _Vertex(item, set())
 
+        if replaced is None and self._components is not None:
+            self._components.add(self._vertices[item])
+        elif replaced is not None:
+            self._forget_components()
+            if self._path_cache is not None:
+                self._path_cache.clear()
+            tree = self._tracked.pop(replaced, None)
+            if tree is not None:
+                self._tracked[self._vertices[item]] = tree
+            for tree in self._tracked.values():
+                tree.rebuild()
+
     def add_edge(self, item1: Any, item2: Any) -> None:
         """Add an edge between the two vertices with the given items in this graph.
 
@@ -127,17 +595,166 @@ class Graph:
         Preconditions:
             - item1 != item2
         """
-        if item1 in self._vertices and item2 in self._vertices:
-            v1 = self._vertices[item1]
-            v2 = self._vertices[item2]
-
+        v1 = self._vertices.get(item1)
+        v2 = self._vertices.get(item2)
+        if v1 is not None and v2 is not None:
             # Add the new edge
             v1.neighbours.add(v2)
             v2.neighbours.add(v1)
+            self._edge_changed(v1, v2)
         else:
             # We didn't find an existing vertex for both items.
             raise ValueError
 
+    def remove_edge(self, item1: Any, item2: Any) -> None:
+        """Remove the edge between the two vertices with the given items in this graph.
+
+        Raise a ValueError if item1 or item2 do not appear as vertices in this graph, or if they
+        are not adjacent.
+        """
+        v1 = self._vertices.get(item1)
+        v2 = self._vertices.get(item2)
+        if v1 is None or v2 is None or v2 not in v1.neighbours:
+            raise ValueError
+
+        v1.neighbours.remove(v2)
+        v2.neighbours.remove(v1)
+        self._edge_changed(v1, v2)
+
+    def remove_vertex(self, item: Any) -> None:
+        """Remove the vertex with the given item, and all of its edges, from this graph.
+
+        A shortest-path tree tracked from this vertex is dropped.
+
+        Raise a ValueError if item does not appear as a vertex in this graph.
+        """
+        if item not in self._vertices:
+            raise ValueError
+
+        v = self._vertices[item]
+        self._tracked.pop(v, None)
+        for u in list(v.neighbours):
+            self.remove_edge(item, u.item)
+        del self._vertices[item]
+        self._forget_components()
+
+    def _edge_changed(self, v1: _Vertex, v2: _Vertex) -> None:
+        """Update the path cache and the tracked shortest-path trees after the edge between v1 and
+        v2 was added, removed or reweighted.
+        """
+        if self._path_cache is not None:
+            self._path_cache.invalidate(v1, v2)
+        for tree in self._tracked.values():
+            tree.update(v1, v2)
+
+        # Union-find cannot split a component, so the components are recomputed when next needed
+        if v2 not in v1.neighbours:
+            self._forget_components()
+        elif self._components is not None:
+            self._components.union(v1, v2)
+
+    def _forget_components(self) -> None:
+        """Mark the connected components of this graph as stale after an edge or vertex was
+        removed."""
+        self._components = None
+        self._components_stale = True
+
+    def connected(self, item1: Any, item2: Any) -> bool:
+        """Return whether there is a path between item1 and item2 in this graph.
+
+        The connected components are computed the first time they are needed, and then kept up to
+        date as edges are added, so this takes near-constant time. After an edge is removed they
+        are computed again the next time this, component_size or component_sizes is called; path
+        queries do not recompute them.
+
+        >>> g = Graph()
+        >>> for name in ['a', 'b', 'c']:
+        ...     g.add_vertex(name)
+        >>> g.add_edge('a', 'b')
+        >>> (g.connected('a', 'b'), g.connected('a', 'c'))
+        (True, False)
+        >>> g.add_edge('b', 'c')
+        >>> (g.connected('a', 'c'), g.component_size('a'))
+        (True, 3)
+        >>> g.remove_edge('a', 'b')
+        >>> (g.connected('a', 'c'), g.component_sizes())
+        (False, [2, 1])
+
+        Raise a ValueError if item1 or item2 do not appear as vertices in this graph.
+        """
+        if item1 not in self._vertices or item2 not in self._vertices:
+            raise ValueError
+        return self._connectivity().connected(self._vertices[item1], self._vertices[item2])
+
+    def component_size(self, item: Any) -> int:
+        """Return the number of people in the connected component of the given item.
+
+        Raise a ValueError if item does not appear as a vertex in this graph.
+        """
+        if item not in self._vertices:
+            raise ValueError
+        return self._connectivity().size(self._vertices[item])
+
+    def component_sizes(self) -> list[int]:
+        """Return the sizes of the connected components of this graph, largest first."""
+        return self._connectivity().sizes()
+
+    def _known_disconnected(self, v1: _Vertex, v2: _Vertex) -> bool:
+        """Return whether v1 and v2 are known to be in different connected components.
+
+        The components are computed the first time they are needed, but after an edge or vertex
+        was removed this returns False rather than computing them again, and the search that
+        follows finds out whether there is a path.
+        """
+        return not self._components_stale and not self._connectivity().connected(v1, v2)
+
+    def _connectivity(self) -> UnionFind:
+        """Return the connected components of this graph, computing them if necessary."""
+        if self._components is None:
+            self._components = UnionFind.from_groups(self._component_lists())
+            self._components_stale = False
+        return self._components
+
+    def _component_lists(self) -> Iterator[list[_Vertex]]:
+        """Yield the vertices of each connected component of this graph, found by BFS."""
+        visited = set()
+        for v in self._vertices.values():
+            if v in visited:
+                continue
+
+            visited.add(v)
+            component = [v]
+            for vertex in component:
+                for neighbour in vertex.neighbours:
+                    if neighbour not in visited:
+                        visited.add(neighbour)
+                        component.append(neighbour)
+            yield component
+
+    def track_source(self, item: Any) -> DynamicPathTree:
+        """Return a shortest-path tree from the given item that this graph keeps up to date as
+        edges are added and removed, building it if it is not tracked already.
+
+        While item is tracked, get_friend_path and get_friend_paths from it read the tree instead of
+        searching. Each tracked source makes every later change to the edges of this graph slower,
+        so only frequently queried sources should be tracked.
+
+        Raise a ValueError if item does not appear as a vertex in this graph.
+        """
+        if item not in self._vertices:
+            raise ValueError
+
+        v = self._vertices[item]
+        if v not in self._tracked:
+            self._tracked[v] = DynamicPathTree(self, item)
+        return self._tracked[v]
+
+    def untrack_source(self, item: Any) -> None:
+        """Stop keeping the shortest-path tree from the given item up to date, if it was tracked.
+        """
+        if item in self._vertices:
+            self._tracked.pop(self._vertices[item], None)
+
     def adjacent(self, item1: Any, item2: Any) -> bool:
         """Return whether item1 and item2 are adjacent vertices in this graph.
 
@@ -173,7 +790,7 @@ class Graph:
                 if graph_nx.number_of_nodes() < max_vertices:
                     graph_nx.add_node(u.item)
 
-                if u.item in graph_nx.nodes:
+                if u.item in graph_nx:
                     graph_nx.add_edge(v.item, u.item)
 
             if graph_nx.number_of_nodes() >= max_vertices:
@@ -181,18 +798,188 @@ class Graph:
 
         return graph_nx
 
+    @instrument.traced_query('Graph.get_friend_path')
     def get_friend_path(self, start: str, end: str) -> list[_Vertex]:
         """Returns the shortest path of mutuals between 2 people in the graph
 
-        If there is no path, returns an empty list
+        If there is no path, returns an empty list. People known to be in different connected
+        components are answered without any search
+
+        >>> g = Graph()
+        >>> for name in ['a', 'b', 'c']:
+        ...     g.add_vertex(name)
+        >>> g.add_edge('a', 'b')
+        >>> g.get_friend_path('a', 'c')
+        []
+        >>> g.add_edge('b', 'c')
+        >>> g.get_friend_path('a', 'c')
+        [('a', 'b'), ('b', 'c')]
+        >>> g.remove_edge('a', 'b')
+        >>> g.get_friend_path('a', 'c')
+        []
         """
         start_vertex = self._vertices[start]
         end_vertex = self._vertices[end]
+        if self._known_disconnected(start_vertex, end_vertex):
+            return []
 
-        parents = self._get_parents(start_vertex)
-        reconstructed_path = self._reconstruct_path(start_vertex, end_vertex, parents)
+        if self._path_cache is not None or start_vertex in self._tracked:
+            parents = self._source_tree(start_vertex)
+            return self.path_to_edges(self._reconstruct_path(start_vertex, end_vertex, parents))
 
-        return self.path_to_edges(reconstructed_path)
+        return self.path_to_edges(self._bidirectional_path(start_vertex, end_vertex))
+
+    @instrument.traced_query('Graph.get_friend_paths', path=False)
+    def get_friend_paths(self, start: str, ends: Iterable[str]) -> list[list[tuple]]:
+        """Returns the shortest path of mutuals from start to each of the given people, in order
+
+        The shortest-path tree from start is built once and shared by every path. A path is an
+        empty list if there is no path to that person.
+
+        >>> g = Graph()
+        >>> for name in ['a', 'b', 'c', 'd']:
+        ...     g.add_vertex(name)
+        >>> g.add_edge('a', 'b')
+        >>> g.add_edge('b', 'c')
+        >>> g.get_friend_paths('a', ['c', 'd', 'b'])
+        [[('a', 'b'), ('b', 'c')], [], [('a', 'b')]]
+        """
+        start_vertex = self._vertices[start]
+        parents = self._source_tree(start_vertex)
+
+        return [self.path_to_edges(self._reconstruct_path(start_vertex, self._vertices[end], parents))
+                for end in ends]
+
+    def _source_tree(self, start: _Vertex) -> dict[_Vertex, _Vertex]:
+        """Returns the parents dictionary of a complete shortest-path search from start, from its
+        tracked tree, or from the path cache if it is turned on and has it
+        """
+        if start in self._tracked:
+            return self._tracked[start].parents()
+        elif self._path_cache is None:
+            return self._get_parents(start)
+
+        parents = self._path_cache.get(start)
+        if parents is None:
+            parents = self._get_parents(start)
+            self._path_cache.put(start, parents)
+        return parents
+
+    def enable_path_cache(self, max_entries: int = 128, max_bytes: int | None = None) -> None:
+        """Cache the shortest-path trees of the last max_entries sources used by get_friend_path.
+
+        While the cache is on, get_friend_path builds the whole tree for each new source, so later
+        queries from that source only need to follow its parents. Trees are dropped when the edges
+        they depend on change, and the least recently used trees are dropped to stay within
+        max_entries and (approximately) max_bytes.
+
+        >>> g = Graph()
+        >>> for name in ['a', 'b', 'c']:
+        ...     g.add_vertex(name)
+        >>> g.add_edge('a', 'b')
+        >>> g.enable_path_cache()
+        >>> g.get_friend_path('a', 'b')
+        [('a', 'b')]
+        >>> g.add_edge('b', 'c')
+        >>> g.get_friend_path('a', 'c')
+        [('a', 'b'), ('b', 'c')]
+        >>> g.get_friend_path('a', 'b')
+        [('a', 'b')]
+        >>> stats = g.path_cache_stats()
+        >>> (stats['hits'], stats['misses'], stats['invalidations'])
+        (1, 2, 1)
+        """
+        self._path_cache = PathTreeCache(max_entries, max_bytes)
+
+    def disable_path_cache(self) -> None:
+        """Turn off the cache of shortest-path trees and drop its contents."""
+        self._path_cache = None
+
+    def path_cache_stats(self) -> dict[str, int]:
+        """Return the hit, miss, eviction and invalidation counters and the current number of entries
+        and approximate bytes of the shortest-path tree cache.
+
+        Raise a ValueError if the cache is turned off.
+        """
+        if self._path_cache is None:
+            raise ValueError
+        return self._path_cache.stats()
+
+    def _bidirectional_path(self, start: _Vertex, end: _Vertex) -> list[_Vertex]:
+        """Returns a shortest path from start to end found by searching from both ends at once
+
+        The searches alternate one BFS level at a time, always growing the smaller frontier, and
+        stop at the end of the first level in which they meet. If there is no path between start
+        and end, returns an empty list
+
+        >>> g = Graph()
+        >>> for name in ['a', 'b', 'c', 'd', 'e']:
+        ...     g.add_vertex(name)
+        >>> for edge in [('a', 'b'), ('b', 'c'), ('c', 'd'), ('a', 'e'), ('e', 'd')]:
+        ...     g.add_edge(*edge)
+        >>> [v.item for v in g._bidirectional_path(g._vertices['a'], g._vertices['d'])]
+        ['a', 'e', 'd']
+        >>> g.add_vertex('f')
+        >>> g._bidirectional_path(g._vertices['a'], g._vertices['f'])
+        []
+        """
+        if start == end:
+            return [start]
+
+        # Each side maps the vertices it has reached to their parent on the way back to its root,
+        # and to their distance from that root
+        forward, backward = {start: start}, {end: end}
+        forward_depths, backward_depths = {start: 0}, {end: 0}
+        forward_frontier, backward_frontier = deque([start]), deque([end])
+
+        while forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                frontier, parents, depths, other_depths = forward_frontier, forward, forward_depths, backward_depths
+            else:
+                frontier, parents, depths, other_depths = backward_frontier, backward, backward_depths, forward_depths
+
+            meeting = None
+            for _ in range(len(frontier)):
+                parent = frontier.popleft()
+                for neighbour in parent.neighbours:
+                    # Keep the meeting point closest to the other root
+                    if neighbour in other_depths and \
+                            (meeting is None or other_depths[neighbour] < other_depths[meeting[1]]):
+                        meeting = (parent, neighbour)
+                    if neighbour not in parents:
+                        parents[neighbour] = parent
+                        depths[neighbour] = depths[parent] + 1
+                        frontier.append(neighbour)
+
+            if meeting is not None:
+                u, v = meeting if parents is forward else (meeting[1], meeting[0])
+                path = self._join_paths(u, v, forward, backward)
+                break
+        else:
+            path = []
+
+        if instrument.STATE.enabled:
+            # Every vertex reached by a side was expanded by it, except those still in its frontier
+            forward_left, backward_left = set(forward_frontier), set(backward_frontier)
+            self._count_search([v for v in forward if v not in forward_left] +
+                               [v for v in backward if v not in backward_left], len(forward) + len(backward))
+        return path
+
+    def _join_paths(self, u: _Vertex, v: _Vertex, forward: dict[_Vertex, _Vertex],
+                    backward: dict[_Vertex, _Vertex]) -> list[_Vertex]:
+        """Returns the path from the forward root to u, followed by the edge (u, v) and the path
+        from v to the backward root
+        """
+        path = [u]
+        while forward[path[-1]] != path[-1]:
+            path.append(forward[path[-1]])
+        path.reverse()
+
+        path.append(v)
+        while backward[path[-1]] != path[-1]:
+            path.append(backward[path[-1]])
+
+        return path
 
     def _get_parents(self, start: _Vertex) -> dict[_Vertex, _Vertex]:
         """Returns a dictionary containing vertices (keys) which link back to their
@@ -213,8 +1000,18 @@ class Graph:
                     queue.enqueue(neighbour)
                     parents[neighbour] = parent
 
+        if instrument.STATE.enabled:
+            self._count_search(list(visited), len(visited))
         return parents
 
+    def _count_search(self, expanded: list[_Vertex], pushes: int, pops: int | None = None) -> None:
+        """Add the counters of a search that expanded (scanned the edges of) the given vertices
+        and made the given numbers of queue pushes and pops to the running query. pops defaults to
+        the number of expanded vertices.
+        """
+        instrument.count(expanded=len(expanded), edges=sum(len(v.neighbours) for v in expanded), pushes=pushes,
+                         pops=len(expanded) if pops is None else pops)
+
     def _reconstruct_path(self, start: _Vertex, end: _Vertex, parents: dict[_Vertex, _Vertex]) -> list[_Vertex]:
         """Reconstructs the shortest path between start to end by going backwards in the parents
         dictionary starting from the end vertex.
@@ -257,6 +1054,348 @@ class Graph:
         """
         return self._vertices
 
+    def fingerprint(self) -> str:
+        """Return a hex digest identifying the vertices, edges and edge weights of this graph.
+
+        Two graphs have the same fingerprint when their vertices were added in the same order and
+        they have the same edges with the same weights. Edges of an unweighted graph count as
+        having weight 1.
+
+        >>> g1, g2 = Graph(), Graph()
+        >>> for g in (g1, g2):
+        ...     g.add_vertex('a')
+        ...     g.add_vertex('b')
+        >>> g1.fingerprint() == g2.fingerprint()
+        True
+        >>> g1.add_edge('a', 'b')
+        >>> g1.fingerprint() == g2.fingerprint()
+        False
+        """
+        index = {item: i for i, item in enumerate(self._vertices)}
+        digest = hashlib.blake2b(digest_size=16)
+
+        for v in self._vertices.values():
+            row = sorted((index[u.item], self._closeness(v, u)) for u in v.neighbours)
+            digest.update(f'{v.item!r}:{row}\n'.encode())
+
+        return digest.hexdigest()
+
+    def suggest_friends(self, user: Any, k: int = 10, exclude: Collection = (),
+                        max_mutual_degree: int | None = None) -> list[tuple[Any, int]]:
+        """Return up to k people who are not yet friends with user, ranked by their mutual friends.
+
+        Each suggestion is a (person, score) pair, where score is the number of mutual friends (in
+        a WeightedGraph, the sum over mutual friends of the product of the two closeness weights).
+        Suggestions are sorted by decreasing score, and then by person. The people in exclude, such
+        as the ego 'raven', are neither suggested nor counted as mutual friends. If
+        max_mutual_degree is given, mutual friends with more friends than that are also ignored.
+
+        >>> g = Graph()
+        >>> for name in ['a', 'b', 'c', 'd', 'e']:
+        ...     g.add_vertex(name)
+        >>> for edge in [('a', 'b'), ('a', 'c'), ('b', 'd'), ('c', 'd'), ('c', 'e')]:
+        ...     g.add_edge(*edge)
+        >>> g.suggest_friends('a')
+        [('d', 2), ('e', 1)]
+        >>> g.suggest_friends('a', exclude={'c'})
+        [('d', 1)]
+
+        Preconditions:
+            - user in self.get_vertices()
+            - k >= 0
+        """
+        v = self._vertices[user]
+        excluded = {self._vertices[item] for item in exclude if item in self._vertices}
+        scores = {}
+
+        for mutual in v.neighbours:
+            if mutual in excluded or (max_mutual_degree is not None and len(mutual.neighbours) > max_mutual_degree):
+                continue
+            closeness = self._closeness(v, mutual)
+            for candidate in mutual.neighbours:
+                if candidate is not v and candidate not in excluded and candidate not in v.neighbours:
+                    scores[candidate] = scores.get(candidate, 0) + closeness * self._closeness(mutual, candidate)
+
+        best = heapq.nsmallest(k, scores.items(), key=lambda entry: (-entry[1], str(entry[0].item)))
+        return [(candidate.item, score) for candidate, score in best]
+
+    def _closeness(self, v: _Vertex, u: _Vertex) -> int:
+        """Return the weight of the edge between the adjacent vertices v and u, which is 1 for every
+        edge of an unweighted graph.
+        """
+        return 1
+
+    def _incident_edges(self, v: _Vertex) -> Iterable[tuple[_Vertex, int]]:
+        """Return (neighbour, weight) for every edge of v."""
+        return ((u, 1) for u in v.neighbours)
+
+    def _distance_tree(self, root: _Vertex) -> tuple[dict[_Vertex, int], dict[_Vertex, _Vertex]]:
+        """Return the distance from every vertex reachable from root to root, and the next vertex
+        on a shortest path from each of them (other than root) to root.
+        """
+        distances = {root: 0}
+        next_vertex = {}
+        queue = deque([root])
+
+        while queue:
+            vertex = queue.popleft()
+            for neighbour in vertex.neighbours:
+                if neighbour not in distances:
+                    distances[neighbour] = distances[vertex] + 1
+                    next_vertex[neighbour] = vertex
+                    queue.append(neighbour)
+
+        return distances, next_vertex
+
+    @instrument.traced_query('Graph.get_k_friend_paths', path=False)
+    def get_k_friend_paths(self, start: Any, end: Any, k: int) -> list[list[tuple]]:
+        """Returns up to k different loopless paths of mutuals from start to end, shortest first,
+        using Yen's algorithm
+
+        The path lengths are counted in edges (in a WeightedGraph, as the sum of the closeness
+        weights). The first path is a shortest path, as returned by get_friend_path, and each later
+        one is a shortest path that differs from all of those before it. Fewer than k paths are
+        returned if there are not that many, and none if there is no path.
+
+        A single shortest-path tree towards end is built and shared by every spur search: its
+        distances are exact lower bounds that guide the searches straight to end, a search stops as
+        soon as it reaches a vertex whose tree path to end is still allowed, and spur searches that
+        cannot produce one of the k paths are skipped.
+
+        >>> g = Graph()
+        >>> for name in ['a', 'b', 'c', 'd', 'e']:
+        ...     g.add_vertex(name)
+        >>> for edge in [('a', 'b'), ('b', 'd'), ('a', 'c'), ('c', 'd'), ('a', 'e'), ('e', 'c')]:
+        ...     g.add_edge(*edge)
+        >>> paths = g.get_k_friend_paths('a', 'd', 3)
+        >>> sorted(paths[:2])
+        [[('a', 'b'), ('b', 'd')], [('a', 'c'), ('c', 'd')]]
+        >>> paths[2]
+        [('a', 'e'), ('e', 'c'), ('c', 'd')]
+
+        Preconditions:
+            - start in self.get_vertices() and end in self.get_vertices()
+            - k >= 0
+            - every edge weight is non-negative
+        """
+        start_vertex = self._vertices[start]
+        end_vertex = self._vertices[end]
+        if k <= 0 or self._known_disconnected(start_vertex, end_vertex):
+            return []
+        distances, next_vertex = self._distance_tree(end_vertex)
+        if start_vertex not in distances:
+            return []
+
+        # The first path follows the tree from start to end
+        first = [start_vertex]
+        while first[-1] is not end_vertex:
+            first.append(next_vertex[first[-1]])
+
+        paths = [first]
+        candidates = []
+        seen = {tuple(first)}
+        counter = 0
+
+        while len(paths) < k:
+            previous = paths[-1]
+            needed = k - len(paths)
+            # A spur path must cost at most this much to be among the k paths
+            bound = heapq.nsmallest(needed, candidates)[-1][0] if len(candidates) >= needed else None
+            root_cost = 0
+
+            for i in range(len(previous) - 1):
+                spur = previous[i]
+                root = previous[:i + 1]
+                if bound is None or root_cost + distances[spur] <= bound:
+                    blocked = {path[i + 1] for path in paths if len(path) > i + 1 and path[:i + 1] == root}
+                    spur_path = self._spur_path(spur, end_vertex, set(root[:-1]), blocked, distances, next_vertex,
+                                                None if bound is None else bound - root_cost)
+                    if spur_path is not None and tuple(root[:-1] + spur_path) not in seen:
+                        path = root[:-1] + spur_path
+                        seen.add(tuple(path))
+                        counter += 1
+                        cost = root_cost + sum(self._closeness(u, v) for u, v in zip(spur_path, spur_path[1:]))
+                        heapq.heappush(candidates, (cost, counter, path))
+
+                root_cost += self._closeness(spur, previous[i + 1])
+
+            if not candidates:
+                break
+            paths.append(heapq.heappop(candidates)[2])
+
+        return [self.path_to_edges(path) for path in paths]
+
+    def _spur_path(self, spur: _Vertex, end: _Vertex, removed: set[_Vertex], blocked: set[_Vertex],
+                   distances: dict[_Vertex, int], next_vertex: dict[_Vertex, _Vertex],
+                   bound: int | None) -> list[_Vertex] | None:
+        """Return a shortest path from spur to end that avoids the vertices in removed and does not
+        start with an edge from spur to a vertex in blocked, or None if there is none costing at
+        most bound.
+
+        This is an A* search using the exact distances to end in the whole graph as its heuristic.
+        Once it settles a vertex whose tree path to end (following next_vertex) is still allowed,
+        that vertex's path followed by the tree path is a shortest allowed path.
+        """
+        distance_from_spur = {spur: 0}
+        parents = {}
+        settled = set()
+        counter = 0
+        heap = [(distances[spur], counter, spur)]
+
+        while heap:
+            estimate, _, vertex = heapq.heappop(heap)
+            if vertex in settled:
+                continue
+            if bound is not None and estimate > bound:
+                return None
+            settled.add(vertex)
+
+            path = self._allowed_tree_path(vertex, spur, end, removed, blocked, next_vertex, parents)
+            if path is not None:
+                return path
+
+            for neighbour, weight in self._incident_edges(vertex):
+                if neighbour in removed or neighbour in settled or neighbour not in distances or \
+                        (vertex is spur and neighbour in blocked):
+                    continue
+                new_distance = distance_from_spur[vertex] + weight
+                if neighbour not in distance_from_spur or new_distance < distance_from_spur[neighbour]:
+                    distance_from_spur[neighbour] = new_distance
+                    parents[neighbour] = vertex
+                    counter += 1
+                    heapq.heappush(heap, (new_distance + distances[neighbour], counter, neighbour))
+
+        return None
+
+    def _allowed_tree_path(self, vertex: _Vertex, spur: _Vertex, end: _Vertex, removed: set[_Vertex],
+                           blocked: set[_Vertex], next_vertex: dict[_Vertex, _Vertex],
+                           parents: dict[_Vertex, _Vertex]) -> list[_Vertex] | None:
+        """Return the loopless path from spur to vertex (following parents) and then from vertex
+        to end (following next_vertex), or None if it uses a removed vertex or a blocked first edge.
+        """
+        path = self._reconstruct_path(spur, vertex, parents)
+        on_path = set(path)
+
+        current = vertex
+        while current is not end:
+            current = next_vertex[current]
+            if current in removed or current in on_path or (len(path) == 1 and current in blocked):
+                return None
+            path.append(current)
+            on_path.add(current)
+
+        return path
+
+    @instrument.traced_query('Graph.get_constrained_path')
+    def get_constrained_path(self, start: Any, end: Any, max_hops: int | None = None, avoid: Collection = (),
+                             avoid_edges: Iterable[tuple[Any, Any]] = (),
+                             min_closeness: int | None = None) -> list[tuple]:
+        """Returns the shortest path of mutuals between 2 people that has at most max_hops edges,
+        passes through none of the people in avoid, uses none of the friendships in avoid_edges
+        and only uses friendships with a closeness of at least min_closeness
+
+        The path length is counted as in get_friend_path. The constraints are applied while
+        searching: avoided people and friendships are never explored, and nobody further than
+        max_hops from start or end is expanded, so hop-limited queries stay cheap in large
+        components. In a WeightedGraph, the search keeps the cheapest way found to reach each
+        person with every smaller number of hops, so the path found is the cheapest one within
+        max_hops. If there is no such path, returns an empty list
+
+        >>> g = WeightedGraph()
+        >>> for name in ['raven', 'a', 'b', 'c', 'd']:
+        ...     g.add_vertex(name)
+        >>> for edge in [('raven', 'a', 1), ('raven', 'd', 1), ('a', 'b', 4), ('b', 'c', 4), ('c', 'd', 2),
+        ...              ('a', 'c', 1)]:
+        ...     g.add_edge(*edge)
+        >>> g.get_constrained_path('a', 'd')
+        [('a', 'raven'), ('raven', 'd')]
+        >>> g.get_constrained_path('a', 'd', avoid={'raven'})
+        [('a', 'c'), ('c', 'd')]
+        >>> g.get_constrained_path('a', 'd', avoid={'raven'}, min_closeness=2)
+        [('a', 'b'), ('b', 'c'), ('c', 'd')]
+        >>> g.get_constrained_path('a', 'd', max_hops=2, avoid={'raven'}, min_closeness=2)
+        []
+        >>> g.get_constrained_path('a', 'd', avoid_edges=[('d', 'raven')])
+        [('a', 'c'), ('c', 'd')]
+
+        Preconditions:
+            - start in self.get_vertices() and end in self.get_vertices()
+            - max_hops is None or max_hops >= 0
+            - every edge weight is non-negative
+        """
+        start_vertex = self._vertices[start]
+        end_vertex = self._vertices[end]
+        removed = {self._vertices[item] for item in avoid if item in self._vertices}
+        if start_vertex in removed or end_vertex in removed or \
+                self._known_disconnected(start_vertex, end_vertex):
+            return []
+
+        banned = set()
+        for item1, item2 in avoid_edges:
+            if item1 in self._vertices and item2 in self._vertices:
+                banned.add((self._vertices[item1], self._vertices[item2]))
+                banned.add((self._vertices[item2], self._vertices[item1]))
+
+        return self.path_to_edges(self._constrained_path(start_vertex, end_vertex, max_hops, removed, banned,
+                                                         min_closeness))
+
+    def _constrained_path(self, start: _Vertex, end: _Vertex, max_hops: int | None, removed: set[_Vertex],
+                          banned: set[tuple[_Vertex, _Vertex]], min_closeness: int | None) -> list[_Vertex]:
+        """Returns a shortest path from start to end with at most max_hops edges that avoids the
+        vertices in removed, the (v1, v2) edges in banned and the edges with a closeness below
+        min_closeness, or an empty list if there is none
+
+        Like _bidirectional_path, this searches from both ends one BFS level at a time, and the
+        two searches stop once their depths add up to max_hops. Every edge has a closeness of 1
+        """
+        if min_closeness is not None and min_closeness > 1:
+            return [] if start is not end else [start]
+        elif start is end:
+            return [start]
+
+        forward, backward = {start: start}, {end: end}
+        forward_depths, backward_depths = {start: 0}, {end: 0}
+        forward_frontier, backward_frontier = [start], [end]
+        levels = 0
+        path = []
+
+        while forward_frontier and backward_frontier and (max_hops is None or levels < max_hops):
+            if len(forward_frontier) <= len(backward_frontier):
+                frontier, parents, depths, other_depths = forward_frontier, forward, forward_depths, backward_depths
+            else:
+                frontier, parents, depths, other_depths = backward_frontier, backward, backward_depths, forward_depths
+            levels += 1
+
+            meeting = None
+            next_frontier = []
+            for parent in frontier:
+                for neighbour in parent.neighbours:
+                    if neighbour in removed or (banned and (parent, neighbour) in banned):
+                        continue
+                    # Keep the meeting point closest to the other root
+                    if neighbour in other_depths and \
+                            (meeting is None or other_depths[neighbour] < other_depths[meeting[1]]):
+                        meeting = (parent, neighbour)
+                    if neighbour not in parents:
+                        parents[neighbour] = parent
+                        depths[neighbour] = depths[parent] + 1
+                        next_frontier.append(neighbour)
+
+            if parents is forward:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+            if meeting is not None:
+                u, v = meeting if parents is forward else (meeting[1], meeting[0])
+                path = self._join_paths(u, v, forward, backward)
+                break
+
+        if instrument.STATE.enabled:
+            forward_left, backward_left = set(forward_frontier), set(backward_frontier)
+            self._count_search([v for v in forward if v not in forward_left] +
+                               [v for v in backward if v not in backward_left], len(forward) + len(backward))
+        return path
+
 
 class _WeightedVertex(_Vertex):
     """A vertex in a weighted graph.
@@ -300,7 +1439,15 @@ class WeightedGraph(Graph):
     #     - _vertices:
     #         A collection of the vertices contained in this graph.
     #         Maps item to _WeightedVertex object.
+    #     - _max_weight:
+    #         An upper bound on the weights of the edges in this graph, or None if some edge
+    #         weight is not a non-negative integer.
+    #     - _view:
+    #         The unweighted view sharing the vertices and edges of this graph, or None if
+    #         unweighted_view has not been called.
     _vertices: dict[Any, _WeightedVertex]
+    _max_weight: int | None
+    _view: _UnweightedView | None
 
     def __init__(self) -> None:
         """Initialize an empty graph (no vertices or edges)."""
@@ -309,6 +1456,34 @@ class WeightedGraph(Graph):
         # This call isn't necessary, except to satisfy PythonTA.
         Graph.__init__(self)
 
+        self._max_weight = 0
+        self._view = None
+
+    def unweighted_view(self) -> Graph:
+        """Return a Graph of the same people and friendships as this graph, ignoring the
+        weights, that shares its vertices and edges instead of copying them.
+
+        Changes to either graph are seen by both. New edges added through the view have weight 1.
+
+        >>> g = WeightedGraph()
+        >>> for name in ['a', 'b', 'c']:
+        ...     g.add_vertex(name)
+        >>> g.add_edge('a', 'b', 5)
+        >>> g.add_edge('b', 'c', 5)
+        >>> g.add_edge('a', 'c', 20)
+        >>> view = g.unweighted_view()
+        >>> (view.get_friend_path('a', 'c'), g.get_friend_path('a', 'c'))
+        ([('a', 'c')], [('a', 'b'), ('b', 'c')])
+        >>> view.remove_edge('a', 'b')
+        >>> g.get_friend_path('a', 'c')
+        [('a', 'c')]
+        >>> view is g.unweighted_view()
+        True
+        """
+        if self._view is None:
+            self._view = _UnweightedView(self)
+        return self._view
+
     def add_vertex(self, item: Any) -> None:
         """Add a vertex with the given item and kind to this graph.
 
@@ -317,6 +1492,9 @@ class WeightedGraph(Graph):
         """
         if item not in self._vertices:
             self._vertices[item] = _WeightedVertex(item)
+            for graph in self._sharing():
+                if graph._components is not None:
+                    graph._components.add(self._vertices[item])
 
     def add_edge(self, item1: Any, item2: Any, weight: int = 1) -> None:
         """Add an edge between the two vertices with the given items in this graph,
@@ -327,17 +1505,62 @@ class WeightedGraph(Graph):
         Preconditions:
             - item1 != item2
         """
-        if item1 in self._vertices and item2 in self._vertices:
-            v1 = self._vertices[item1]
-            v2 = self._vertices[item2]
-
+        v1 = self._vertices.get(item1)
+        v2 = self._vertices.get(item2)
+        if v1 is not None and v2 is not None:
             # Add the new edge
             v1.neighbours[v2] = weight
             v2.neighbours[v1] = weight
+
+            if self._max_weight is None or not isinstance(weight, int) or weight < 0:
+                self._max_weight = None
+            elif weight > self._max_weight:
+                self._max_weight = weight
+
+            self._edge_changed(v1, v2)
         else:
             # We didn't find an existing vertex for both items.
             raise ValueError
 
+    def remove_edge(self, item1: Any, item2: Any) -> None:
+        """Remove the edge between the two vertices with the given items in this graph.
+
+        Raise a ValueError if item1 or item2 do not appear as vertices in this graph, or if they
+        are not adjacent.
+        """
+        v1 = self._vertices.get(item1)
+        v2 = self._vertices.get(item2)
+        if v1 is None or v2 is None or v2 not in v1.neighbours:
+            raise ValueError
+
+        del v1.neighbours[v2]
+        del v2.neighbours[v1]
+        self._edge_changed(v1, v2)
+
+    def remove_vertex(self, item: Any) -> None:
+        """Remove the vertex with the given item, and all of its edges, from this graph.
+
+        A shortest-path tree tracked from this vertex is dropped.
+
+        Raise a ValueError if item does not appear as a vertex in this graph.
+        """
+        if self._view is not None and item in self._vertices:
+            self._view._tracked.pop(self._vertices[item], None)
+            self._view._forget_components()
+        Graph.remove_vertex(self, item)
+
+    def _edge_changed(self, v1: _WeightedVertex, v2: _WeightedVertex) -> None:
+        """Update the path caches, tracked shortest-path trees and connected components of this
+        graph and its unweighted view after the edge between v1 and v2 was added, removed or
+        reweighted.
+        """
+        for graph in self._sharing():
+            Graph._edge_changed(graph, v1, v2)
+
+    def _sharing(self) -> list[Graph]:
+        """Return this graph, and its unweighted view if it has one."""
+        return [self] if self._view is None else [self, self._view]
+
     def get_weight(self, item1: Any, item2: Any) -> int:
         """Return the weight of the edge between the given items.
 
@@ -350,116 +1573,557 @@ class WeightedGraph(Graph):
         v2 = self._vertices[item2]
         return v1.neighbours.get(v2, 0)
 
+    def _closeness(self, v: _WeightedVertex, u: _WeightedVertex) -> int:
+        """Return the weight of the edge between the adjacent vertices v and u.
+        """
+        return v.neighbours[u]
+
+    def _incident_edges(self, v: _WeightedVertex) -> Iterable[tuple[_WeightedVertex, int]]:
+        """Return (neighbour, weight) for every edge of v."""
+        return v.neighbours.items()
+
+    def _distance_tree(self, root: _WeightedVertex) -> tuple[dict[_WeightedVertex, int],
+                                                             dict[_WeightedVertex, _WeightedVertex]]:
+        """Return the distance from every vertex reachable from root to root, and the next vertex
+        on a shortest path from each of them (other than root) to root, using Dijkstra's algorithm.
+        """
+        distances = {root: 0}
+        next_vertex = {}
+        settled = set()
+        counter = 0
+        heap = [(0, counter, root)]
+
+        while heap:
+            distance, _, vertex = heapq.heappop(heap)
+            if vertex in settled:
+                continue
+            settled.add(vertex)
+
+            for neighbour, weight in vertex.neighbours.items():
+                new_distance = distance + weight
+                if neighbour not in distances or new_distance < distances[neighbour]:
+                    distances[neighbour] = new_distance
+                    next_vertex[neighbour] = vertex
+                    counter += 1
+                    heapq.heappush(heap, (new_distance, counter, neighbour))
+
+        return distances, next_vertex
+
+    @instrument.traced_query('WeightedGraph.get_friend_path')
     def get_friend_path(self, start: str, end: str) -> list[_Vertex | _WeightedVertex]:
         """Returns the shortest path of mutuals between 2 people in the graph
 
-        If there is no path, returns an empty list
+        If there is no path, returns an empty list. People known to be in different connected
+        components are answered without any search
         """
         start_vertex = self._vertices[start]
         end_vertex = self._vertices[end]
+        if self._known_disconnected(start_vertex, end_vertex):
+            return []
 
-        parents = self._parents_weighted(start_vertex, end_vertex)
+        if self._path_cache is None and start_vertex not in self._tracked:
+            parents = self._parents_weighted(start_vertex, end_vertex)
+        else:
+            parents = self._source_tree(start_vertex)
 
         reconstructed_path = self._reconstruct_path(start_vertex, end_vertex, parents)
         return self.path_to_edges(reconstructed_path)
 
-    def _parents_weighted(self, start: _WeightedVertex, end: _WeightedVertex) -> dict[_WeightedVertex, _WeightedVertex]:
+    def _constrained_path(self, start: _WeightedVertex, end: _WeightedVertex, max_hops: int | None,
+                          removed: set[_WeightedVertex], banned: set[tuple[_WeightedVertex, _WeightedVertex]],
+                          min_closeness: int | None) -> list[_WeightedVertex]:
+        """Returns a path of lowest total weight from start to end with at most max_hops edges that
+        avoids the vertices in removed, the (v1, v2) edges in banned and the edges with a weight
+        below min_closeness, or an empty list if there is none
+
+        With a hop limit, this is an A* search over (vertex, hops) labels. The allowed edges within
+        max_hops - 1 hops of end are found first, by BFS from end. A label is only queued if its
+        vertex is close enough to end to get there within max_hops, and the number of hops left
+        times the lowest weight seen is the heuristic. A label is only expanded if its vertex has
+        not been expanded with as few hops, since that label was at least as cheap
+        """
+        if max_hops is None:
+            return self._filtered_path(start, end, removed, banned, min_closeness)
+
+        hops_to_end, lowest = self._hops_to(end, max_hops - 1, removed, banned, min_closeness)
+        costs = {(start, 0): 0}
+        parents = {}
+        # The fewest hops of any label of each vertex expanded so far
+        fewest_hops = {}
+        expanded = []
+        counter = 0
+        heap = [(0, 0, counter, start)]
+        found = None
+
+        while heap:
+            _, hops, _, vertex = heapq.heappop(heap)
+            if vertex in fewest_hops and fewest_hops[vertex] <= hops:
+                continue
+            fewest_hops[vertex] = hops
+            if vertex is end:
+                found = (vertex, hops)
+                break
+
+            expanded.append(vertex)
+            cost = costs[(vertex, hops)]
+            for neighbour, weight in vertex.neighbours.items():
+                if neighbour not in hops_to_end or hops + 1 + hops_to_end[neighbour] > max_hops or \
+                        neighbour in removed or (min_closeness is not None and weight < min_closeness) or \
+                        (neighbour in fewest_hops and fewest_hops[neighbour] <= hops + 1) or \
+                        (banned and (vertex, neighbour) in banned):
+                    continue
+                label = (neighbour, hops + 1)
+                if label not in costs or cost + weight < costs[label]:
+                    costs[label] = cost + weight
+                    parents[label] = (vertex, hops)
+                    counter += 1
+                    heapq.heappush(heap, (cost + weight + hops_to_end[neighbour] * lowest, hops + 1, counter,
+                                          neighbour))
+
+        if instrument.STATE.enabled:
+            # The BFS from end expanded every vertex it found less than max_hops - 1 hops from end
+            self._count_search(expanded + [v for v, hops in hops_to_end.items() if hops < max_hops - 1],
+                               counter + len(hops_to_end), counter + len(hops_to_end) - len(heap))
+        if found is None:
+            return []
+
+        path = [found]
+        while path[-1] in parents:
+            path.append(parents[path[-1]])
+        return [vertex for vertex, _ in reversed(path)]
+
+    def _hops_to(self, end: _WeightedVertex, max_hops: int, removed: set[_WeightedVertex],
+                 banned: set[tuple[_WeightedVertex, _WeightedVertex]],
+                 min_closeness: int | None) -> tuple[dict[_WeightedVertex, int], int | float]:
+        """Return the number of allowed edges between end and every vertex at most max_hops allowed
+        edges from it, found by BFS, and the lowest weight of the allowed edges scanned, or 0 if
+        there were none.
+
+        An edge is allowed if it avoids the vertices in removed and the edges in banned, and its
+        weight is at least min_closeness. Every allowed edge between two of the vertices returned,
+        except those between two vertices max_hops from end, is scanned.
+        """
+        hops_to_end = {end: 0}
+        frontier = [end]
+        lowest = None
+        for depth in range(1, max_hops + 1):
+            next_frontier = []
+            for vertex in frontier:
+                for neighbour, weight in vertex.neighbours.items():
+                    if neighbour in removed or (min_closeness is not None and weight < min_closeness) or \
+                            (banned and (vertex, neighbour) in banned):
+                        continue
+                    lowest = weight if lowest is None or weight < lowest else lowest
+                    if neighbour not in hops_to_end:
+                        hops_to_end[neighbour] = depth
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+
+        return hops_to_end, 0 if lowest is None else lowest
+
+    def _filtered_path(self, start: _WeightedVertex, end: _WeightedVertex, removed: set[_WeightedVertex],
+                       banned: set[tuple[_WeightedVertex, _WeightedVertex]],
+                       min_closeness: int | None) -> list[_WeightedVertex]:
+        """Returns a path of lowest total weight from start to end that avoids the vertices in
+        removed, the (v1, v2) edges in banned and the edges with a weight below min_closeness, or
+        an empty list if there is none, using Dijkstra's algorithm
+        """
+        distances = {start: 0}
+        settled = set()
+        prev = {}
+        counter = 0
+        heap = [(0, counter, start)]
+
+        while heap:
+            distance, _, vertex = heapq.heappop(heap)
+            if vertex in settled:
+                continue
+            settled.add(vertex)
+            if vertex is end:
+                break
+
+            for neighbour, weight in vertex.neighbours.items():
+                new_distance = distance + weight
+                if neighbour in settled or neighbour in removed or \
+                        (min_closeness is not None and weight < min_closeness) or \
+                        (banned and (vertex, neighbour) in banned):
+                    continue
+                if neighbour not in distances or new_distance < distances[neighbour]:
+                    prev[neighbour] = vertex
+                    distances[neighbour] = new_distance
+                    counter += 1
+                    heapq.heappush(heap, (new_distance, counter, neighbour))
+
+        if instrument.STATE.enabled:
+            self._count_search([v for v in settled if v is not end], counter + 1, counter + 1 - len(heap))
+        return self._reconstruct_path(start, end, prev) if end in settled else []
+
+    def _source_tree(self, start: _WeightedVertex) -> dict[_WeightedVertex, _WeightedVertex]:
+        """Returns the parents dictionary of a complete Dijkstra search from start, from its
+        tracked tree, or from the path cache if it is turned on and has it
+        """
+        if start in self._tracked:
+            return self._tracked[start].parents()
+        elif self._path_cache is None:
+            return self._parents_weighted(start)
+
+        parents = self._path_cache.get(start)
+        if parents is None:
+            parents = self._parents_weighted(start)
+            self._path_cache.put(start, parents)
+        return parents
+
+    def _parents_weighted(self, start: _WeightedVertex,
+                          end: _WeightedVertex | None = None) -> dict[_WeightedVertex, _WeightedVertex]:
         """Uses Djikstra's algorithm to return a dictionary containing vertices (keys)
         which link back to their 'parent nodes' (values).
 
+        The search stops once end is reached, or covers every vertex reachable from start if end
+        is None. When every edge weight is a small non-negative integer, as with the closeness
+        weights from load_friend_network, a bucket queue (Dial's algorithm) is used instead of
+        a binary heap. Both settle vertices with equal distances in the order they were first
+        given that distance, so they return the same parents.
+
+        >>> g = WeightedGraph()
+        >>> for name in ['a', 'b', 'c', 'd']:
+        ...     g.add_vertex(name)
+        >>> for edge in [('a', 'b', 1), ('b', 'd', 3), ('a', 'c', 2), ('c', 'd', 2)]:
+        ...     g.add_edge(*edge)
+        >>> parents = g._parents_weighted(g._vertices['a'])
+        >>> parents[g._vertices['d']].item
+        'b'
+        >>> parents == g._parents_heap(g._vertices['a'], None)
+        True
+
         Preconditions:
             - start in self._vertices.values()
-            - end in self._vertices.values()
+            - end is None or end in self._vertices.values()
         """
-        visited = set()
-        distances = {start: 0}
-        prev = {}
-        priority_queue = PriorityQueue()
-        priority_queue.put((0, id(start), start))
+        if self._max_weight is not None and self._max_weight <= MAX_BUCKET_WEIGHT:
+            return self._parents_dial(start, end)
+        else:
+            return self._parents_heap(start, end)
 
-        while not priority_queue.empty():
-            item = priority_queue.get()
-            distance, vertex = item[0], item[2]
-            #  distance, vertex = item[0], item[1]
-            visited.add(vertex)
+    def _parents_dial(self, start: _WeightedVertex,
+                      end: _WeightedVertex | None) -> dict[_WeightedVertex, _WeightedVertex]:
+        """Dijkstra's algorithm for _parents_weighted using a circular array of
+        self._max_weight + 1 FIFO buckets, one for each distance that can still be queued.
 
-            if vertex not in distances:
-                continue
-            if distances[vertex] < distance:
+        Preconditions:
+            - self._max_weight is not None
+        """
+        buckets = [deque() for _ in range(self._max_weight + 1)]
+        buckets[0].append(start)
+        distances = {start: 0}
+        settled = set()
+        prev = {}
+        distance = 0
+        queued = pushes = 1
+
+        while queued > 0:
+            bucket = buckets[distance % len(buckets)]
+            while not bucket:
+                distance += 1
+                bucket = buckets[distance % len(buckets)]
+
+            vertex = bucket.popleft()
+            queued -= 1
+            # Skip entries for vertices that were later queued again with a shorter distance
+            if vertex in settled or distances[vertex] != distance:
                 continue
+            settled.add(vertex)
 
-            for neighbour in vertex.neighbours:
-                if neighbour in visited:
-                    continue
-
-                new_distance = distances[vertex] + vertex.neighbours[neighbour]
-                if neighbour not in distances:
-                    distances[neighbour] = math.inf
+            if vertex == end:
+                break
 
-                if new_distance < distances[neighbour]:
+            for neighbour, weight in vertex.neighbours.items():
+                new_distance = distance + weight
+                if neighbour not in settled and (neighbour not in distances or new_distance < distances[neighbour]):
                     prev[neighbour] = vertex
                     distances[neighbour] = new_distance
-                    priority_queue.put((new_distance, id(neighbour), neighbour))
+                    buckets[new_distance % len(buckets)].append(neighbour)
+                    queued += 1
+                    pushes += 1
+
+        if instrument.STATE.enabled:
+            self._count_search([v for v in settled if v != end], pushes, pushes - queued)
+        return prev
+
+    def _parents_heap(self, start: _WeightedVertex,
+                      end: _WeightedVertex | None) -> dict[_WeightedVertex, _WeightedVertex]:
+        """Dijkstra's algorithm for _parents_weighted using a binary heap, for any non-negative
+        edge weights.
+
+        Ties between equal distances are broken by a counter of how many vertices have been
+        queued, so vertices never have to be compared.
+        """
+        distances = {start: 0}
+        settled = set()
+        prev = {}
+        counter = 0
+        heap = [(0, counter, start)]
+
+        while heap:
+            distance, _, vertex = heapq.heappop(heap)
+            if vertex in settled or distances[vertex] < distance:
+                continue
+            settled.add(vertex)
 
             if vertex == end:
-                return prev
+                break
+
+            for neighbour, weight in vertex.neighbours.items():
+                new_distance = distance + weight
+                if neighbour not in settled and (neighbour not in distances or new_distance < distances[neighbour]):
+                    prev[neighbour] = vertex
+                    distances[neighbour] = new_distance
+                    counter += 1
+                    heapq.heappush(heap, (new_distance, counter, neighbour))
 
+        if instrument.STATE.enabled:
+            self._count_search([v for v in settled if v != end], counter + 1, counter + 1 - len(heap))
         return prev
 
 
-def load_friend_network(names_file: str, edges_file: str) -> tuple[Graph, WeightedGraph]:
+class _UnweightedView(Graph):
+    """An unweighted graph sharing the vertices and edges of a WeightedGraph, as returned by
+    WeightedGraph.unweighted_view.
+
+    Searches ignore the edge weights. Changes made through the view are made to the weighted
+    graph, so both always have the same people and friendships. Unlike Graph.add_vertex, adding
+    a vertex that is already in the graph does nothing.
+    """
+    # Private Instance Attributes:
+    #     - _vertices:
+    #         The same dictionary as the _vertices of _weighted.
+    #     - _weighted:
+    #         The graph whose vertices and edges this view shares.
+    _vertices: dict[Any, _WeightedVertex]
+    _weighted: WeightedGraph
+
+    def __init__(self, weighted: WeightedGraph) -> None:
+        """Initialize a view of the given graph."""
+        Graph.__init__(self)
+        self._vertices = weighted._vertices
+        self._weighted = weighted
+
+    def add_vertex(self, item: Any) -> None:
+        """Add a vertex with the given item to this graph, if it is not in it already.
+
+        The new vertex is not adjacent to any other vertices.
+        """
+        self._weighted.add_vertex(item)
+
+    def add_edge(self, item1: Any, item2: Any) -> None:
+        """Add an edge of weight 1 between the two vertices with the given items in this graph,
+        unless they are already adjacent.
+
+        Raise a ValueError if item1 or item2 do not appear as vertices in this graph.
+
+        Preconditions:
+            - item1 != item2
+        """
+        v1 = self._vertices.get(item1)
+        v2 = self._vertices.get(item2)
+        if v1 is None or v2 is None:
+            raise ValueError
+        if v2 not in v1.neighbours:
+            self._weighted.add_edge(item1, item2)
+
+    def remove_edge(self, item1: Any, item2: Any) -> None:
+        """Remove the edge between the two vertices with the given items in this graph.
+
+        Raise a ValueError if item1 or item2 do not appear as vertices in this graph, or if they
+        are not adjacent.
+        """
+        self._weighted.remove_edge(item1, item2)
+
+    def remove_vertex(self, item: Any) -> None:
+        """Remove the vertex with the given item, and all of its edges, from this graph.
+
+        A shortest-path tree tracked from this vertex is dropped.
+
+        Raise a ValueError if item does not appear as a vertex in this graph.
+        """
+        self._weighted.remove_vertex(item)
+
+
+def load_friend_network(names_file: str, edges_file: str | Iterable[tuple[Any, Any]], seed: int = 1,
+                        report: bool = False) -> tuple[Graph, WeightedGraph]:
     """Return a friend network graph corresponding to the given datasets.
 
+    The unweighted graph is the unweighted view of the weighted graph, so every person and
+    friendship is stored once, and changes to either graph are seen by both.
+
+    edges_file may also be an iterable of (user1, user2) id pairs, such as a generator. See
+    read_friend_edges for how users are named and edges are weighted.
+
     Preconditions:
         - names_file is the path to a txt file corresponding to a list of first names
         - edges_file is the path to a txt file corresponding to the edges of the friend network
     """
-    people = {}
-    unweighted_network = Graph()
     weighted_network = WeightedGraph()
 
-    # Used to ensure the network will have the same names each time
-    random.seed(1)
-
     # Add the ego
-    unweighted_network.add_vertex('raven')
     weighted_network.add_vertex('raven')
 
-    with open(names_file) as f1, open(edges_file) as f2:
-        names = f1.readlines()
-        i = random.randint(0, len(names) - 1)
+    # A user's first edge is always the one to raven, so that is where their vertices are added
+    vertices = weighted_network.get_vertices()
+    add_vertex, add_edge = weighted_network.add_vertex, weighted_network.add_edge
+
+    edges = read_friend_edges(names_file, edges_file, seed, report)
+    if instrument.STATE.enabled:
+        # Parsing is interleaved with building unless the edges are read in full first
+        with instrument.phase('parse'):
+            edges = list(edges)
 
-        for line in f2:
-            split_line = line.strip().split()
-            user1, user2 = split_line[0], split_line[1]
+    with instrument.phase('build'):
+        for user1, user2, weight in edges:
+            if user1 not in vertices:
+                add_vertex(user1)
 
-            # Map new user to name, add user to graph, create edge between user and ego (raven)
-            if user1 not in people:
-                people[user1] = names[i].strip()
-                names.pop(i)
-                i = random.randint(0, len(names) - 1)
+            add_edge(user1, user2, weight)
 
-                unweighted_network.add_vertex(people[user1])
-                unweighted_network.add_edge(people[user1], 'raven')
+    # The unweighted network shares the people and friendships of the weighted one
+    return weighted_network.unweighted_view(), weighted_network
 
-                weighted_network.add_vertex(people[user1])
-                weighted_network.add_edge(people[user1], 'raven', random.randint(1, 5))
 
-            if user2 not in people:
-                people[user2] = names[i].strip()
-                names.pop(i)
-                i = random.randint(0, len(names) - 1)
+def read_friend_edges(names_file: str, edges_file: str | Iterable[tuple[Any, Any]], seed: int = 1,
+                      report: bool = False) -> Iterator[tuple[str, str, int]]:
+    """Yield the (user1, user2, weight) edges of the friend network in the given datasets.
 
-                unweighted_network.add_vertex(people[user2])
-                unweighted_network.add_edge(people[user2], 'raven')
+    Each user id in edges_file is mapped to a random first name from names_file, and every new
+    user is connected to the ego (raven) before any of their other edges are yielded. The first
+    edge yielded is always an edge to raven. The random choices are made with the given seed, so
+    the same datasets and seed always produce the same names and weights.
+
+    edges_file may also be an iterable of (user1, user2) id pairs, such as a generator. If report
+    is True, the number of edges read and the rate they were read at are printed at the end.
+
+    Raise a ValueError if there are more users than names.
+
+    Preconditions:
+        - names_file is the path to a txt file corresponding to a list of first names
+        - edges_file is the path to a txt file corresponding to the edges of the friend network
+    """
+    people = {}
+    rng = random.Random(seed)
+    start_time = time.perf_counter()
+    num_edges = 0
+
+    with open(names_file) as f:
+        names = _NamePool([line.strip() for line in f])
+    i = rng.randint(0, len(names) - 1)
+
+    for user1, user2 in _read_edge_ids(edges_file) if isinstance(edges_file, str) else edges_file:
+        num_edges += 1
+
+        # Map new user to name and create edge between user and ego (raven)
+        if user1 not in people:
+            people[user1] = names.pop(i)
+            i = rng.randint(0, len(names) - 1) if len(names) > 0 else -1
+
+            yield people[user1], 'raven', rng.randint(1, 5)
+
+        if user2 not in people:
+            people[user2] = names.pop(i)
+            i = rng.randint(0, len(names) - 1) if len(names) > 0 else -1
+
+            yield people[user2], 'raven', rng.randint(1, 5)
+
+        yield people[user1], people[user2], rng.randint(1, 5)
+
+    if report:
+        elapsed = time.perf_counter() - start_time
+        print(f'Read {num_edges} edges and {len(people)} users in {elapsed:.2f}s '
+              f'({num_edges / max(elapsed, 1e-9):,.0f} edges/sec)')
+
+
+def _read_edge_ids(edges_file: str, chunk_size: int = 1 << 22) -> Iterator[tuple[bytes, bytes]]:
+    """Yield the (user1, user2) id pairs on the lines of the given edges file.
+
+    The file is read in binary chunks of chunk_size bytes, and the ids are yielded as bytes without
+    being decoded. Blank lines are skipped.
+    """
+    with open(edges_file, 'rb') as f:
+        rest = b''
+        chunk = f.read(chunk_size)
+        while chunk:
+            lines = (rest + chunk).split(b'\n')
+            rest = lines.pop()
+            for line in lines:
+                split_line = line.split()
+                if split_line:
+                    yield split_line[0], split_line[1]
+            chunk = f.read(chunk_size)
+
+        split_line = rest.split()
+        if split_line:
+            yield split_line[0], split_line[1]
+
+
+class _NamePool:
+    """The names that have not yet been given to a user, in their original order.
+
+    Removing the name at a given position is O(log n), using a Fenwick tree that counts how many
+    names are left in each range of original positions, instead of shifting a list.
+
+    >>> pool = _NamePool(['a', 'b', 'c', 'd'])
+    >>> pool.pop(1)
+    'b'
+    >>> pool.pop(1)
+    'c'
+    >>> len(pool)
+    2
+    >>> pool.pop(1)
+    'd'
+    """
+    # Private Instance Attributes:
+    #   - _names: Every name, in its original order.
+    #   - _tree: The Fenwick tree; _tree[j] is the number of names left among the _tree[j] & -_tree[j]
+    #            original positions ending at position j (1-indexed).
+    #   - _remaining: The number of names left.
+    _names: list[str]
+    _tree: list[int]
+    _remaining: int
+
+    def __init__(self, names: list[str]) -> None:
+        """Initialize a pool containing all of the given names."""
+        self._names = names
+        self._tree = [j & -j for j in range(len(names) + 1)]
+        self._remaining = len(names)
+
+    def __len__(self) -> int:
+        """Return the number of names left in this pool."""
+        return self._remaining
+
+    def pop(self, i: int) -> str:
+        """Remove and return the name at position i among the names left in this pool.
+
+        Raise a ValueError if i is not a valid position.
+        """
+        if not 0 <= i < self._remaining:
+            raise ValueError
 
-                weighted_network.add_vertex(people[user2])
-                weighted_network.add_edge(people[user2], 'raven', random.randint(1, 5))
+        # Find the smallest original position with i + 1 names left up to and including it
+        tree = self._tree
+        size = len(tree)
+        position = 0
+        step = 1 << (size - 1).bit_length()
+        while step:
+            if position + step < size and tree[position + step] <= i:
+                position += step
+                i -= tree[position]
+            step >>= 1
+        position += 1
 
-            unweighted_network.add_edge(people[user1], people[user2])
-            weighted_network.add_edge(people[user1], people[user2], random.randint(1, 5))
+        self._remaining -= 1
+        j = position
+        while j < size:
+            tree[j] -= 1
+            j += j & -j
 
-    return unweighted_network, weighted_network
+        return self._names[position - 1]
 
 
 if __name__ == '__main__':
@@ -473,7 +2137,9 @@ if __name__ == '__main__':
     # and then also test your methods manually in the console.
     import python_ta
     python_ta.check_all(config={
-        'extra-imports': ['random', 'math', 'queue', 'networkx'],  # the names (strs) of imported modules
-        'allowed-io': ['load_friend_network'],  # the names (strs) of functions that call print/open/input
+        'extra-imports': ['random', 'collections', 'hashlib', 'heapq', 'sys', 'time',
+                          'networkx', 'instrument'],  # the names (strs) of imported modules
+        'allowed-io': ['read_friend_edges',
+                       '_read_edge_ids'],  # the names (strs) of functions that call print/open/input
         'max-line-length': 120,
     })
@@ -0,0 +1,224 @@
+"""CSC111 Winter 2024 Project 2: Ingesting Ego Networks
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the function responsible for loading a directory of SNAP-style ego
+network edge lists, such as 0.edges, 107.edges and so on, as one merged friend network. Each file
+holds the friendships between the friends of one ego, whose id is the name of the file, with one
+"user1 user2" pair of ids per line.
+
+The files are parsed in parallel by a pool of worker processes, each of which turns a file into
+the list of ids it mentions and an array of friendships between positions in that list. The
+parent then gives every person a global id, in order of the files' names and of first appearance
+within each file, so the merged network is the same whatever the number of workers.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited.
+
+This file is Copyright (c) 2024 CSC111 Friend Network
+"""
+from __future__ import annotations
+import multiprocessing
+import os
+import random
+
+import numpy as np
+
+import data
+import instrument
+from compact import CompactGraph
+
+# The file name suffix of the edge lists in an ego network directory
+EDGES_SUFFIX = '.edges'
+
+
+def load_ego_networks(directory: str, names_file: str, seed: int = 1, workers: int | None = None,
+                      connect_egos: bool = True, shared_ids: bool = True, compact: bool = False) \
+        -> tuple[data.Graph, data.WeightedGraph] | tuple[CompactGraph, CompactGraph]:
+    """Return the unweighted and weighted friend networks merged from every edge list in the
+    given directory, as returned by data.load_friend_network, or by
+    compact.load_compact_network if compact is True.
+
+    If shared_ids is True, the same id in two files is the same person, as in the SNAP datasets.
+    Otherwise the ids of each file are local to it, and every file adds its own people. If
+    connect_egos is True, each file's ego is added as a person and connected to everyone in that
+    file. A friendship listed more than once, in one file or several, is added once.
+
+    Every person is given a distinct random first name from names_file, and every friendship a
+    random closeness weight from 1 to 5, using the given seed. The files are parsed by workers
+    processes, or one per CPU if workers is None. The same directory, names_file and seed always
+    give the same network, whatever the number of workers.
+
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     for name, text in [('1.edges', '2 3\\n3 4\\n'), ('5.edges', '3 2\\n6 7\\n')]:
+    ...         with open(os.path.join(directory, name), 'w') as f:
+    ...             _ = f.write(text)
+    ...     g, wg = load_ego_networks(directory, 'data/first-names.txt', workers=1)
+    ...     cg, cwg = load_ego_networks(directory, 'data/first-names.txt', workers=2, compact=True)
+    >>> (len(g.get_vertices()), sorted(len(g.get_neighbours(v)) for v in g.get_vertices()))
+    (7, [2, 2, 2, 3, 3, 4, 4])
+    >>> list(cg.get_vertices()) == list(g.get_vertices())
+    True
+    >>> all(cwg.get_weight(*edge) == wg.get_weight(*edge) for edge in cwg.conv_networkx().edges)
+    True
+
+    Raise a ValueError if a file has an odd number of ids, or if there are more people than
+    distinct names in names_file.
+
+    Preconditions:
+        - directory contains at least one file ending with EDGES_SUFFIX
+        - names_file is the path to a txt file corresponding to a list of first names
+    """
+    paths = sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(EDGES_SUFFIX))
+
+    with instrument.phase('parse'):
+        parsed = _parse_all(paths, workers)
+
+    with instrument.phase('merge'):
+        # The people of each file, with its ego first, in order of first appearance
+        people = [ids for ids, _ in parsed]
+        if connect_egos:
+            egos = [os.path.basename(path)[:-len(EDGES_SUFFIX)].encode() for path in paths]
+            people = [np.concatenate([np.array([ego]), ids]) for ego, ids in zip(egos, people)]
+        n, global_ids = _global_ids(people, shared_ids)
+
+        chunks = [np.empty((0, 2), dtype=np.int64)]
+        for ids, (_, pairs) in zip(global_ids, parsed):
+            positions = ids[1:] if connect_egos else ids
+            chunks.append(positions[pairs])
+            if connect_egos:
+                chunks.append(np.stack([np.full(len(positions), ids[0]), positions], axis=1))
+
+        sources, targets = _distinct_edges(np.concatenate(chunks), n)
+        names = _random_names(names_file, n, seed)
+        weights = np.random.default_rng(seed).integers(1, 6, len(sources))
+
+    with instrument.phase('build'):
+        if compact:
+            weighted_network = CompactGraph.from_arrays(names, sources, targets, weights, True)
+            return weighted_network.with_weighting(False), weighted_network
+
+        weighted_network = data.WeightedGraph()
+        for name in names:
+            weighted_network.add_vertex(name)
+        for source, target, weight in zip(sources.tolist(), targets.tolist(), weights.tolist()):
+            weighted_network.add_edge(names[source], names[target], weight)
+        return weighted_network.unweighted_view(), weighted_network
+
+
+def _parse_all(paths: list[str], workers: int | None) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Return the result of _parse_edges_file for each of the given files, in order, parsing
+    them in a pool of the given number of worker processes.
+
+    The largest files are handed out first so that the workers finish at about the same time.
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    if workers <= 1 or len(paths) <= 1:
+        return [_parse_edges_file(path) for path in paths]
+
+    by_size = sorted(range(len(paths)), key=lambda k: os.path.getsize(paths[k]), reverse=True)
+    parsed = [None] * len(paths)
+    with multiprocessing.get_context().Pool(min(workers, len(paths))) as pool:
+        for k, result in pool.imap_unordered(_parse_indexed, [(k, paths[k]) for k in by_size]):
+            parsed[k] = result
+    return parsed
+
+
+def _parse_indexed(task: tuple[int, str]) -> tuple[int, tuple[np.ndarray, np.ndarray]]:
+    """Return the position and result of _parse_edges_file for the given (position, path) task."""
+    k, path = task
+    return k, _parse_edges_file(path)
+
+
+def _parse_edges_file(path: str) -> tuple[np.ndarray, np.ndarray]:
+    """Return a bytes array of the distinct ids in the given edges file, in order of first
+    appearance, and an (m, 2) array of the friendships in it as positions in that array.
+
+    Raise a ValueError if the file has an odd number of ids.
+    """
+    with open(path, 'rb') as f:
+        tokens = f.read().split()
+    if len(tokens) % 2 != 0:
+        raise ValueError(f'{path} has an odd number of ids')
+
+    ids, positions = _first_appearances(np.array(tokens, dtype=bytes))
+    return ids, positions.astype(np.int32).reshape(-1, 2)
+
+
+def _first_appearances(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return the distinct values in the given array, in order of first appearance, and the
+    position of each value of the array in them.
+
+    >>> ids, positions = _first_appearances(np.array([b'7', b'3', b'7', b'5']))
+    >>> (ids.tolist(), positions.tolist())
+    ([b'7', b'3', b'5'], [0, 1, 0, 2])
+    """
+    distinct, first, inverse = np.unique(values, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return distinct[order], rank[inverse.ravel()]
+
+
+def _global_ids(people: list[np.ndarray], shared_ids: bool) -> tuple[int, list[np.ndarray]]:
+    """Return the number of distinct people in the given arrays of the distinct ids of each
+    file, and the global id of every one of them, numbered in order of first appearance.
+
+    If shared_ids is False, no two files have a person in common.
+    """
+    sizes = [len(ids) for ids in people]
+    bounds = np.cumsum(sizes)[:-1]
+    if not shared_ids:
+        return sum(sizes), np.split(np.arange(sum(sizes)), bounds)
+
+    everyone, global_ids = _first_appearances(np.concatenate(people))
+    return len(everyone), np.split(global_ids, bounds)
+
+
+def _distinct_edges(edges: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Return the sources and targets of the distinct friendships in the given (m, 2) array of
+    ids below n, without self-loops, with source < target and sorted.
+    """
+    low, high = np.minimum(edges[:, 0], edges[:, 1]), np.maximum(edges[:, 0], edges[:, 1])
+    keys = np.sort(low[low != high] * n + high[low != high])
+    keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])] if len(keys) > 0 else keys
+    return keys // n, keys % n
+
+
+def _random_names(names_file: str, n: int, seed: int) -> list[str]:
+    """Return n distinct first names drawn at random from names_file with the given seed.
+
+    Raise a ValueError if names_file has fewer than n distinct names.
+    """
+    with open(names_file) as f:
+        names = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+    if n > len(names):
+        raise ValueError(f'{n} people but only {len(names)} distinct names in {names_file}')
+
+    return random.Random(seed).sample(names, n)
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['multiprocessing', 'os', 'random', 'numpy', 'data', 'instrument', 'compact'],
+        'allowed-io': ['_parse_edges_file', '_random_names'],
+        'max-line-length': 120,
+    })
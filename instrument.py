@@ -0,0 +1,222 @@
+"""CSC111 Winter 2024 Project 2: Instrumentation
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the instrumentation used to find out why a query or a render is slow.
+While any hook is registered, friend path queries report how many vertices their searches
+expanded, how many edges they scanned, how many queue pushes and pops they made and how long the
+path was, and loading and rendering report the time taken by each of their phases. Each report is
+an event dictionary passed to every hook, for example:
+
+    {'event': 'query', 'name': 'Graph.get_friend_path', 'seconds': 2.1e-05, 'path_length': 3,
+     'expanded': 14, 'edges': 52, 'pushes': 20, 'pops': 14}
+    {'event': 'phase', 'name': 'layout', 'seconds': 0.41}
+
+While no hook is registered, instrumented functions only check STATE.enabled once per call.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited.
+
+This file is Copyright (c) 2024 CSC111 Friend Network
+"""
+from __future__ import annotations
+from typing import Any, Callable, Iterator, TextIO
+import contextlib
+import functools
+import json
+import time
+
+class Instrumentation:
+    """The state of the instrumentation of this process.
+
+    Instance Attributes:
+        - enabled: Whether any hook is registered. Instrumented code checks this before doing any
+            extra work.
+        - hooks: The functions called with every event.
+        - counters: The search counters of the queries currently running, innermost last.
+    """
+    enabled: bool
+    hooks: list[Callable[[dict], Any]]
+    counters: list[dict[str, int]]
+
+    def __init__(self) -> None:
+        """Initialize instrumentation with no hooks, which is disabled."""
+        self.enabled = False
+        self.hooks = []
+        self.counters = []
+
+    def enable(self) -> None:
+        """Make instrumented code report its events."""
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Make instrumented code skip all of its instrumentation."""
+        self.enabled = False
+
+
+# The instrumentation of this process
+STATE = Instrumentation()
+
+
+def add_hook(hook: Callable[[dict], Any]) -> None:
+    """Call the given function with every event from now on."""
+    STATE.hooks.append(hook)
+    STATE.enable()
+
+
+def remove_hook(hook: Callable[[dict], Any]) -> None:
+    """Stop calling the given function with events."""
+    STATE.hooks.remove(hook)
+    if not STATE.hooks:
+        STATE.disable()
+
+
+@contextlib.contextmanager
+def recording(hook: Callable[[dict], Any] | None = None) -> Iterator[list[dict]]:
+    """Register the given hook, or one that collects the events in the list given to the with
+    statement if hook is None, for the body of a with statement.
+
+    >>> import data
+    >>> g = data.Graph()
+    >>> for name in ['a', 'b', 'c']:
+    ...     g.add_vertex(name)
+    >>> g.add_edge('a', 'b')
+    >>> g.add_edge('b', 'c')
+    >>> with recording() as events:
+    ...     path = g.get_friend_path('a', 'c')
+    >>> event = events[0]
+    >>> (event['event'], event['name'], event['path_length'])
+    ('query', 'Graph.get_friend_path', 2)
+    >>> (event['expanded'], event['pushes'])
+    (2, 4)
+    """
+    events = []
+    hook = events.append if hook is None else hook
+    add_hook(hook)
+    try:
+        yield events
+    finally:
+        remove_hook(hook)
+
+
+def emit(event: dict) -> None:
+    """Pass the given event to every hook."""
+    for hook in list(STATE.hooks):
+        hook(event)
+
+
+def count(**counters: int) -> None:
+    """Add the given search counters to the innermost running query, or report them as a search
+    event if no query is running.
+
+    Only call this while STATE.enabled is True.
+    """
+    if STATE.counters:
+        totals = STATE.counters[-1]
+        for name, value in counters.items():
+            totals[name] = totals.get(name, 0) + value
+    else:
+        emit({'event': 'search', **counters})
+
+
+def traced_query(name: str, path: bool = True) -> Callable[[Callable], Callable]:
+    """Return a decorator reporting a query event with the given name for every call to the
+    decorated function, with its time and the counters added by the searches it ran. If path is
+    True, the function returns a path as a list of edges, and its length is reported too.
+    """
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not STATE.enabled:
+                return function(*args, **kwargs)
+
+            STATE.counters.append({})
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                counters = STATE.counters.pop()
+            event = {'event': 'query', 'name': name, 'seconds': seconds}
+            if path:
+                event['path_length'] = len(result)
+            emit({**event, **counters})
+            return result
+        return wrapper
+    return decorator
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Report a phase event with the given name and the time taken by the body of a with
+    statement.
+    """
+    if not STATE.enabled:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        emit({'event': 'phase', 'name': name, 'seconds': time.perf_counter() - start})
+
+
+class JsonLinesSink:
+    """A hook writing every event to a file as one line of JSON, so the events of many runs can
+    be aggregated later.
+
+    Each event is written with the wall-clock time it was received at, under 'time'.
+    """
+    # Private Instance Attributes:
+    #     - _file: The file the events are written to.
+    _file: TextIO
+
+    def __init__(self, path: str) -> None:
+        """Initialize a sink appending to the file at the given path."""
+        self._file = open(path, 'a')
+
+    def __call__(self, event: dict) -> None:
+        """Write the given event."""
+        self._file.write(json.dumps({'time': time.time(), **event}, default=str) + '\n')
+        self._file.flush()
+
+    def close(self) -> None:
+        """Close the file."""
+        self._file.close()
+
+
+def format_event(event: dict) -> str:
+    """Return a one-line human-readable description of the given event.
+
+    >>> format_event({'event': 'phase', 'name': 'layout', 'seconds': 0.25})
+    'layout: 250.000 ms'
+    >>> format_event({'event': 'query', 'name': 'Graph.get_friend_path', 'seconds': 0.001, 'expanded': 3})
+    'Graph.get_friend_path: 1.000 ms (expanded=3)'
+    """
+    details = ', '.join(f'{key}={value}' for key, value in event.items() if key not in {'event', 'name', 'seconds'})
+    text = f'{event.get("name", event["event"])}: {event.get("seconds", 0) * 1000:.3f} ms'
+    return f'{text} ({details})' if details else text
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['contextlib', 'functools', 'json', 'time'],
+        'allowed-io': ['JsonLinesSink.__init__'],
+        'max-line-length': 120,
+    })
@@ -0,0 +1,299 @@
+"""CSC111 Winter 2024 Project 2: Landmark Distance Oracle
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains a landmark (ALT) index for weighted friend networks. A few landmark
+vertices are chosen ahead of time and their distances to every other vertex are stored. By the
+triangle inequality these give lower bounds on the distance between any two people, which guide an
+A* search for friend paths and give distance estimates without any search at all.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited.
+
+This file is Copyright (c) 2024 CSC111 Friend Network
+"""
+from __future__ import annotations
+from array import array
+from typing import Any
+import heapq
+import json
+import math
+import os
+
+import data
+
+# Identifies a file written by LandmarkIndex.save
+LANDMARKS_MAGIC = b'FNLANDMK'
+LANDMARKS_VERSION = 1
+
+
+class LandmarkIndex:
+    """Distances from a set of landmark vertices to every vertex of a weighted graph.
+
+    The index describes the graph as it was when the index was built, so it must be rebuilt after
+    the graph changes.
+
+    Instance Attributes:
+        - landmarks: The items of the landmark vertices.
+
+    Representation Invariants:
+        - len(self.landmarks) == len(self._distances)
+        - all(len(row) == len(self._index) for row in self._distances)
+
+    >>> g = data.WeightedGraph()
+    >>> for name in ['a', 'b', 'c', 'd']:
+    ...     g.add_vertex(name)
+    >>> for edge in [('a', 'b', 1), ('b', 'c', 1), ('c', 'd', 1), ('a', 'd', 5)]:
+    ...     g.add_edge(*edge)
+    >>> index = LandmarkIndex(g, 2)
+    >>> index.get_friend_path('a', 'd')
+    [('a', 'b'), ('b', 'c'), ('c', 'd')]
+    >>> index.distance_bounds('a', 'd')
+    (3.0, 3.0)
+    """
+    landmarks: list
+    # Private Instance Attributes:
+    #     - _graph: The graph this index was built from.
+    #     - _index: Maps each vertex of _graph to its position in the distance rows.
+    #     - _distances: The distance from each landmark to every vertex, or math.inf if the vertex
+    #         cannot be reached from that landmark.
+    _graph: data.WeightedGraph
+    _index: dict[data._WeightedVertex, int]
+    _distances: list[array]
+
+    def __init__(self, graph: data.WeightedGraph, k: int = 8, strategy: str = 'farthest',
+                 landmarks: list | None = None) -> None:
+        """Build a landmark index with k landmarks for the given graph.
+
+        With the 'farthest' strategy, each landmark is the vertex farthest from the landmarks
+        chosen so far (vertices in not yet covered components count as infinitely far). With the
+        'degree' strategy, the k vertices with the most neighbours are used. If landmarks is given,
+        those items are used instead and k and strategy are ignored.
+
+        Preconditions:
+            - k >= 1
+            - strategy in {'farthest', 'degree'}
+            - every edge weight in graph is non-negative
+        """
+        self._graph = graph
+        vertices = graph.get_vertices()
+        self._index = {v: i for i, v in enumerate(vertices.values())}
+        self._distances = []
+        self.landmarks = []
+
+        if landmarks is not None:
+            for item in landmarks:
+                self._add_landmark(vertices[item])
+        elif strategy == 'degree':
+            by_degree = sorted(vertices.values(), key=lambda v: len(v.neighbours), reverse=True)
+            for v in by_degree[:k]:
+                self._add_landmark(v)
+        elif vertices:
+            order = list(vertices.values())
+            # Start from the vertex farthest from an arbitrary one
+            first = _single_source_distances(order[0], self._index)
+            self._add_landmark(order[max(range(len(order)), key=lambda i: (first[i] != math.inf, first[i]))])
+            nearest = array('d', self._distances[0])
+
+            while len(self.landmarks) < min(k, len(order)):
+                i = max(range(len(order)), key=nearest.__getitem__)
+                if nearest[i] == 0:
+                    break
+                self._add_landmark(order[i])
+                nearest = array('d', map(min, nearest, self._distances[-1]))
+
+    def _add_landmark(self, vertex: data._WeightedVertex) -> None:
+        """Add the given vertex as a landmark of this index."""
+        self.landmarks.append(vertex.item)
+        self._distances.append(_single_source_distances(vertex, self._index))
+
+    def distance_bounds(self, start: Any, end: Any) -> tuple[float, float]:
+        """Return a lower and an upper bound on the length of the shortest path from start to end,
+        using only the stored landmark distances.
+
+        The lower bound is math.inf if the landmarks show that there is no path, and the upper
+        bound is math.inf if no landmark lies in the same component as start and end.
+
+        Preconditions:
+            - start and end are vertices in the graph of this index
+        """
+        vertices = self._graph.get_vertices()
+        i, j = self._index[vertices[start]], self._index[vertices[end]]
+        lower, upper = 0.0, math.inf
+
+        for row in self._distances:
+            d_start, d_end = row[i], row[j]
+            if d_start == math.inf and d_end == math.inf:
+                continue
+            elif d_start == math.inf or d_end == math.inf:
+                return math.inf, math.inf
+            lower = max(lower, abs(d_start - d_end))
+            upper = min(upper, d_start + d_end)
+
+        return lower, upper
+
+    def get_friend_path(self, start: Any, end: Any) -> list[tuple[Any, Any]]:
+        """Returns the shortest path of mutuals between 2 people in the graph, found with an A*
+        search guided by the landmark lower bounds
+
+        If there is no path, returns an empty list
+
+        Preconditions:
+            - start and end are vertices in the graph of this index
+        """
+        vertices = self._graph.get_vertices()
+        start_vertex, end_vertex = vertices[start], vertices[end]
+        parents = self._parents_a_star(start_vertex, end_vertex)
+
+        reconstructed_path = self._graph._reconstruct_path(start_vertex, end_vertex, parents)
+        return self._graph.path_to_edges(reconstructed_path)
+
+    def _parents_a_star(self, start: data._WeightedVertex,
+                        end: data._WeightedVertex) -> dict[data._WeightedVertex, data._WeightedVertex]:
+        """Return a dictionary linking each vertex reached by the A* search from start to end back
+        to its parent.
+        """
+        index = self._index
+        targets = [(row, row[index[end]]) for row in self._distances]
+
+        def lower_bound(v: data._WeightedVertex) -> float:
+            """Return a lower bound on the distance from v to end."""
+            bound = 0.0
+            for row, d_end in targets:
+                d_v = row[index[v]]
+                if d_v == math.inf and d_end == math.inf:
+                    continue
+                elif d_v == math.inf or d_end == math.inf:
+                    return math.inf
+                bound = max(bound, abs(d_v - d_end))
+            return bound
+
+        if lower_bound(start) == math.inf:
+            return {}
+
+        distances = {start: 0}
+        settled = set()
+        prev = {}
+        counter = 0
+        heap = [(lower_bound(start), counter, start)]
+
+        while heap:
+            _, _, vertex = heapq.heappop(heap)
+            if vertex in settled:
+                continue
+            settled.add(vertex)
+
+            if vertex == end:
+                return prev
+
+            for neighbour, weight in vertex.neighbours.items():
+                new_distance = distances[vertex] + weight
+                if neighbour not in settled and (neighbour not in distances or new_distance < distances[neighbour]):
+                    prev[neighbour] = vertex
+                    distances[neighbour] = new_distance
+                    counter += 1
+                    heapq.heappush(heap, (new_distance + lower_bound(neighbour), counter, neighbour))
+
+        return prev
+
+    def save(self, path: str) -> None:
+        """Save the landmark distances of this index to the file at the given path.
+        """
+        header = json.dumps({'version': LANDMARKS_VERSION, 'fingerprint': self._graph.fingerprint(),
+                             'vertices': len(self._index), 'landmarks': self.landmarks}).encode()
+
+        with open(path, 'wb') as f:
+            f.write(LANDMARKS_MAGIC)
+            f.write(len(header).to_bytes(4, 'little'))
+            f.write(header)
+            for row in self._distances:
+                row.tofile(f)
+
+    @classmethod
+    def load(cls, graph: data.WeightedGraph, path: str) -> LandmarkIndex:
+        """Return the landmark index saved at the given path for the given graph.
+
+        Raise a ValueError if the file is not a landmark index, or if it was built for a graph with
+        different vertices, edges or weights.
+        """
+        with open(path, 'rb') as f:
+            if f.read(len(LANDMARKS_MAGIC)) != LANDMARKS_MAGIC:
+                raise ValueError
+            header = json.loads(f.read(int.from_bytes(f.read(4), 'little')))
+            if header['version'] != LANDMARKS_VERSION or header['fingerprint'] != graph.fingerprint():
+                raise ValueError
+
+            index = cls.__new__(cls)
+            index._graph = graph
+            index._index = {v: i for i, v in enumerate(graph.get_vertices().values())}
+            index.landmarks = header['landmarks']
+            index._distances = []
+            for _ in index.landmarks:
+                row = array('d')
+                row.fromfile(f, header['vertices'])
+                index._distances.append(row)
+
+        return index
+
+    @classmethod
+    def load_or_build(cls, graph: data.WeightedGraph, path: str, k: int = 8,
+                      strategy: str = 'farthest') -> LandmarkIndex:
+        """Return the landmark index saved at the given path if it matches the given graph, and
+        otherwise build a new one and save it there.
+        """
+        if os.path.exists(path):
+            try:
+                return cls.load(graph, path)
+            except (ValueError, KeyError, EOFError):
+                pass
+
+        index = cls(graph, k, strategy)
+        index.save(path)
+        return index
+
+
+def _single_source_distances(start: data._WeightedVertex, index: dict[data._WeightedVertex, int]) -> array:
+    """Return the distance from start to every vertex in index, in index order, using Dijkstra's
+    algorithm. Vertices that cannot be reached have distance math.inf.
+    """
+    distances = array('d', [math.inf]) * len(index)
+    distances[index[start]] = 0
+    heap = [(0, 0, start)]
+    counter = 0
+
+    while heap:
+        distance, _, vertex = heapq.heappop(heap)
+        if distance > distances[index[vertex]]:
+            continue
+
+        for neighbour, weight in vertex.neighbours.items():
+            new_distance = distance + weight
+            if new_distance < distances[index[neighbour]]:
+                distances[index[neighbour]] = new_distance
+                counter += 1
+                heapq.heappush(heap, (new_distance, counter, neighbour))
+
+    return distances
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['array', 'heapq', 'json', 'math', 'os', 'data'],
+        'allowed-io': ['LandmarkIndex.save', 'LandmarkIndex.load'],
+        'max-line-length': 120,
+    })
@@ -0,0 +1,364 @@
+"""CSC111 Winter 2024 Project 2: Force-Directed Layout
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the force-directed layout used to draw the friend network. Like
+networkx's spring_layout, it runs the Fruchterman-Reingold algorithm: friends attract each other,
+everyone repels everyone else, and the distance each person can move shrinks with every
+iteration. The repulsion between every pair of people is approximated with a Barnes-Hut quadtree,
+so each iteration takes O(n log n) time instead of O(n^2).
+
+The quadtree is built with NumPy by sorting the people by the Morton code of their position, so
+that every cell of every level is a contiguous run of the sorted array. It is then walked one
+level at a time for every pair of nearby cells at once. A layout can be warm-started from earlier
+positions, in which case those people stay where they were and only the new people are moved, in
+a few low-temperature iterations, to fit them in.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited.
+
+This file is Copyright (c) 2024 CSC111 Friend Network
+"""
+from __future__ import annotations
+from typing import Any, Iterable
+
+import networkx as nx
+import numpy as np
+
+import data
+from compact import CompactGraph
+
+# A quadtree cell is treated as a single body at its centre of mass if its width is less than
+# THETA times its distance. Larger values are faster and less accurate.
+THETA = 1.0
+
+# The quadtree is split until no cell holds more than LEAF_SIZE people, or until MAX_DEPTH levels
+LEAF_SIZE = 8
+MAX_DEPTH = 16
+
+# The default numbers of iterations of a new layout and of a warm-started one
+ITERATIONS = 50
+WARM_ITERATIONS = 10
+
+# The largest distance anyone can move in the first iteration, as a fraction of the layout's
+# width, for a new layout and for a warm-started one
+TEMPERATURE = 0.1
+WARM_TEMPERATURE = 0.01
+
+
+def force_layout(graph: data.Graph | CompactGraph | nx.Graph, nodes: Iterable | None = None,
+                 pos: dict[Any, Any] | None = None, iterations: int | None = None, seed: int = 1,
+                 theta: float = THETA) -> dict[Any, np.ndarray]:
+    """Return a force-directed layout of the given nodes of graph (all of them by default) and
+    the edges between them, mapping each node to an array of its x and y coordinates, scaled to
+    fit between -1 and 1 like the result of nx.spring_layout.
+
+    If pos is given, it holds earlier positions of some of the nodes, such as a layout of the graph
+    before a few people were added. Those nodes keep exactly those positions, and the result is
+    left in their frame rather than rescaled. Every other node starts next to its placed neighbours
+    and is moved for WARM_ITERATIONS iterations by default, at a low temperature, so the new nodes
+    are fitted into the layout rather than the layout being redone. Otherwise ITERATIONS iterations
+    are run from random positions chosen with the given seed.
+
+    >>> g = data.Graph()
+    >>> for name in ['a', 'b', 'c', 'd']:
+    ...     g.add_vertex(name)
+    >>> for edge in [('a', 'b'), ('b', 'c'), ('c', 'd')]:
+    ...     g.add_edge(*edge)
+    >>> pos = force_layout(g)
+    >>> sorted(pos)
+    ['a', 'b', 'c', 'd']
+    >>> bool(np.abs(np.array(list(pos.values()))).max() <= 1.0)
+    True
+    >>> distance = lambda u, v: float(np.linalg.norm(pos[u] - pos[v]))
+    >>> distance('a', 'b') < distance('a', 'd')
+    True
+    >>> g.add_vertex('e')
+    >>> g.add_edge('d', 'e')
+    >>> warm = force_layout(g, pos=pos)
+    >>> all(np.array_equal(warm[v], pos[v]) for v in pos)
+    True
+    >>> bool(np.linalg.norm(warm['e'] - warm['d']) < np.linalg.norm(warm['e'] - warm['a']))
+    True
+    """
+    items, edges = _edge_array(graph, nodes)
+    n = len(items)
+    if n == 0:
+        return {}
+    rng = np.random.default_rng(seed)
+    positions, placed = _initial_positions(items, edges, pos, rng)
+    warm = bool(placed.any())
+
+    if iterations is None:
+        iterations = WARM_ITERATIONS if warm else ITERATIONS
+    if n > 1:
+        temperature = WARM_TEMPERATURE if warm else TEMPERATURE
+        start = positions
+        positions = _fruchterman_reingold(positions, edges, iterations, temperature, theta, ~placed if warm else None)
+        # Undo the rounding of scaling the pinned positions to the unit square and back
+        positions[placed] = start[placed]
+
+    if warm:
+        return dict(zip(items, positions))
+
+    # Centre the layout and scale it to fit between -1 and 1
+    positions = positions - positions.mean(axis=0)
+    limit = np.abs(positions).max()
+    if limit > 0:
+        positions /= limit
+    return dict(zip(items, positions))
+
+
+def _edge_array(graph: data.Graph | CompactGraph | nx.Graph, nodes: Iterable | None) -> tuple[list, np.ndarray]:
+    """Return the given nodes of graph (all of them if nodes is None) and an (m, 2) array of the
+    edges between them, as positions in that list, each listed once and sorted so that the layout
+    does not depend on the order of anyone's neighbours.
+    """
+    if isinstance(graph, nx.Graph):
+        items = list(graph.nodes if nodes is None else nodes)
+        neighbours = graph.neighbors
+    else:
+        items = list(graph.get_vertices() if nodes is None else nodes)
+        neighbours = graph.get_neighbours
+
+    index = {item: i for i, item in enumerate(items)}
+    pairs = [(i, index[u]) for i, item in enumerate(items) for u in neighbours(item) if index.get(u, -1) > i]
+    return items, np.unique(np.array(pairs, dtype=np.int64).reshape(-1, 2), axis=0)
+
+
+def _initial_positions(items: list, edges: np.ndarray, pos: dict[Any, Any] | None,
+                       rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    """Return the starting positions of the given items, and which of them were placed from pos.
+
+    Items in pos start there. Every other item starts at the average position of its neighbours
+    in pos, if it has any, and at a random position in the area covered by pos otherwise. Each of
+    them is moved by a small random offset, so that none start at the same place.
+    """
+    n = len(items)
+    placed = np.array([pos is not None and item in pos for item in items], dtype=bool)
+    if not placed.any():
+        return rng.random((n, 2)), placed
+
+    positions = np.zeros((n, 2))
+    positions[placed] = np.array([pos[item] for item, is_placed in zip(items, placed) if is_placed], dtype=float)
+    low, high = positions[placed].min(axis=0), positions[placed].max(axis=0)
+    spread = max(float((high - low).max()), 1e-9)
+
+    # The total position and number of placed neighbours of every item
+    totals = np.zeros((n, 2))
+    counts = np.zeros(n)
+    for u, v in ((edges[:, 0], edges[:, 1]), (edges[:, 1], edges[:, 0])):
+        from_placed = placed[v]
+        np.add.at(totals, u[from_placed], positions[v[from_placed]])
+        counts += np.bincount(u[from_placed], minlength=n)
+
+    new = ~placed
+    near = new & (counts > 0)
+    positions[near] = totals[near] / counts[near, None]
+    far = new & (counts == 0)
+    positions[far] = low + rng.random((int(far.sum()), 2)) * (high - low)
+    positions[new] += (rng.random((int(new.sum()), 2)) - 0.5) * spread / np.sqrt(n)
+    return positions, placed
+
+
+def _fruchterman_reingold(positions: np.ndarray, edges: np.ndarray, iterations: int, temperature: float,
+                          theta: float, movable: np.ndarray | None = None) -> np.ndarray:
+    """Return the given (n, 2) positions after the given number of iterations of the
+    Fruchterman-Reingold algorithm on the given edges, with Barnes-Hut repulsion.
+
+    The forces are computed with the positions scaled to fit in the unit square, where the ideal
+    distance between friends is 1 / sqrt(n). Everyone moves by the force on them, but by no more
+    than the temperature, which starts at the given fraction of the square's width and shrinks to
+    zero over the iterations. If movable is given, only the points where it is True move, though
+    every point still pushes and pulls on the others. The result is scaled back to the frame of
+    the given positions.
+
+    Preconditions:
+        - len(positions) >= 2
+    """
+    n = len(positions)
+    low = positions.min(axis=0)
+    width = float((positions.max(axis=0) - low).max()) or 1.0
+    positions = (positions - low) / width
+    k = 1 / np.sqrt(n)
+    u, v = edges[:, 0], edges[:, 1]
+
+    for i in range(iterations):
+        force = _repulsion(positions, k, theta)
+
+        # Attraction between friends, of magnitude distance ** 2 / k
+        delta = positions[v] - positions[u]
+        pull = delta * (np.sqrt((delta ** 2).sum(axis=1)) / k)[:, None]
+        for axis in range(2):
+            force[:, axis] += np.bincount(u, pull[:, axis], n) - np.bincount(v, pull[:, axis], n)
+
+        length = np.maximum(np.sqrt((force ** 2).sum(axis=1)), 1e-12)
+        step = np.minimum(length, temperature * (1 - i / iterations))
+        if movable is not None:
+            step[~movable] = 0
+        positions += force * (step / length)[:, None]
+
+    return positions * width + low
+
+
+def _repulsion(positions: np.ndarray, k: float, theta: float) -> np.ndarray:
+    """Return the approximate total repulsive force on each of the given positions from all of
+    the others, where the force between two points at distance d has magnitude k ** 2 / d.
+
+    Pairs of quadtree cells are walked down from the root, one level at a time. Once two cells
+    are far enough apart for their width to be less than theta times the distance between their
+    centres of mass, each of them pushes on the other as a single body at its centre of mass. That
+    push is approximated by a linear function of position around the pushed cell's centre of mass,
+    which is later handed down to every point in the cell. Two nearby cells of at most LEAF_SIZE
+    points each push on each other point by point instead. Otherwise every pair of their children
+    is considered on the next level.
+
+    >>> points = np.array([[0.0, 0.0], [1.0, 0.0], [0.0, 2.0]])
+    >>> np.round(_repulsion(points, 1.0, 0.0), 3).tolist()
+    [[-1.0, -0.5], [1.2, -0.4], [-0.2, 0.9]]
+    """
+    n = len(positions)
+    low = positions.min(axis=0)
+    width = float((positions.max(axis=0) - low).max()) or 1.0
+    side = 1 << MAX_DEPTH
+    cells = np.minimum(((positions - low) * (side / width)).astype(np.int64), side - 1)
+    codes = _spread_bits(cells[:, 0]) | (_spread_bits(cells[:, 1]) << 1)
+    order = np.argsort(codes, kind='stable')
+    codes, points = codes[order], positions[order]
+
+    # The Morton code prefix, first point, number of points and centre of mass of every cell of
+    # every level, down to the first level where no cell has more than LEAF_SIZE points
+    levels = []
+    for level in range(MAX_DEPTH + 1):
+        prefixes = codes >> (2 * (MAX_DEPTH - level))
+        starts = np.flatnonzero(np.concatenate([[True], prefixes[1:] != prefixes[:-1]]))
+        sizes = np.diff(np.append(starts, n))
+        centres = np.add.reduceat(points, starts, axis=0) / sizes[:, None]
+        levels.append((prefixes[starts], starts, sizes, centres))
+        if sizes.max() <= LEAF_SIZE:
+            break
+
+    # Every (target cell, source cell) pair still to be considered on the current level. Since
+    # two cells push on each other equally and oppositely, only pairs with target <= source are
+    # kept, and each of those is used both ways.
+    targets, sources = np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64)
+    # The first point, last point + 1 and push coefficients of every cell pushed on as a whole,
+    # and the point and push of every push on a single point
+    cell_firsts, cell_ends, cell_pushes, point_ids, point_pushes = [], [], [], [], []
+    for level, (prefixes, starts, sizes, centres) in enumerate(levels):
+        delta = centres[targets] - centres[sources]
+        distance2 = (delta ** 2).sum(axis=1)
+        cell_width = width / (1 << level)
+        far = (cell_width * cell_width < theta * theta * distance2) & (targets != sources)
+        near = ~far & (((sizes[targets] <= LEAF_SIZE) & (sizes[sources] <= LEAF_SIZE)) | (level == len(levels) - 1))
+
+        # The push on a whole cell from a far cell is approximated around the cell's centre of
+        # mass by a linear function of position, with the coefficients from _push_coefficients
+        for ours, theirs, sign in ((targets[far], sources[far], 1), (sources[far], targets[far], -1)):
+            cell_firsts.append(starts[ours])
+            cell_ends.append(starts[ours] + sizes[ours])
+            cell_pushes.append(_push_coefficients(centres[ours], sign * delta[far], sizes[theirs] * k * k))
+
+        i, j = _expand(starts[targets[near]], starts[sources[near]], sizes[targets[near]], sizes[sources[near]])
+        i, j = i[i < j], j[i < j]
+        point_delta = points[i] - points[j]
+        point_distance2 = (point_delta ** 2).sum(axis=1)
+        apart = point_distance2 > 0
+        push = point_delta[apart] * (k * k / point_distance2[apart])[:, None]
+        point_ids.extend([i[apart], j[apart]])
+        point_pushes.extend([push, -push])
+
+        rest = ~far & ~near
+        if not rest.any():
+            break
+        child_prefixes = levels[level + 1][0] >> 2
+        first = np.searchsorted(child_prefixes, prefixes, 'left')
+        count = np.searchsorted(child_prefixes, prefixes, 'right') - first
+        targets, sources = targets[rest], sources[rest]
+        targets, sources = _expand(first[targets], first[sources], count[targets], count[sources])
+        targets, sources = targets[targets <= sources], sources[targets <= sources]
+
+    # Each cell's coefficients are added at its first point and taken away after its last, so
+    # that a running total of them hands its push down to every point in between
+    cell_pushes = np.concatenate(cell_pushes + [np.zeros((0, 5))])
+    bounds = np.concatenate(cell_firsts + cell_ends + [np.zeros(0, dtype=np.int64)])
+    signed = np.concatenate([cell_pushes, -cell_pushes])
+    c = np.stack([np.cumsum(np.bincount(bounds, signed[:, column], n + 1))[:n] for column in range(5)], axis=1)
+    x, y = points[:, 0], points[:, 1]
+    point_ids = np.concatenate(point_ids + [np.zeros(0, dtype=np.int64)])
+    point_pushes = np.concatenate(point_pushes + [np.zeros((0, 2))])
+
+    force = np.empty((n, 2))
+    force[order, 0] = c[:, 0] + c[:, 2] * x + c[:, 3] * y + np.bincount(point_ids, point_pushes[:, 0], n)
+    force[order, 1] = c[:, 1] + c[:, 3] * x + c[:, 4] * y + np.bincount(point_ids, point_pushes[:, 1], n)
+    return force
+
+
+def _push_coefficients(centres: np.ndarray, delta: np.ndarray, strength: np.ndarray) -> np.ndarray:
+    """Return the coefficients (a, b, xx, xy, yy) of the linear approximation
+    (a + xx * x + xy * y, b + xy * x + yy * y) of the push of magnitude strength / d on the point
+    (x, y) from a body at distance d, around each of the given centres, which are at the given
+    offsets from their bodies.
+
+    >>> coefficients = _push_coefficients(np.array([[1.0, 0.0]]), np.array([[1.0, 0.0]]), np.array([1.0]))
+    >>> a, b, xx, xy, yy = coefficients[0].tolist()
+    >>> (round(a + xx * 1.1, 6), round(b + xy * 1.1, 6))  # Close to the exact push of 1 / 1.1 on (1.1, 0)
+    (0.9, 0.0)
+    """
+    distance2 = (delta ** 2).sum(axis=1)
+    dx, dy = delta[:, 0], delta[:, 1]
+    scale = strength / distance2
+    xx = scale * (1 - 2 * dx * dx / distance2)
+    xy = scale * (-2 * dx * dy / distance2)
+    yy = scale * (1 - 2 * dy * dy / distance2)
+    cx, cy = centres[:, 0], centres[:, 1]
+    return np.stack([scale * dx - xx * cx - xy * cy, scale * dy - xy * cx - yy * cy, xx, xy, yy], axis=1)
+
+
+def _expand(first_targets: np.ndarray, first_sources: np.ndarray, target_counts: np.ndarray,
+            source_counts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return every pair of a target and a source from each of the given runs of consecutive
+    targets and sources, which start at the given firsts and have the given counts.
+
+    >>> i, j = _expand(np.array([0, 5]), np.array([10, 20]), np.array([2, 1]), np.array([2, 3]))
+    >>> list(zip(i.tolist(), j.tolist()))
+    [(0, 10), (0, 11), (1, 10), (1, 11), (5, 20), (5, 21), (5, 22)]
+    """
+    pairs = target_counts * source_counts
+    which = np.repeat(np.arange(len(pairs)), pairs)
+    offsets = np.arange(len(which)) - np.repeat(np.cumsum(pairs) - pairs, pairs)
+    return first_targets[which] + offsets // source_counts[which], first_sources[which] + offsets % source_counts[which]
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    """Return the given integers below 2 ** 16 with a 0 bit inserted above each of their bits.
+
+    >>> _spread_bits(np.array([0b111, 0b1010])).tolist() == [0b10101, 0b1000100]
+    True
+    """
+    values = (values | (values << 8)) & 0x00FF00FF
+    values = (values | (values << 4)) & 0x0F0F0F0F
+    values = (values | (values << 2)) & 0x33333333
+    return (values | (values << 1)) & 0x55555555
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['typing', 'networkx', 'numpy', 'data', 'compact'],
+        'max-line-length': 120,
+    })
@@ -15,53 +15,138 @@ expressly prohibited.
 
 This file is Copyright (c) 2024 CSC111 Friend Network
 """
+import argparse
+import asyncio
+from typing import Collection
+
+import instrument
 from data import load_friend_network
+from service import DEFAULT_HOST, DEFAULT_PORT, FriendNetworkClient, FriendNetworkService
+from snapshot import load_or_build_snapshot
 from visualize import visualize_graph
 
+SNAPSHOT_FILE = 'data/friend-network.snapshot'
+NAMES_FILE = 'data/first-names.txt'
+EDGES_FILE = 'data/edges.txt'
 
-def run() -> None:
-    """Run the program to find the shortest path through mutuals to contact a potential friend"""
 
-    is_weighted = input("\nUse weighted graph? (y/n): ")
+def run(use_snapshot: bool = True) -> None:
+    """Run the program to find the shortest path through mutuals to contact a potential friend
 
-    if is_weighted == "y":
-        is_weighted = True
-    else:
-        is_weighted = False
+    If use_snapshot is True, the network is opened from SNAPSHOT_FILE as a pair of CompactGraphs,
+    which is rebuilt first if the datasets have changed. Otherwise it is loaded from the datasets
+    as a (Graph, WeightedGraph) pair sharing one topology, which can be changed after loading.
+    """
 
     # Loads an unweighted and weighted graph
-    my_graph = load_friend_network('data/first-names.txt', 'data/edges.txt')
+    if use_snapshot:
+        my_graph = load_or_build_snapshot(SNAPSHOT_FILE, NAMES_FILE, EDGES_FILE)
+    else:
+        my_graph = load_friend_network(NAMES_FILE, EDGES_FILE)
     graph_vertices = my_graph[0].get_vertices()
 
-    # User and target should be in the friend network
-    user = input("\nEnter 'help' to see the people in the network. \nEnter your name: ")
-    while user not in graph_vertices:
-        if user == "help":
-            print("People in the Network: ")
-            for name in graph_vertices:
-                print(f'- {name}')
+    choice_to_continue = "y"
+    while choice_to_continue == "y":
+        is_weighted = input("\nUse weighted graph? (y/n): ") == "y"
+
+        # User and target should be in the friend network
+        user = ask_person("Enter your name: ", "User not found!", graph_vertices)
+        target = ask_person("Enter target friend: ", "Target not found!", graph_vertices)
+
+        visualize_graph(my_graph, user, target, is_weighted)
+
+        choice_to_continue = input("\nDo you wish to find the path with another user? (y/n): ")
+
+    exit("Thank you for using Friend Network!")
+
+
+def run_client(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+    """Run the program against a running friend network service, printing each path instead of
+    plotting it.
+    """
+    client = FriendNetworkClient(host, port)
+    people = set(client.get_people())
+
+    choice_to_continue = "y"
+    while choice_to_continue == "y":
+        is_weighted = input("\nUse weighted graph? (y/n): ") == "y"
+
+        user = ask_person("Enter your name: ", "User not found!", people)
+        target = ask_person("Enter target friend: ", "Target not found!", people)
+
+        path = client.get_friend_path(user, target, is_weighted)
+        if path:
+            print("\nPath to Target: " + ', '.join([path[0][0]] + [edge[1] for edge in path]))
         else:
-            print("User not found!")
-        user = input("Enter your name: ")
+            print("\nThere is no path to the target.")
+
+        choice_to_continue = input("\nDo you wish to find the path with another user? (y/n): ")
+
+    client.close()
+    exit("Thank you for using Friend Network!")
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: int | None = None) -> None:
+    """Load the friend network once and answer queries from clients until interrupted."""
+    my_graph = load_or_build_snapshot(SNAPSHOT_FILE, NAMES_FILE, EDGES_FILE)
+    print(f"Serving Friend Network on {host}:{port} (Ctrl+C to stop)")
+
+    try:
+        asyncio.run(FriendNetworkService(my_graph, workers).serve(host, port))
+    except KeyboardInterrupt:
+        print("Friend Network service stopped.")
+
 
-    target = input("\nEnter 'help' to see the people in the network. \nEnter target friend: ")
-    while target not in graph_vertices:
-        if target == "help":
+def start_profiling(events_file: str | None = None) -> instrument.JsonLinesSink | None:
+    """Print every instrumentation event from now on, and also append them to events_file as
+    JSON lines if it is given. Return the JSON-lines sink, if any, so it can be closed.
+    """
+    instrument.add_hook(lambda event: print(f'[profile] {instrument.format_event(event)}'))
+    if events_file is None:
+        return None
+
+    sink = instrument.JsonLinesSink(events_file)
+    instrument.add_hook(sink)
+    return sink
+
+
+def ask_person(prompt: str, not_found: str, people: Collection[str]) -> str:
+    """Ask for a person in the network until one is given, listing everyone when asked for 'help'.
+    """
+    person = input("\nEnter 'help' to see the people in the network. \n" + prompt)
+    while person not in people:
+        if person == "help":
             print("People in the Network: ")
-            for name in graph_vertices:
+            for name in people:
                 print(f'- {name}')
         else:
-            print("Target not found!")
-        target = input("Enter target friend: ")
+            print(not_found)
+        person = input(prompt)
 
-    visualize_graph(my_graph, user, target, is_weighted)
-
-    choice_to_continue = input("\nDo you wish to find the path with another user? (y/n): ")
-    if choice_to_continue == "y":
-        run()
-    else:
-        exit("Thank you for using Friend Network!")
+    return person
 
 
 if __name__ == '__main__':
-    run()
+    parser = argparse.ArgumentParser(description="Find the shortest path through mutuals to a potential friend.")
+    parser.add_argument('--serve', action='store_true', help="run a long-lived query service")
+    parser.add_argument('--connect', action='store_true', help="query a running service instead of loading")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help="load the network from the datasets instead of from the snapshot file")
+    parser.add_argument('--workers', type=int, default=None, help="search processes used by --serve")
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='FILE',
+                        help="print the counters and phase timings of every query, and append them to FILE as JSON")
+    args = parser.parse_args()
+
+    profile_sink = start_profiling(args.profile or None) if args.profile is not None else None
+    try:
+        if args.serve:
+            serve(args.host, args.port, args.workers)
+        elif args.connect:
+            run_client(args.host, args.port)
+        else:
+            run(not args.no_snapshot)
+    finally:
+        if profile_sink is not None:
+            profile_sink.close()
@@ -0,0 +1,163 @@
+"""CSC111 Winter 2024 Project 2: Degrees of Separation
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the functions responsible for finding how many people are within a
+few degrees of separation of many people at once. Up to 64 breadth-first searches are run together
+per 64-bit word: each vertex keeps one bit per search, and one NumPy pass over the compact (CSR)
+adjacency advances every search by a level.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited.
+
+This file is Copyright (c) 2024 CSC111 Friend Network
+"""
+from __future__ import annotations
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+import data
+from compact import CompactGraph
+
+# The number of 64-bit words of searches run together, so 64 * BATCH_WORDS searches per batch
+BATCH_WORDS = 4
+
+# _BYTE_BITS[b, k] is bit k of the byte b, used to count the bits of many bytes at once
+_BYTE_BITS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1, bitorder='little').astype(np.int64)
+
+
+def reach_counts(graph: data.Graph | CompactGraph, sources: Iterable, max_hops: int,
+                 batch_words: int = BATCH_WORDS) -> dict[Any, list[int]]:
+    """Return a dictionary mapping each person in sources to the number of people exactly 0, 1,
+    ..., max_hops hops away from them.
+
+    The number of people within k hops of a source is the sum of the first k + 1 counts. Weights
+    are ignored: hops are counted in edges.
+
+    >>> g = data.Graph()
+    >>> for name in ['a', 'b', 'c', 'd', 'e']:
+    ...     g.add_vertex(name)
+    >>> for edge in [('a', 'b'), ('b', 'c'), ('b', 'd'), ('d', 'e')]:
+    ...     g.add_edge(*edge)
+    >>> reach_counts(g, ['a', 'e'], 2)
+    {'a': [1, 1, 2], 'e': [1, 1, 1]}
+
+    Preconditions:
+        - every person in sources is a vertex in graph
+        - max_hops >= 0
+        - batch_words >= 1
+    """
+    counts = {}
+    for batch, levels in _reach_levels(graph, sources, max_hops, batch_words):
+        rows = [_bit_counts(level) for level in levels]
+        for i, source in enumerate(batch):
+            counts[source] = [int(row[i]) for row in rows]
+    return counts
+
+
+def reach_members(graph: data.Graph | CompactGraph, sources: Iterable, max_hops: int,
+                  batch_words: int = BATCH_WORDS) -> dict[Any, list[set]]:
+    """Return a dictionary mapping each person in sources to the sets of people exactly 0, 1,
+    ..., max_hops hops away from them.
+
+    >>> g = data.Graph()
+    >>> for name in ['a', 'b', 'c']:
+    ...     g.add_vertex(name)
+    >>> g.add_edge('a', 'b')
+    >>> g.add_edge('b', 'c')
+    >>> reach_members(g, ['a'], 2) == {'a': [{'a'}, {'b'}, {'c'}]}
+    True
+
+    Preconditions:
+        - every person in sources is a vertex in graph
+        - max_hops >= 0
+        - batch_words >= 1
+    """
+    compact = graph if isinstance(graph, CompactGraph) else CompactGraph.from_graph(graph)
+    members = {}
+    for batch, levels in _reach_levels(compact, sources, max_hops, batch_words):
+        for source in batch:
+            members[source] = []
+        for level in levels:
+            for i, source in enumerate(batch):
+                reached = np.flatnonzero(level[:, i // 64] & np.uint64(1 << (i % 64)))
+                members[source].append({compact.get_item(v) for v in reached.tolist()})
+    return members
+
+
+def _bit_counts(level: np.ndarray) -> np.ndarray:
+    """Return how many rows of the given (n, words) array of uint64 have each bit set, where entry
+    64 * w + k counts bit k of word w.
+
+    Each byte column is tallied into 256 bins and the tallies are turned into bit counts with
+    _BYTE_BITS, so nothing larger than one column is built.
+
+    >>> _bit_counts(np.array([[5], [4]], dtype='<u8'))[:4].tolist()
+    [1, 0, 2, 0]
+    """
+    columns = level.view(np.uint8)
+    return np.concatenate([np.bincount(columns[:, c], minlength=256) @ _BYTE_BITS
+                           for c in range(columns.shape[1])])
+
+
+def _reach_levels(graph: data.Graph | CompactGraph, sources: Iterable, max_hops: int,
+                  batch_words: int) -> Iterator[tuple[list, list[np.ndarray]]]:
+    """Yield (batch, levels) for each batch of up to 64 * batch_words distinct sources, where
+    levels[h] is an (n, batch_words) array of uint64 whose bit i of vertex v is set exactly when v
+    is h hops away from batch[i].
+    """
+    if not isinstance(graph, CompactGraph):
+        graph = CompactGraph.from_graph(graph)
+
+    offsets = np.frombuffer(graph._offsets, dtype=np.int64)
+    neighbours = np.frombuffer(graph._neighbours, dtype=np.int32)
+    n = graph.num_vertices()
+    # Rows with at least one neighbour, and where each of them starts, for the reduceat below
+    has_neighbours = np.flatnonzero(np.diff(offsets) > 0)
+    row_starts = offsets[:-1][has_neighbours]
+
+    ids = graph.get_vertices()
+    unique_sources = list(dict.fromkeys(sources))
+    batch_size = 64 * batch_words
+
+    for first in range(0, len(unique_sources), batch_size):
+        batch = unique_sources[first:first + batch_size]
+        words = (len(batch) + 63) // 64
+        frontier = np.zeros((n, words), dtype='<u8')
+        for i, source in enumerate(batch):
+            frontier[ids[source], i // 64] |= np.uint64(1 << (i % 64))
+        visited = frontier.copy()
+        levels = [frontier]
+
+        for _ in range(max_hops):
+            reached = np.zeros_like(frontier)
+            if len(neighbours) > 0:
+                reached[has_neighbours] = np.bitwise_or.reduceat(frontier[neighbours], row_starts, axis=0)
+            frontier = reached & ~visited
+            visited |= frontier
+            levels.append(frontier)
+
+        yield batch, levels
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['numpy', 'data', 'compact'],
+        'max-line-length': 120,
+    })
@@ -0,0 +1,187 @@
+"""CSC111 Winter 2024 Project 2: Friend Recommendations
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the function responsible for suggesting new friends for every person
+in the network at once. The mutual-friend counts of all pairs of people are the entries of A·A,
+where A is the adjacency matrix of the network, and they are computed with NumPy a block of rows
+at a time over the compact (CSR) form of the network.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited.
+
+This file is Copyright (c) 2024 CSC111 Friend Network
+"""
+from __future__ import annotations
+from typing import Any, Collection, Iterator
+
+import numpy as np
+
+import data
+from compact import CompactGraph
+
+# The largest number of two-hop (person, mutual friend, candidate) paths handled in one block
+MAX_BLOCK_WORK = 1 << 22
+
+
+def suggest_all(graph: data.Graph | CompactGraph, k: int = 10, exclude: Collection = (),
+                max_mutual_degree: int | None = None,
+                max_block_work: int = MAX_BLOCK_WORK) -> Iterator[tuple[Any, list[tuple[Any, int]]]]:
+    """Yield (person, suggestions) for every person in graph who is not in exclude, where
+    suggestions is the same list graph.suggest_friends(person, k, exclude, max_mutual_degree)
+    would return.
+
+    The rows of A·A are computed in blocks of consecutive people, each covering at most
+    max_block_work two-hop paths (or a single person with more than that), so memory stays bounded
+    however large the network is. Scores are weighted by closeness if graph is weighted.
+
+    >>> g = data.Graph()
+    >>> for name in ['a', 'b', 'c', 'd', 'e']:
+    ...     g.add_vertex(name)
+    >>> for edge in [('a', 'b'), ('a', 'c'), ('b', 'd'), ('c', 'd'), ('c', 'e')]:
+    ...     g.add_edge(*edge)
+    >>> dict(suggest_all(g, 2))['a']
+    [('d', 2), ('e', 1)]
+    >>> dict(suggest_all(g, 2, exclude={'c'}))['a']
+    [('d', 1)]
+    """
+    if not isinstance(graph, CompactGraph):
+        graph = CompactGraph.from_graph(graph)
+
+    n = graph.num_vertices()
+    original_degrees = np.diff(np.frombuffer(graph._offsets, dtype=np.int64))
+    if max_mutual_degree is None:
+        mutual_ok = np.ones(n, dtype=bool)
+    else:
+        mutual_ok = original_degrees <= max_mutual_degree
+    offsets, neighbours, weights = _without(graph, exclude)
+    if not graph.weighted:
+        weights = np.ones_like(weights)
+    degrees = np.diff(offsets)
+
+    # Ties are broken by name, just like Graph.suggest_friends
+    names = np.array([str(graph.get_item(v)) for v in range(n)], dtype=object)
+    name_rank = np.empty(n, dtype=np.int64)
+    name_rank[np.argsort(names, kind='stable')] = np.arange(n)
+
+    # The number of two-hop paths from each person, used to split the rows into blocks
+    work = np.zeros(n, dtype=np.int64)
+    has_friends = degrees > 0
+    if len(neighbours):
+        work[has_friends] = np.add.reduceat(degrees[neighbours] * mutual_ok[neighbours], offsets[:-1][has_friends])
+    block_ends = _block_ends(work, max_block_work)
+
+    excluded = {graph.get_vertices()[item] for item in exclude if item in graph.get_vertices()}
+    start = 0
+    for end in block_ends:
+        suggestions = _suggest_block(start, end, offsets, neighbours, weights, mutual_ok, name_rank, k)
+        for v in range(start, end):
+            if v not in excluded:
+                yield graph.get_item(v), [(graph.get_item(u), score) for u, score in suggestions.get(v, [])]
+        start = end
+
+
+def _without(graph: CompactGraph, exclude: Collection) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the offsets, neighbours and weights of graph as NumPy arrays, without any edge to or
+    from a person in exclude.
+    """
+    offsets = np.frombuffer(graph._offsets, dtype=np.int64)
+    neighbours = np.frombuffer(graph._neighbours, dtype=np.int32)
+    weights = np.frombuffer(graph._weights, dtype=np.int32)
+
+    ids = [graph.get_vertices()[item] for item in exclude if item in graph.get_vertices()]
+    if not ids:
+        return offsets, neighbours, weights
+
+    excluded = np.zeros(graph.num_vertices(), dtype=bool)
+    excluded[ids] = True
+    rows = np.repeat(np.arange(graph.num_vertices()), np.diff(offsets))
+    keep = ~excluded[rows] & ~excluded[neighbours]
+
+    new_offsets = np.zeros_like(offsets)
+    np.cumsum(np.bincount(rows[keep], minlength=graph.num_vertices()), out=new_offsets[1:])
+    return new_offsets, neighbours[keep], weights[keep]
+
+
+def _block_ends(work: np.ndarray, max_block_work: int) -> list[int]:
+    """Return the (exclusive) ends of consecutive blocks of rows whose total work is at most
+    max_block_work, except for blocks made of a single row.
+    """
+    ends = []
+    total = 0
+    for v, amount in enumerate(work.tolist()):
+        if total + amount > max_block_work and total > 0:
+            ends.append(v)
+            total = 0
+        total += amount
+    ends.append(len(work))
+    return ends
+
+
+def _suggest_block(start: int, end: int, offsets: np.ndarray, neighbours: np.ndarray, weights: np.ndarray,
+                   mutual_ok: np.ndarray, name_rank: np.ndarray, k: int) -> dict[int, list[tuple[int, int]]]:
+    """Return the top k suggestions (candidate id, score) of every person in start <= v < end
+    who has any, computed from rows start to end of A·A, counting only the mutual friends u with
+    mutual_ok[u].
+    """
+    n = len(offsets) - 1
+    first, last = offsets[start], offsets[end]
+    if first == last or k <= 0:
+        return {}
+
+    # One entry for every (person, mutual friend) pair in the block
+    rows = np.repeat(np.arange(start, end), np.diff(offsets[start:end + 1]))
+    mutuals = neighbours[first:last].astype(np.int64)
+    closeness = weights[first:last].astype(np.int64)
+    friends = rows * n + mutuals
+
+    # Expand each mutual friend's row: one entry for every (person, mutual, candidate) path
+    lengths = (offsets[mutuals + 1] - offsets[mutuals]) * mutual_ok[mutuals]
+    total = int(lengths.sum())
+    if total == 0:
+        return {}
+    row_starts = np.repeat(offsets[mutuals] - (np.cumsum(lengths) - lengths), lengths)
+    positions = row_starts + np.arange(total)
+    path_rows = np.repeat(rows, lengths)
+    candidates = neighbours[positions].astype(np.int64)
+    scores = np.repeat(closeness, lengths) * weights[positions]
+
+    # Sum the scores of each (person, candidate) pair, then drop people's friends and themselves
+    keys, inverse = np.unique(path_rows * n + candidates, return_inverse=True)
+    totals = np.bincount(inverse.reshape(-1), weights=scores).astype(np.int64)
+    keep = ~np.isin(keys, friends) & (keys // n != keys % n)
+    keys, totals = keys[keep], totals[keep]
+    pair_rows, pair_candidates = keys // n, keys % n
+
+    # Sort by person, then decreasing score, then name, and keep the first k of each person
+    order = np.lexsort((name_rank[pair_candidates], -totals, pair_rows))
+    pair_rows, pair_candidates, totals = pair_rows[order], pair_candidates[order], totals[order]
+    row_firsts = np.searchsorted(pair_rows, pair_rows, side='left')
+    top = np.arange(len(pair_rows)) - row_firsts < k
+
+    suggestions = {}
+    for v, u, score in zip(pair_rows[top].tolist(), pair_candidates[top].tolist(), totals[top].tolist()):
+        suggestions.setdefault(v, []).append((u, score))
+    return suggestions
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['numpy', 'data', 'compact'],
+        'max-line-length': 120,
+    })
@@ -0,0 +1,269 @@
+"""CSC111 Winter 2024 Project 2: Friend Network Query Service
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains a long-lived query service for the friend network, and a client for
+it. The service loads the network once and then answers path, neighbour and listing queries from
+any number of clients over a local TCP socket. Each request and response is one line of JSON.
+
+Requests look like:
+    {"op": "path", "start": "raven", "end": "ota", "weighted": false}
+    {"op": "neighbours", "user": "raven"}
+    {"op": "people"}
+
+and responses are {"ok": true, "result": ...} or {"ok": false, "error": "..."}.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited.
+
+This file is Copyright (c) 2024 CSC111 Friend Network
+"""
+from __future__ import annotations
+from concurrent.futures import BrokenExecutor, Executor
+from typing import Any
+import asyncio
+import json
+import multiprocessing
+import socket
+
+import worker_pool
+from compact import CompactGraph
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8111
+
+# The longest request line accepted, in bytes. A longer request is answered with an error and its
+# connection is closed.
+MAX_REQUEST_BYTES = 2 ** 16
+
+
+class FriendNetworkService:
+    """A query service answering requests about a loaded friend network.
+
+    Path searches run in a pool of worker processes, so one slow search does not hold up the
+    other clients. Neighbour and listing queries are cheap and are answered directly.
+
+    >>> import data
+    >>> wg = data.WeightedGraph()
+    >>> for name in ['a', 'b', 'c']:
+    ...     wg.add_vertex(name)
+    >>> wg.add_edge('a', 'b', 1)
+    >>> wg.add_edge('b', 'c', 2)
+    >>> service = FriendNetworkService((CompactGraph.from_graph(wg.unweighted_view()), CompactGraph.from_graph(wg)),
+    ...                                workers=0)
+    >>> with socket.socket() as probe:
+    ...     probe.bind((DEFAULT_HOST, 0))
+    ...     port = probe.getsockname()[1]
+    >>> async def round_trip() -> list:
+    ...     ready = asyncio.Event()
+    ...     server = asyncio.create_task(service.serve(DEFAULT_HOST, port, ready))
+    ...     await ready.wait()
+    ...     client = await asyncio.to_thread(FriendNetworkClient, DEFAULT_HOST, port)
+    ...     results = [await asyncio.to_thread(client.get_friend_path, 'a', 'c', True)]
+    ...     for request in [[1], {'op': 'path', 'start': 'a', 'end': 'zed'}]:
+    ...         try:
+    ...             await asyncio.to_thread(client.request, request)
+    ...         except ValueError as error:
+    ...             results.append(str(error))
+    ...     results.append(await asyncio.to_thread(client.get_neighbours, 'b'))
+    ...     try:
+    ...         await asyncio.to_thread(client.request, {'op': 'x' * MAX_REQUEST_BYTES})
+    ...     except ValueError as error:
+    ...         results.append(str(error))
+    ...     client.close()
+    ...     server.cancel()
+    ...     return results
+    >>> for result in asyncio.run(round_trip()):
+    ...     print(result)
+    [('a', 'b'), ('b', 'c')]
+    ValueError: a request must be a JSON object
+    ValueError: 'zed' is not in the network
+    ['a', 'c']
+    ValueError: a request must be at most 65536 bytes long
+
+    Instance Attributes:
+        - graphs: The unweighted and weighted friend networks being served.
+        - workers: The number of worker processes used for path searches, or 0 to search in a
+            thread of this process instead.
+    """
+    graphs: tuple[CompactGraph, CompactGraph]
+    workers: int
+    # Private Instance Attributes:
+    #     - _executor: The pool running path searches, or None to use a thread of this process.
+    _executor: Executor | None
+
+    def __init__(self, graphs: tuple[CompactGraph, CompactGraph], workers: int | None = None) -> None:
+        """Initialize a service for the given networks with the given number of worker processes,
+        or one per CPU if workers is None.
+        """
+        self.graphs = graphs
+        self.workers = multiprocessing.cpu_count() if workers is None else workers
+        self._executor = None
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    ready: asyncio.Event | None = None) -> None:
+        """Answer requests on the given host and port until cancelled, and set ready once the
+        service is listening.
+        """
+        if self.workers > 0:
+            self._executor = worker_pool.start_executor(self.workers, self.graphs)
+
+        try:
+            server = await asyncio.start_server(self._handle_client, host, port, limit=MAX_REQUEST_BYTES)
+            async with server:
+                if ready is not None:
+                    ready.set()
+                await server.serve_forever()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer every request sent on one client connection, in order, until it is closed or a
+        request is longer than MAX_REQUEST_BYTES.
+        """
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    error = f'ValueError: a request must be at most {MAX_REQUEST_BYTES} bytes long'
+                    writer.write(json.dumps({'ok': False, 'error': error}).encode() + b'\n')
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+
+                try:
+                    response = {'ok': True, 'result': await self.answer(json.loads(line))}
+                except (ValueError, KeyError, TypeError, BrokenExecutor) as error:
+                    response = {'ok': False, 'error': f'{type(error).__name__}: {error}'}
+
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def answer(self, request: dict) -> Any:
+        """Return the result of the given request.
+
+        Raise a ValueError if the request is not valid, or names a person who is not in the
+        network. Raise a BrokenExecutor if a worker process died during a path search; the pool
+        is then replaced, so later searches can still be answered.
+        """
+        if not isinstance(request, dict):
+            raise ValueError('a request must be a JSON object')
+
+        op = request.get('op')
+        unweighted_network = self.graphs[0]
+
+        if op == 'people':
+            return list(unweighted_network.get_vertices())
+        elif op == 'neighbours':
+            return sorted(unweighted_network.get_neighbours(request['user']))
+        elif op == 'path':
+            start, end, weighted = request['start'], request['end'], bool(request.get('weighted', False))
+            for person in (start, end):
+                if person not in unweighted_network.get_vertices():
+                    raise ValueError(f'{person!r} is not in the network')
+
+            if self._executor is None:
+                return await asyncio.to_thread(_find_path, self.graphs, start, end, weighted)
+            else:
+                executor = self._executor
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(executor, _find_path, None, start, end,
+                                                                            weighted)
+                except BrokenExecutor:
+                    if self._executor is executor:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        self._executor = worker_pool.start_executor(self.workers, self.graphs)
+                    raise
+        else:
+            raise ValueError(f'unknown op {op!r}')
+
+
+class FriendNetworkClient:
+    """A client of a FriendNetworkService, which keeps a single connection open for all of its
+    requests.
+
+    Raise a ConnectionError from any request if the service could not be reached or closed the
+    connection, and a ValueError if the service rejected the request.
+    """
+    # Private Instance Attributes:
+    #     - _socket: The connection to the service.
+    #     - _file: A buffered file over _socket, used to read whole response lines.
+    _socket: socket.socket
+    _file: Any
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        """Connect to the service at the given host and port."""
+        self._socket = socket.create_connection((host, port))
+        self._file = self._socket.makefile('rwb')
+
+    def close(self) -> None:
+        """Close the connection to the service."""
+        self._file.close()
+        self._socket.close()
+
+    def request(self, request: dict) -> Any:
+        """Send the given request to the service and return its result.
+        """
+        self._file.write(json.dumps(request).encode() + b'\n')
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError('the friend network service closed the connection')
+
+        response = json.loads(line)
+        if not response['ok']:
+            raise ValueError(response['error'])
+        return response['result']
+
+    def get_friend_path(self, start: str, end: str, weighted: bool = False) -> list[tuple[str, str]]:
+        """Return the shortest path of mutuals from start to end as a list of edges."""
+        return [tuple(edge) for edge in self.request({'op': 'path', 'start': start, 'end': end,
+                                                      'weighted': weighted})]
+
+    def get_neighbours(self, user: str) -> list[str]:
+        """Return the neighbours of the given user, in sorted order."""
+        return self.request({'op': 'neighbours', 'user': user})
+
+    def get_people(self) -> list[str]:
+        """Return every person in the network."""
+        return self.request({'op': 'people'})
+
+
+def _find_path(graphs: tuple[CompactGraph, CompactGraph] | None, start: str, end: str,
+               weighted: bool) -> list[tuple[str, str]]:
+    """Return the shortest path from start to end in the given networks, or in this worker's
+    networks if graphs is None.
+    """
+    graphs = worker_pool.worker_shared() if graphs is None else graphs
+    return graphs[1 if weighted else 0].get_friend_path(start, end)
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['concurrent.futures', 'asyncio', 'json', 'multiprocessing', 'socket', 'worker_pool',
+                          'compact'],
+        'max-line-length': 120,
+    })
@@ -0,0 +1,200 @@
+"""CSC111 Winter 2024 Project 2: Friend Network Snapshots
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the functions responsible for saving a loaded friend network to a
+binary snapshot file and opening it again without reparsing the datasets. Snapshots are memory
+mapped, so the adjacency and weight buffers are read straight from the file.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited.
+
+This file is Copyright (c) 2024 CSC111 Friend Network
+"""
+from __future__ import annotations
+import json
+import mmap
+import os
+import zlib
+
+import instrument
+from compact import CompactGraph, load_compact_network
+
+# Identifies a snapshot file, followed by the format version
+SNAPSHOT_MAGIC = b'FNSNAP\x00\x00'
+SNAPSHOT_VERSION = 1
+
+# The alignment of the start of every buffer in the file, so they can be used in place
+_ALIGNMENT = 8
+
+
+def save_snapshot(path: str, graphs: tuple[CompactGraph, CompactGraph], names_file: str, edges_file: str,
+                  seed: int = 1) -> None:
+    """Save the given unweighted and weighted friend networks, loaded from the given datasets with
+    the given seed, to a snapshot file at path.
+
+    Both networks have the same people and friendships, so the name table and adjacency are stored
+    once, along with the closeness weights. The size and modification time of the datasets are
+    recorded so that a stale snapshot can be detected.
+
+    File layout (all integers little-endian):
+        - SNAPSHOT_MAGIC, then the version and the header length as 4-byte unsigned integers
+        - a JSON header, padded with spaces to a multiple of 8 bytes
+        - the body: the int64 offsets, int32 neighbours and int32 weights of the CSR adjacency,
+          each padded to a multiple of 8 bytes, then the names, one per line in UTF-8
+
+    Preconditions:
+        - graphs[0] and graphs[1] share the same buffers, as returned by load_compact_network
+    """
+    weighted = graphs[1]
+    offsets, neighbours, weights = weighted._offsets, weighted._neighbours, weighted._weights
+    names = '\n'.join(weighted._names).encode()
+
+    buffers = [bytes(offsets), bytes(neighbours), bytes(weights), names]
+    body = b''.join(buffer + b'\x00' * (-len(buffer) % _ALIGNMENT) for buffer in buffers)
+
+    header = {
+        'seed': seed,
+        'sources': [_source_stamp(names_file), _source_stamp(edges_file)],
+        'num_vertices': len(offsets) - 1,
+        'num_entries': len(neighbours),
+        'names_length': len(names),
+        'checksum': zlib.crc32(body),
+    }
+    header_bytes = json.dumps(header).encode()
+    header_bytes += b' ' * (-(len(SNAPSHOT_MAGIC) + 8 + len(header_bytes)) % _ALIGNMENT)
+
+    # Write to a temporary file first so a crash never leaves a half-written snapshot behind
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(SNAPSHOT_VERSION.to_bytes(4, 'little'))
+        f.write(len(header_bytes).to_bytes(4, 'little'))
+        f.write(header_bytes)
+        f.write(body)
+    os.replace(temp_path, path)
+
+
+def load_snapshot(path: str, names_file: str | None = None, edges_file: str | None = None, seed: int = 1,
+                  verify: bool = True) -> tuple[CompactGraph, CompactGraph]:
+    """Return the unweighted and weighted friend networks saved in the snapshot file at path.
+
+    The file is memory mapped and the adjacency and weight buffers of the returned graphs are views
+    of it, so only the name table is copied. If verify is True, the checksum of the body is
+    checked, which reads the whole file once.
+
+    Raise a ValueError if the file is not a snapshot of this version, if its checksum does not
+    match, or if names_file and edges_file are given and the snapshot was not made from their
+    current contents with the given seed.
+    """
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(mapped)
+    start = len(SNAPSHOT_MAGIC) + 8
+    if bytes(view[:len(SNAPSHOT_MAGIC)]) != SNAPSHOT_MAGIC or len(view) < start or \
+            int.from_bytes(view[start - 8:start - 4], 'little') != SNAPSHOT_VERSION:
+        raise ValueError(f'{path} is not a friend network snapshot (version {SNAPSHOT_VERSION})')
+
+    header_length = int.from_bytes(view[start - 4:start], 'little')
+    header = json.loads(bytes(view[start:start + header_length]))
+    body = view[start + header_length:]
+
+    if verify and zlib.crc32(body) != header['checksum']:
+        raise ValueError(f'{path} is corrupt: its checksum does not match')
+    if names_file is not None and edges_file is not None and \
+            (header['seed'] != seed or header['sources'] != [_source_stamp(names_file), _source_stamp(edges_file)]):
+        raise ValueError(f'{path} is stale: {names_file} or {edges_file} has changed since it was saved')
+
+    n, m = header['num_vertices'], header['num_entries']
+    offsets, position = _take(body, 0, 8 * (n + 1), 'q')
+    neighbours, position = _take(body, position, 4 * m, 'i')
+    weights, position = _take(body, position, 4 * m, 'i')
+    names = str(body[position:position + header['names_length']], 'utf-8').split('\n') if n > 0 else []
+
+    weighted_network = CompactGraph(names, offsets, neighbours, weights, weighted=True)
+    return weighted_network.with_weighting(False), weighted_network
+
+
+def load_or_build_snapshot(path: str, names_file: str, edges_file: str,
+                           seed: int = 1) -> tuple[CompactGraph, CompactGraph]:
+    """Return the unweighted and weighted friend networks for the given datasets, opening the
+    snapshot at path if it is up to date.
+
+    If the snapshot is missing, stale or corrupt, the networks are rebuilt from the datasets and the
+    snapshot is rewritten.
+
+    >>> import tempfile
+    >>> datasets = ('data/first-names.txt', 'data/edges.txt')
+    >>> built = load_compact_network(*datasets)
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     path = os.path.join(directory, 'network.snapshot')
+    ...     first = load_or_build_snapshot(path, *datasets)
+    ...     with open(path, 'r+b') as f:
+    ...         _ = f.seek(-1, os.SEEK_END)
+    ...         _ = f.write(b'?')
+    ...     try:
+    ...         load_snapshot(path)
+    ...     except ValueError as error:
+    ...         print('corrupt' in str(error))
+    ...     rebuilt = load_or_build_snapshot(path, *datasets)
+    True
+    >>> all(list(graph.get_vertices()) == list(built[0].get_vertices()) for graph in first + rebuilt)
+    True
+    >>> edges = list(built[1].conv_networkx().edges)
+    >>> all(graph.get_weight(*edge) == built[1].get_weight(*edge) for graph in (first[1], rebuilt[1]) for edge in edges)
+    True
+
+    Preconditions:
+        - names_file is the path to a txt file corresponding to a list of first names
+        - edges_file is the path to a txt file corresponding to the edges of the friend network
+    """
+    if os.path.exists(path):
+        try:
+            with instrument.phase('snapshot load'):
+                return load_snapshot(path, names_file, edges_file, seed)
+        except (ValueError, KeyError):
+            pass
+
+    graphs = load_compact_network(names_file, edges_file, seed)
+    with instrument.phase('snapshot write'):
+        save_snapshot(path, graphs, names_file, edges_file, seed)
+    with instrument.phase('snapshot load'):
+        return load_snapshot(path, names_file, edges_file, seed, verify=False)
+
+
+def _source_stamp(path: str) -> list[int]:
+    """Return the size and modification time (in nanoseconds) of the file at the given path."""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _take(body: memoryview, position: int, length: int, typecode: str) -> tuple[memoryview, int]:
+    """Return a view of length bytes of body starting at position, cast to the given typecode, and
+    the aligned position just after it.
+    """
+    end = position + length
+    return body[position:end].cast(typecode), end + (-end % _ALIGNMENT)
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['json', 'mmap', 'os', 'zlib', 'instrument', 'compact'],
+        'allowed-io': ['save_snapshot', 'load_snapshot'],
+        'max-line-length': 120,
+    })
@@ -16,71 +16,130 @@ expressly prohibited.
 
 This file is Copyright (c) 2024 CSC111 Friend Network
 """
+from typing import Any
+import base64
+import hashlib
+import json
+import os
+import random
+import webbrowser
+
 import networkx as nx
-from plotly.graph_objs import Figure, Scatter
+import numpy as np
+from plotly.graph_objs import Figure, Scatter, Scattergl
 import plotly
 
 import data
+import instrument
+import layout
+from compact import CompactGraph
 
 LINE_COLOUR = 'rgb(210,210,210)'
 VERTEX_BORDER_COLOUR = 'rgb(50, 50, 50)'
 BOOK_COLOUR = 'rgb(89, 205, 105)'
 USER_COLOUR = 'rgb(105, 89, 205)'
 
+# Views with more people than this are drawn with WebGL instead of SVG
+WEBGL_THRESHOLD = 1000
+
+# The number of friends followed from a hub when building a focused view
+MAX_HUB_NEIGHBOURS = 50
+
+# The plotly.js bundle referenced by compact exports (typed arrays need plotly.js 2.28 or later)
+PLOTLY_JS_URL = 'https://cdn.plot.ly/plotly-2.35.2.min.js'
+
+# Where layouts are cached between runs, keyed by the drawn graph and layout parameters
+LAYOUT_CACHE_DIR = '.layout-cache'
+
+
+def visualize_graph(graph_tuple: tuple[data.Graph, data.WeightedGraph] | tuple[CompactGraph, CompactGraph],
+                    start: str, end: str, weighted: bool, max_vertices: int = 5000, layout_seed: int = 1,
+                    auto_open: bool = True, hops: int | None = 2,
+                    max_hub_neighbours: int = MAX_HUB_NEIGHBOURS, export: str = 'inline',
+                    filename: str = 'temp-plot.html', data_dir: str | None = None,
+                    warm_start: dict | None = None) -> dict:
+    """Use plotly and networkx to visualize the given graph, and return the positions of the
+    people drawn.
+
+    The drawing is centred on the path from start to end: it shows the path and the people within
+    the given number of hops of it (see focus_subgraph), up to max_vertices people. If hops is None,
+    the first max_vertices people of the network are drawn instead, as returned by conv_networkx.
+    Views with more than WEBGL_THRESHOLD people are drawn with WebGL.
 
-def visualize_graph(graph_tuple: tuple[data.Graph, data.WeightedGraph],
-                    start: str, end: str, weighted: bool) -> None:
-    """Use plotly and networkx to visualize the given graph.
+    The force-directed layout (see layout.force_layout) is seeded with layout_seed and cached in
+    LAYOUT_CACHE_DIR, so drawing the same view again skips the layout. If warm_start is given,
+    such as the positions returned by an earlier call, a view that is not cached yet keeps everyone
+    already drawn where they were and only places the new people, so a view that only differs by a
+    few people is drawn quickly and looks just like before. The plot is written to filename, and
+    opened in a browser if auto_open is True.
+
+    With export='inline', the page is written by plotly with plotly.js inlined. With
+    export='compact', the page loads plotly.js from PLOTLY_JS_URL and stores coordinates as base64
+    float32 arrays (see write_compact_html). If data_dir is also given, the people and friendships
+    of the view are written to a data file in data_dir named after the view, and the page only
+    holds the highlighted path; renders of the same view share that file.
+
+    Preconditions:
+        - export in {'inline', 'compact'}
     """
     if weighted:
         graph = graph_tuple[1]
     else:
         graph = graph_tuple[0]
 
-    pos = getattr(nx, 'spring_layout')(graph.conv_networkx(5000))
-    nx.set_node_attributes(graph.conv_networkx(5000), pos, 'pos')
-
-    x_values = [pos[k][0] for k in graph.conv_networkx(5000).nodes]
-    y_values = [pos[k][1] for k in graph.conv_networkx(5000).nodes]
-
-    x_edges = []
-    y_edges = []
+    with instrument.phase('search'):
+        path = graph.get_friend_path(start, end)
+    with instrument.phase('networkx'):
+        if hops is None:
+            graph_nx = graph.conv_networkx(max_vertices)
+        else:
+            graph_nx = focus_subgraph(graph, [start, end] + [edge[1] for edge in path], hops, max_vertices,
+                                      max_hub_neighbours, layout_seed)
+    with instrument.phase('layout'):
+        view_key = view_digest(graph_nx, layout_seed)
+        pos = cached_layout(graph_nx, layout_seed, warm_start=warm_start)
 
     # Output path from user to target in console
     print("\nPath to Target: ", end='')
-    for i in range(len(graph.get_friend_path(start, end))):
+    for i, edge in enumerate(path):
         if i == 0:
-            print(f'{graph.get_friend_path(start, end)[i][0]}, {graph.get_friend_path(start, end)[i][1]}', end='')
+            print(f'{edge[0]}, {edge[1]}', end='')
         else:
-            print(f', {graph.get_friend_path(start, end)[i][1]}', end='')
+            print(f', {edge[1]}', end='')
 
-    x_highlight_edges = []
-    y_highlight_edges = []
+    # Build the coordinates of the nodes and of the edges (separated by NaN gaps) as arrays
+    nodes = list(graph_nx.nodes)
+    index = {node: i for i, node in enumerate(nodes)}
+    coordinates = np.array([pos[node] for node in nodes], dtype=float).reshape(-1, 2)
+    edges = np.array([(index[u], index[v]) for u, v in graph_nx.edges], dtype=np.int64).reshape(-1, 2)
 
-    for edge in graph.conv_networkx(5000).edges:
-        if edge in graph.get_friend_path(start, end) or (edge[1], edge[0]) in graph.get_friend_path(start, end):
-            x_highlight_edges += [pos[edge[0]][0], pos[edge[1]][0], None]
-            y_highlight_edges += [pos[edge[0]][1], pos[edge[1]][1], None]
-        else:
-            x_edges += [pos[edge[0]][0], pos[edge[1]][0], None]
-            y_edges += [pos[edge[0]][1], pos[edge[1]][1], None]
+    path_edges = {(index[u], index[v]) for u, v in path if u in index and v in index}
+    path_edges |= {(v, u) for u, v in path_edges}
+    highlighted = np.array([(u, v) in path_edges for u, v in edges], dtype=bool).reshape(-1)
+
+    # Every friendship is drawn in the first trace, so it can be shared by renders of other paths,
+    # and the path is drawn over it
+    x_edges, y_edges = _edge_coordinates(coordinates, edges)
+    x_highlight_edges, y_highlight_edges = _edge_coordinates(coordinates, edges[highlighted])
 
-    fig = Figure(data=[Scatter(x=x_edges,
+    scatter = Scattergl if len(nodes) > WEBGL_THRESHOLD else Scatter
+    fig = Figure(data=[scatter(x=x_edges,
                                y=y_edges,
                                mode='lines',
                                name='edges',
                                line={"color": 'rgb(144,238,144)', "width": 0.5},
                                hoverinfo='none',
-                               ), Scatter(x=x_values,
-                                          y=y_values,
+                               ), scatter(x=coordinates[:, 0],
+                                          y=coordinates[:, 1],
                                           mode='markers',
                                           name='nodes',
-                                          marker={"symbol": 'circle-dot', "size": 5, "color": 'rgb(0,0,128)',
+                                          marker={"symbol": 'circle-dot' if scatter is Scatter else 'circle',
+                                                  "size": 5, "color": 'rgb(0,0,128)',
                                                   "line": {"color": VERTEX_BORDER_COLOUR, "width": 0.5}},
-                                          text=list(graph.conv_networkx(5000).nodes),
+                                          text=nodes,
                                           hovertemplate='%{text}',
                                           hoverlabel={'namelength': 0}
-                                          ), Scatter(x=x_highlight_edges,
+                                          ), scatter(x=x_highlight_edges,
                                                      y=y_highlight_edges,
                                                      mode='lines',
                                                      name='edges',
@@ -92,7 +151,189 @@ def visualize_graph(graph_tuple: tuple[data.Graph, data.WeightedGraph],
     fig.update_yaxes(showgrid=False, zeroline=False, visible=False)
 
     # fig.show()
-    plotly.offline.plot(fig)
+    if export == 'compact':
+        data_file = None if data_dir is None else os.path.join(data_dir, view_key + '.json')
+        with instrument.phase('html'):
+            write_compact_html(fig, filename, data_file, shared_traces=2)
+        if auto_open:
+            webbrowser.open('file://' + os.path.abspath(filename))
+    else:
+        with instrument.phase('html'):
+            plotly.offline.plot(fig, filename=filename, auto_open=auto_open)
+
+    return pos
+
+
+def write_compact_html(fig: Figure, filename: str, data_file: str | None = None, shared_traces: int = 0) -> None:
+    """Write the given figure to an HTML page at filename that loads plotly.js from PLOTLY_JS_URL.
+
+    The x and y values of every trace are stored as base64-encoded little-endian float32 arrays,
+    which plotly.js decodes directly. If data_file is given, the layout and the first shared_traces
+    traces are written there instead (unless the file already exists) and fetched by the page, so
+    pages that draw the same view can share them. Browsers only allow that fetch when the page is
+    served over HTTP, not opened from a file.
+    """
+    spec = json.loads(fig.to_json())
+    for trace in spec['data']:
+        for axis in ('x', 'y'):
+            if axis in trace:
+                trace[axis] = _encode_array(trace[axis])
+
+    if data_file is None:
+        script = f'const figure = {json.dumps(spec)};\nPlotly.newPlot("graph", figure.data, figure.layout);'
+    else:
+        if not os.path.exists(data_file):
+            os.makedirs(os.path.dirname(data_file) or '.', exist_ok=True)
+            temp_file = data_file + '.tmp'
+            with open(temp_file, 'w') as f:
+                json.dump({'data': spec['data'][:shared_traces], 'layout': spec['layout']}, f)
+            os.replace(temp_file, data_file)
+
+        data_url = os.path.relpath(data_file, os.path.dirname(os.path.abspath(filename))).replace(os.sep, '/')
+        script = (f'const traces = {json.dumps(spec["data"][shared_traces:])};\n'
+                  f'fetch({json.dumps(data_url)}).then(response => response.json()).then(shared =>\n'
+                  f'    Plotly.newPlot("graph", shared.data.concat(traces), shared.layout));')
+
+    # Stop names in the data from closing the script element early
+    script = script.replace('</', '<\\/')
+
+    with open(filename, 'w') as f:
+        f.write('<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8">'
+                f'<script src="{PLOTLY_JS_URL}"></script></head>\n'
+                '<body style="margin: 0"><div id="graph" style="width: 100vw; height: 100vh"></div>\n'
+                f'<script>\n{script}\n</script>\n</body>\n</html>\n')
+
+
+def _encode_array(values: Any) -> dict | list:
+    """Return the given numbers as a plotly.js typed array specification, with missing values as
+    NaN. Values that are already encoded, or are not numbers, are returned unchanged.
+    """
+    if isinstance(values, dict):
+        if 'bdata' not in values:
+            return values
+        values = np.frombuffer(base64.b64decode(values['bdata']), dtype=np.dtype(values['dtype']).newbyteorder('<'))
+
+    try:
+        array = np.asarray([np.nan if value is None else value for value in values], dtype='<f4')
+    except (TypeError, ValueError):
+        return values
+    return {'dtype': 'f4', 'bdata': base64.b64encode(array.tobytes()).decode()}
+
+
+def focus_subgraph(graph: data.Graph | CompactGraph, centre: list, hops: int = 2, max_vertices: int = 5000,
+                   max_hub_neighbours: int = MAX_HUB_NEIGHBOURS, seed: int = 1) -> nx.Graph:
+    """Return the networkx graph of the people within hops of any person in centre, and the
+    friendships between them.
+
+    Every person in centre is included. The others are added in breadth-first order until there are
+    max_vertices people. When a person with more than max_hub_neighbours friends (a hub, such as
+    the ego raven) is expanded, only a seeded random sample of max_hub_neighbours of their friends
+    is followed, so hubs do not fill the view on their own.
+
+    >>> g = data.Graph()
+    >>> for name in ['a', 'b', 'c', 'd', 'e']:
+    ...     g.add_vertex(name)
+    >>> for edge in [('a', 'b'), ('b', 'c'), ('c', 'd'), ('d', 'e')]:
+    ...     g.add_edge(*edge)
+    >>> view = focus_subgraph(g, ['a'], hops=2)
+    >>> sorted(view.nodes)
+    ['a', 'b', 'c']
+    >>> sorted(tuple(sorted(edge)) for edge in view.edges)
+    [('a', 'b'), ('b', 'c')]
+    """
+    rng = random.Random(seed)
+    chosen = dict.fromkeys(centre)
+    frontier = list(chosen)
+
+    for _ in range(hops):
+        next_frontier = []
+        for item in frontier:
+            neighbours = sorted(graph.get_neighbours(item), key=str)
+            if len(neighbours) > max_hub_neighbours:
+                neighbours = rng.sample(neighbours, max_hub_neighbours)
+
+            for neighbour in neighbours:
+                if len(chosen) >= max_vertices:
+                    break
+                if neighbour not in chosen:
+                    chosen[neighbour] = None
+                    next_frontier.append(neighbour)
+        frontier = next_frontier
+
+    graph_nx = nx.Graph()
+    graph_nx.add_nodes_from(chosen)
+    for item in chosen:
+        graph_nx.add_edges_from((item, neighbour) for neighbour in graph.get_neighbours(item) if neighbour in chosen)
+
+    return graph_nx
+
+
+def _edge_coordinates(coordinates: np.ndarray, edges: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return the x and y values that draw the given edges as one line trace, with a NaN gap after
+    each edge.
+    """
+    gaps = np.full(len(edges), np.nan)
+    x_values = np.column_stack([coordinates[edges[:, 0], 0], coordinates[edges[:, 1], 0], gaps]).ravel()
+    y_values = np.column_stack([coordinates[edges[:, 0], 1], coordinates[edges[:, 1], 1], gaps]).ravel()
+    return x_values, y_values
+
+
+def view_digest(graph_nx: nx.Graph, seed: int = 1) -> str:
+    """Return a hex digest of the nodes (in order) and edges of graph_nx and the layout parameters
+    used to draw it.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps({'layout': 'force', 'seed': seed}).encode())
+    digest.update(repr(list(graph_nx.nodes)).encode())
+    digest.update(repr(sorted(sorted(map(repr, edge)) for edge in graph_nx.edges)).encode())
+    return digest.hexdigest()
+
+
+def cached_layout(graph_nx: nx.Graph, seed: int = 1, cache_dir: str = LAYOUT_CACHE_DIR,
+                  warm_start: dict | None = None) -> dict:
+    """Return the force-directed layout of graph_nx with the given seed, mapping each node to an
+    array of its x and y coordinates, reading it from cache_dir if it was computed before and
+    saving it there otherwise.
+
+    If warm_start is given, the people in warm_start keep their positions there and only the
+    others are placed (see layout.force_layout). The cache key is the view_digest of graph_nx,
+    together with the warm_start positions of its nodes if warm_start is given, so any change to
+    the drawn graph or to where its people start gives a new layout.
+
+    >>> import tempfile
+    >>> graph_nx = nx.path_graph(['a', 'b', 'c'])
+    >>> with tempfile.TemporaryDirectory() as cache_dir:
+    ...     pos = cached_layout(graph_nx, cache_dir=cache_dir)
+    ...     again = cached_layout(graph_nx, cache_dir=cache_dir)
+    ...     warm = cached_layout(graph_nx, cache_dir=cache_dir, warm_start={'a': [5.0, 5.0]})
+    >>> all(np.allclose(again[v], pos[v]) for v in pos)
+    True
+    >>> isinstance(again['a'] - again['b'], np.ndarray)
+    True
+    >>> warm['a'].tolist()
+    [5.0, 5.0]
+    """
+    key = view_digest(graph_nx, seed)
+    if warm_start is not None:
+        start = [[repr(v), [float(x) for x in warm_start[v]]] for v in graph_nx.nodes if v in warm_start]
+        key += '-' + hashlib.blake2b(json.dumps(start).encode(), digest_size=16).hexdigest()
+    cache_file = os.path.join(cache_dir, key + '.json')
+
+    if os.path.exists(cache_file):
+        with open(cache_file) as f:
+            positions = json.load(f)
+        if len(positions) == graph_nx.number_of_nodes():
+            return dict(zip(graph_nx.nodes, np.array(positions, dtype=float)))
+
+    pos = layout.force_layout(graph_nx, pos=warm_start, seed=seed)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_file = cache_file + '.tmp'
+    with open(temp_file, 'w') as f:
+        json.dump([[float(pos[k][0]), float(pos[k][1])] for k in graph_nx.nodes], f)
+    os.replace(temp_file, cache_file)
+
+    return pos
 
 
 if __name__ == '__main__':
@@ -107,7 +348,8 @@ if __name__ == '__main__':
     import python_ta
 
     python_ta.check_all(config={
-        'extra-imports': ['networkx', 'data', 'plotly.graph_objs', 'plotly'],
-        'allowed-io': ['visualize_graph'],
+        'extra-imports': ['typing', 'base64', 'hashlib', 'json', 'os', 'random', 'webbrowser', 'networkx', 'numpy',
+                          'data', 'instrument', 'layout', 'compact', 'plotly.graph_objs', 'plotly'],
+        'allowed-io': ['visualize_graph', 'cached_layout', 'write_compact_html'],
         'max-line-length': 120
     })
@@ -0,0 +1,94 @@
+"""CSC111 Winter 2024 Project 2: Worker Pools
+
+Instructions (READ THIS FIRST!)
+===============================
+
+This Python module contains the functions responsible for starting the pools of worker processes
+used by batch path queries, centrality estimates and the query service. Every worker is handed
+the object its tasks share, such as the friend network, once when it starts, instead of with
+every task.
+
+The object is passed to the pool's initializer, which keeps it for the tasks run by that worker.
+On platforms that can fork, the initializer's arguments reach the worker by forking rather than
+by pickling, so the workers share the network with this process instead of receiving a copy.
+Nothing is stored in this process, so any number of pools can run at the same time.
+
+Copyright and Usage Information
+===============================
+
+This file is provided solely for the personal and private use of students
+taking CSC111 at the University of Toronto St. George campus. All forms of
+distribution of this code, whether as given or with any changes, are
+expressly prohibited.
+
+This file is Copyright (c) 2024 CSC111 Friend Network
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+from multiprocessing.pool import Pool
+from typing import Any
+import multiprocessing
+
+# The object shared by the tasks run in this worker process, under 'shared', set by _init_worker
+_WORKER_SHARED: dict[str, Any] = {}
+
+
+def start_pool(workers: int, shared: Any) -> Pool:
+    """Return a multiprocessing pool of the given number of worker processes, whose tasks can get
+    the given object from worker_shared.
+
+    >>> with start_pool(2, {'greeting': 'hello'}) as pool:
+    ...     pool.map(_shared_item, ['greeting', 'greeting'])
+    ['hello', 'hello']
+    """
+    return _context().Pool(workers, _init_worker, (shared,))
+
+
+def start_executor(workers: int, shared: Any) -> ProcessPoolExecutor:
+    """Return a process pool executor of the given number of worker processes, whose tasks can get
+    the given object from worker_shared.
+    """
+    return ProcessPoolExecutor(workers, _context(), _init_worker, (shared,))
+
+
+def worker_shared() -> Any:
+    """Return the object shared by the tasks of the pool this worker process belongs to.
+
+    Preconditions:
+        - this is called in a worker process started by start_pool or start_executor
+    """
+    return _WORKER_SHARED['shared']
+
+
+def _context() -> BaseContext:
+    """Return the fork context if this platform supports it, and the default context otherwise."""
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def _init_worker(shared: Any) -> None:
+    """Keep the given object for the tasks run by this worker process."""
+    _WORKER_SHARED['shared'] = shared
+
+
+def _shared_item(key: Any) -> Any:
+    """Return the value of the given key in this worker's shared dictionary."""
+    return worker_shared()[key]
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+    # (In PyCharm, select the lines below and press Ctrl/Cmd + / to toggle comments.)
+    # You can use "Run file in Python Console" to run PythonTA,
+    # and then also test your methods manually in the console.
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['concurrent.futures', 'multiprocessing', 'multiprocessing.context', 'multiprocessing.pool'],
+        'max-line-length': 120,
+    })